@@ -14,6 +14,7 @@ python class for convenient handling inside the concert conductor node.
 # Imports
 ##############################################################################
 
+import collections
 import copy
 import threading
 
@@ -26,6 +27,47 @@ import rospy
 from .exceptions import InvalidTransitionException
 from . import transitions
 
+##############################################################################
+# Ros Names
+##############################################################################
+
+RosNames = collections.namedtuple('RosNames', [
+    'remote_gateway_name',    # gateway name as used in gateway remote rules
+    'application_namespace',  # namespace the client is invited into (from the concert alias)
+    'platform_info',          # service
+    'list_rapps',             # service
+    'invite',                 # service
+    'start_rapp',             # service
+    'stop_rapp',              # service
+    'status',                 # topic
+])
+"""
+Immutable table of the resolved ros names for interacting with a concert client. Fields
+are named after the service/topic basenames so they can also be looked up with ``getattr``.
+"""
+
+
+def create_ros_names(gateway_name, concert_alias):
+    """
+    Resolve the ros names for interacting with a concert client.
+
+    :param str gateway_name: the concert client's name on the gateway network
+    :param str concert_alias: the human readable concert alias for the client
+    :returns: the resolved names
+    :rtype: :class:`.RosNames`
+    """
+    prefix = '/' + gateway_name.lower().replace(' ', '_') + '/'
+    return RosNames(
+        remote_gateway_name=gateway_name.lstrip('/'),
+        application_namespace=concert_alias.lower().replace(' ', '_'),
+        platform_info=prefix + 'platform_info',
+        list_rapps=prefix + 'list_rapps',
+        invite=prefix + 'invite',
+        start_rapp=prefix + 'start_rapp',
+        stop_rapp=prefix + 'stop_rapp',
+        status=prefix + 'status',
+    )
+
 ##############################################################################
 # Client Class
 ##############################################################################
@@ -46,6 +88,7 @@ class ConcertClient(object):
         '_timestamps',         # last observed and last state change timestamps
         '_transition_handlers',
         '_lock',               # for protecting access to the msg variable
+        '_ros_names',          # RosNames, lazily built, reset if the names it depends on change
     ]
 
     State = concert_msgs.ConcertClientState
@@ -77,14 +120,13 @@ class ConcertClient(object):
         # (the transition handlers) so that is why we store a cached copy here.
         self._cached_status_msg = None
         self._lock = threading.Lock()
+        self._ros_names = None
 
         # timestamps
         self._timestamps = {}
         self._timestamps['last_seen'] = rospy.get_rostime()
         self._timestamps['last_state_change'] = rospy.get_rostime()
-
-        # status
-        rospy.Subscriber('/' + self.gateway_name.lower().replace(' ', '_') + '/' + 'status', rapp_manager_msgs.Status, self._ros_status_cb)
+        # status updates are relayed in via cache_status() by the StatusMultiplexer
 
     ##############################################################################
     # Conveniences
@@ -98,6 +140,7 @@ class ConcertClient(object):
     @concert_alias.setter
     def concert_alias(self, value):
         self.msg.name = value
+        self._ros_names = None
 
     @property
     def gateway_name(self):
@@ -107,6 +150,14 @@ class ConcertClient(object):
     @gateway_name.setter
     def gateway_name(self, value):
         self.msg.gateway_name = value
+        self._ros_names = None
+
+    @property
+    def ros_names(self):
+        """Resolved ros names (:class:`.RosNames`) of the services and topics used to interact with this client."""
+        if self._ros_names is None:
+            self._ros_names = create_ros_names(self.msg.gateway_name, self.msg.name)
+        return self._ros_names
 
     @property
     def is_local_client(self):
@@ -275,14 +326,15 @@ class ConcertClient(object):
         return s
 
     ##############################################################################
-    # Ros Callbacks
+    # Status Updates
     ##############################################################################
 
-    def _ros_status_cb(self, msg):
+    def cache_status(self, msg):
         """
         Update the concert client msg data with fields from this updated status.
         Just store it, ready to be processed in the update() method by the
-        conductor spin loop (via the transition handlers)
+        conductor spin loop (via the transition handlers). This is called from
+        the subscriber threads of the :class:`.StatusMultiplexer`.
 
         :param rocon_app_manager_msgs.Status msg:
         """
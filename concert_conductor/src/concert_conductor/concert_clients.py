@@ -24,6 +24,8 @@ import rospy
 
 from .concert_client import ConcertClient
 from .notifications import Notifications
+from .probe_scheduler import ProbeScheduler
+from .status_multiplexer import StatusMultiplexer
 from .transitions import State
 
 ##############################################################################
@@ -85,6 +87,8 @@ class ConcertClients(object):
         '_flat_client_dict',  # { gateway_name : conductor.ConcertClient }
         '_clients_by_state',  # super dictionary of all known concert clients keyed by state (see __init__)
         '_state_handlers',    # { State : handler function } for state machine handling of concert clients
+        '_status_multiplexer',  # owns the rapp manager status subscriptions for the clients that need them
+        '_probe_scheduler',   # decides when pending and joining clients are next probed for their services
         '_publish_concert_clients',
         '_publish_graph',
     ]
@@ -123,6 +127,15 @@ class ConcertClients(object):
         for state in ConcertClient.complete_list_of_states():
             self._clients_by_state[state] = {}  # { remote gateway name : concert_client.ConcertClient }
             self._state_handlers[state] = getattr(self, "_update_" + state + "_client")
+        self._status_multiplexer = StatusMultiplexer()
+        """
+        Relays rapp manager status updates to clients, subscribing only for those in a state that needs them.
+        """
+        self._probe_scheduler = ProbeScheduler(initial_delay=self._param['probe_initial_delay'],
+                                               max_delay=self._param['probe_max_delay'])
+        """
+        Backoff scheduling for pending and joining clients that are waiting on their services to appear.
+        """
 
     def __contains__(self, gateway_name):
         return gateway_name in self._flat_client_dict
@@ -136,6 +149,7 @@ class ConcertClients(object):
         """
         for concert_client in self._clients_by_state[State.AVAILABLE].values():
             self._uninvite_client(concert_client)
+        self._status_multiplexer.shutdown()
 
     ##############################################################################
     # Runtime
@@ -157,6 +171,9 @@ class ConcertClients(object):
         # set flags to look for notifications
         notifications = Notifications()
 
+        # flag pending/joining clients that are due to be probed again
+        self._probe_scheduler.update(rospy.get_time())
+
         # existing client updates
         for (gateway_name, concert_client) in self._flat_client_dict.items():
             if gateway_name in remote_gateway_index.keys():
@@ -196,14 +213,17 @@ class ConcertClients(object):
         """
         rospy.loginfo("Conductor : new client discovered [%s]" % remote_gateway.name)
         concert_alias = self._generate_concert_alias(remote_gateway.name)
-        self._local_gateway.request_pulls(remote_gateway.name)
         is_local_client = _is_local_client(self._local_gateway.ip, remote_gateway.ip)  # is it on the same machine as the concert
         concert_client = ConcertClient(remote_gateway, concert_alias, is_local_client)
+        self._local_gateway.request_pulls(concert_client.ros_names)
         self._flat_client_dict[remote_gateway.name] = concert_client
         self._clients_by_state[State.PENDING][remote_gateway.name] = concert_client
+        self._probe_scheduler.add(remote_gateway.name)
 
     def _send_to_oblivion(self, gateway_name):
-        self._local_gateway.request_pulls(gateway_name, cancel=True)  # cancel default pulls
+        self._local_gateway.request_pulls(self._flat_client_dict[gateway_name].ros_names, cancel=True)  # cancel default pulls
+        self._status_multiplexer.unsubscribe(gateway_name)
+        self._probe_scheduler.remove(gateway_name)
         del self._flat_client_dict[gateway_name]
         for concert_clients in self._clients_by_state.values():
             try:
@@ -224,6 +244,9 @@ class ConcertClients(object):
         If the services are found, it extracts the information and dumps that into the concert client
         instance before switching state to UNINVITED.
 
+        Probes are only made when the client is due according to the probe scheduler and are
+        backed off after each failure.
+
         :param concert_msgs.RemoteGateway remote_gateway: updated information from the gateway network
         :param concert_client.ConcertClient concert_client: update a client that isn't currently visible.
         :returns: notification of whether there was an update or not
@@ -232,20 +255,26 @@ class ConcertClients(object):
         # it disappeared
         if remote_gateway is None:
             self._transition(concert_client, State.GONE)()
+            return True
+
+        if not self._probe_scheduler.is_due(concert_client.gateway_name):
+            return False
 
         # Check for handles
-        platform_info_service_name = '/' + concert_client.gateway_name.lower().replace(' ', '_') + '/' + 'platform_info'
-        list_rapps_service_name = '/' + concert_client.gateway_name.lower().replace(' ', '_') + '/' + 'list_rapps'
+        ros_names = concert_client.ros_names
+        platform_info_service_name = ros_names.platform_info
+        list_rapps_service_name = ros_names.list_rapps
         try:
             rospy.wait_for_service(platform_info_service_name, 0.1)
             rospy.wait_for_service(list_rapps_service_name, 0.1)
         except rospy.ROSException:  # timeout
-            if concert_client.time_since_last_state_change() > 10.0:
+            if concert_client.time_since_last_state_change() > self._param['pending_timeout']:
                 rospy.logwarn("Conductor : timed out waiting for client's platform_info and list_rapps topics to be pulled [%s]" % concert_client.concert_alias)
                 self._transition(concert_client, State.BAD)()
-                self._local_gateway.request_pulls(remote_gateway.name, cancel=True)
+                self._local_gateway.request_pulls(concert_client.ros_names, cancel=True)
                 return True
             else:
+                self._backoff_probe(concert_client, self._param['pending_timeout'])
                 return False  # let's keep trying till the last_state_change timeout kicks in
         except rospy.ROSInterruptException:
             return False
@@ -257,14 +286,15 @@ class ConcertClients(object):
             if platform_info.version != rocon_std_msgs.Strings.ROCON_VERSION:
                 rospy.logwarn("Conductor : concert client and conductor rocon versions do not match [%s][%s]" % (platform_info.version, rocon_std_msgs.Strings.ROCON_VERSION))
                 self._transition(concert_client, State.BAD)()
-                self._local_gateway.request_pulls(remote_gateway.name, cancel=True)
+                self._local_gateway.request_pulls(concert_client.ros_names, cancel=True)
                 return True
             available_rapps = list_rapps_service().available_rapps
             self._transition(concert_client, State.UNINVITED)(platform_info, available_rapps)
             # no longer needed as we have the information stored
-            self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['platform_info', 'list_rapps'], topic_names=[])
+            self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['platform_info', 'list_rapps'], topic_names=[])
             return True
         except (rospy.ServiceException, rospy.ROSInterruptException):
+            self._backoff_probe(concert_client, self._param['pending_timeout'])
             return False  # let's keep trying till the last_state_change timeout kicks in
         return False
 
@@ -319,20 +349,20 @@ class ConcertClients(object):
         # it disappeared
         if remote_gateway is None:
             self._transition(concert_client, State.GONE)()
-            self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['invite'], topic_names=[])
+            self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['invite'], topic_names=[])
             return True
 
         if self._param['local_clients_only'] and not concert_client.is_local_client:
             rospy.loginfo("Conductor : shunning this (non-local) client [%s][%s]" % (concert_client.concert_alias, concert_client.gateway_name))
             self._transition(concert_client, State.BLOCKING)()
-            self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['invite'], topic_names=[])
+            self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['invite'], topic_names=[])
             return True
         elif self._param['auto_invite']:
             # try an invite
-            invite = rospy.ServiceProxy('/' + concert_client.gateway_name.lower().replace(' ', '_') + '/invite', rocon_app_manager_srvs.Invite)
+            invite = rospy.ServiceProxy(concert_client.ros_names.invite, rocon_app_manager_srvs.Invite)
             try:
                 response = invite(remote_target_name=self._concert_name,
-                                  application_namespace=concert_client.concert_alias.lower().replace(' ', '_'),
+                                  application_namespace=concert_client.ros_names.application_namespace,
                                   cancel=False
                                   )
                 if response.result:
@@ -347,7 +377,7 @@ class ConcertClients(object):
                        ):
                         rospy.logwarn("Conductor : invitation to %s was blocked [%s][%s]" % (concert_client.gateway_name, response.message, concert_client.gateway_name))
                         self._transition(concert_client, State.BLOCKING)()
-                        self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['invite'], topic_names=[])
+                        self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['invite'], topic_names=[])
                     elif response.error_code == rocon_app_manager_msgs.ErrorCodes.ALREADY_REMOTE_CONTROLLED:
                         rospy.logwarn("Conductor : invitation to %s was refused [%s][%s]" % (concert_client.gateway_name, response.message, concert_client.gateway_name))
                         self._transition(concert_client, State.BUSY)()
@@ -355,12 +385,12 @@ class ConcertClients(object):
                         rospy.logwarn("Conductor : invitation to %s failed [%s][%s]" % (concert_client.gateway_name, response.message, concert_client.gateway_name))
                         self._transition(concert_client, State.BAD)()
                         self._clients_by_state[State.BAD][remote_gateway.name] = concert_client
-                        self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['invite'], topic_names=[])
+                        self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['invite'], topic_names=[])
                     return True
             except rospy.ServiceException:
                 rospy.logwarn("Conductor : invitation to %s was sent, but not received [service exception][%s]" % (concert_client.concert_alias, concert_client.gateway_name))
                 self._transition(concert_client, State.BAD)()
-                self._local_gateway.request_pulls(remote_gateway.name, cancel=True, service_names=['invite'], topic_names=[])
+                self._local_gateway.request_pulls(concert_client.ros_names, cancel=True, service_names=['invite'], topic_names=[])
                 return True
             except rospy.ROSInterruptException:  # interrupted by conductor's rosmaster shutdown
                 return False
@@ -381,18 +411,22 @@ class ConcertClients(object):
             self._transition(concert_client, State.GONE)()
             return True
 
+        if not self._probe_scheduler.is_due(concert_client.gateway_name):
+            return False
+
         # Check for handles
-        start_app_service_name = '/' + concert_client.gateway_name.lower().replace(' ', '_') + '/start_rapp'
-        stop_app_service_name = '/' + concert_client.gateway_name.lower().replace(' ', '_') + '/stop_rapp'
+        start_app_service_name = concert_client.ros_names.start_rapp
+        stop_app_service_name = concert_client.ros_names.stop_rapp
         try:
             rospy.wait_for_service(start_app_service_name, 0.1)
             rospy.wait_for_service(stop_app_service_name, 0.1)
         except rospy.ROSException:  # timeout
-            if concert_client.time_since_last_state_change() > 10.0:
+            if concert_client.time_since_last_state_change() > self._param['joining_timeout']:
                 rospy.logwarn("Conductor : timed out waiting for client's start_rapp and stop_rapp services to be flipped [%s]" % concert_client.concert_alias)
                 self._transition(concert_client, State.BAD)()
                 return True
             else:
+                self._backoff_probe(concert_client, self._param['joining_timeout'])
                 return False  # let's keep trying till the last_state_change timeout kicks in
         except rospy.ROSInterruptException:
             return False
@@ -457,7 +491,25 @@ class ConcertClients(object):
         old_state = concert_client.state
         self._clients_by_state[new_state][concert_client.gateway_name] = concert_client
         del self._clients_by_state[old_state][concert_client.gateway_name]
-        return concert_client.transition(new_state)
+        transition_handler = concert_client.transition(new_state)
+        self._status_multiplexer.update(concert_client)
+        if new_state == State.JOINING:
+            self._probe_scheduler.add(concert_client.gateway_name)
+        else:
+            self._probe_scheduler.remove(concert_client.gateway_name)
+        return transition_handler
+
+    def _backoff_probe(self, concert_client, timeout):
+        """
+        Reschedule the next probe of a client after a failed probe, but no later than the
+        time at which it would time out in its current state.
+
+        :param concert_clients.ConcertClient concert_client:
+        :param float timeout: time permitted in the current state before giving up on the client
+        """
+        now = rospy.get_time()
+        deadline = now + timeout - concert_client.time_since_last_state_change()
+        self._probe_scheduler.backoff(concert_client.gateway_name, now, not_after=deadline)
 
     def _uninvite_client(self, concert_client):
         """
@@ -469,26 +521,20 @@ class ConcertClients(object):
         if concert_client.state != State.AVAILABLE:
             rospy.logwarn("Conductor : stubbornly refusing to uninvite an uninvited client [%s][%s]" % (concert_client.concert_alias, concert_client.gateway_name))
             return
-        invite = rospy.ServiceProxy('/' + concert_client.gateway_name.lower().replace(' ', '_') + '/invite', rocon_app_manager_srvs.Invite)
+        invite = rospy.ServiceProxy(concert_client.ros_names.invite, rocon_app_manager_srvs.Invite)
         try:
             response = invite(remote_target_name=self._concert_name,
                               application_namespace=concert_client.concert_alias,
                               cancel=True
                               )
             if response.result:
-                concert_client.transition(State.UNINVITED)()
-                self._clients_by_state[State.UNINVITED][concert_client.gateway_name] = concert_client
-                del self._clients_by_state[State.AVAILABLE][concert_client.gateway_name]
+                self._transition(concert_client, State.UNINVITED)()
             else:
                 rospy.logwarn("Conductor : failed to uninvite %s [%s][%s]" % (concert_client.concert_alias, response.message, concert_client.gateway_name))
-                concert_client.transition(State.BAD)()
-                self._clients_by_state[State.BAD][concert_client.gateway.name] = concert_client
-                del self._clients_by_state[State.AVAILABLE][concert_client.gateway.name]
+                self._transition(concert_client, State.BAD)()
         except rospy.ServiceException:
             rospy.logwarn("Conductor : uninvite to %s was sent, but not received [service exception][%s]" % (concert_client.concert_alias, concert_client.gateway_name))
-            concert_client.transition(State.BAD)()
-            self._clients_by_state[State.BAD][concert_client.gateway_name] = concert_client
-            del self._clients_by_state[State.AVAILABLE][concert_client.gateway_name]
+            self._transition(concert_client, State.BAD)()
         except rospy.ROSInterruptException:  # interrupted by conductor's rosmaster shutdown
             pass
 
@@ -108,12 +108,12 @@ class LocalGateway(object):
             return []
         return remote_gateway_info.gateways
 
-    def request_pulls(self, remote_gateway_name, cancel=False, service_names=['platform_info', 'list_rapps', 'invite'], topic_names=['status']):
+    def request_pulls(self, ros_names, cancel=False, service_names=['platform_info', 'list_rapps', 'invite'], topic_names=['status']):
         """
         Handles pull requests and cancels from request gateways for the conductor. Note this
         only applies to topics/services relevant for interacting with concert clients.
 
-        :param str remote_gateway_name: name of a remote gateway to apply to all rules
+        :param concert_client.RosNames ros_names: resolved names of the remote concert client to apply to all rules
         :param bool cancel: to register or unregister the pull requests
         """
         req = gateway_srvs.RemoteRequest()
@@ -121,17 +121,17 @@ class LocalGateway(object):
         req.remotes = []
         for service_name in service_names:
             rule = gateway_msgs.Rule()
-            rule.name = str('/' + remote_gateway_name.lower().replace(' ', '_') + '/' + service_name)
+            rule.name = str(getattr(ros_names, service_name))
             rule.node = ''
             rule.type = gateway_msgs.ConnectionType.SERVICE
-            req.remotes.append(gateway_msgs.RemoteRule(remote_gateway_name.lstrip('/'), rule))
+            req.remotes.append(gateway_msgs.RemoteRule(ros_names.remote_gateway_name, rule))
         for publisher_name in topic_names:
             rule = gateway_msgs.Rule()
-            rule.name = str('/' + remote_gateway_name.lower().replace(' ', '_') + '/' + publisher_name)
+            rule.name = str(getattr(ros_names, publisher_name))
             rule.node = ''
             rule.type = gateway_msgs.ConnectionType.PUBLISHER
-            req.remotes.append(gateway_msgs.RemoteRule(remote_gateway_name.lstrip('/'), rule))
+            req.remotes.append(gateway_msgs.RemoteRule(ros_names.remote_gateway_name, rule))
         # TODO : exception handling for this call
         response = self._services['pull'](req)
         if response.result != gateway_msgs.ErrorCodes.SUCCESS and not cancel:  # don't worry about errors on cleanup
-            rospy.logwarn("Conductor: failed to register pull requests from the concert client [%s]%s" % (remote_gateway_name, service_names))  # TODO : exceptions, but what kind of failures?
+            rospy.logwarn("Conductor: failed to register pull requests from the concert client [%s]%s" % (ros_names.remote_gateway_name, service_names))  # TODO : exceptions, but what kind of failures?
@@ -0,0 +1,127 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+"""
+.. module:: probe_scheduler
+
+This module schedules the probing of concert clients (e.g. waiting for their
+pulled/flipped services to appear) with exponential backoff so that the
+conductor only spends time on clients that are actually due.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import heapq
+import random
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class ProbeScheduler(object):
+    """
+    A priority queue of probe times keyed by next probe time. Each registered
+    key (typically a gateway name) is immediately due on registration and after
+    every failed probe is pushed back by an exponentially growing, jittered delay.
+
+    Times are plain floats (seconds) supplied by the caller, which keeps this
+    independent of ros time.
+    """
+    __slots__ = [
+        '_initial_delay',  # delay after the first failed probe (seconds)
+        '_max_delay',      # ceiling for the delay between probes (seconds)
+        '_multiplier',     # growth factor of the delay between probes
+        '_jitter',         # fraction of the delay to randomly add or subtract
+        '_attempts',       # { key : number of failed probes }
+        '_next_probe',     # { key : scheduled probe time }, authoritative (heap entries may be stale)
+        '_heap',           # [(probe time, key)]
+        '_due',            # set of keys that are currently due
+    ]
+
+    def __init__(self, initial_delay=1.0, max_delay=8.0, multiplier=2.0, jitter=0.2):
+        """
+        :param float initial_delay: delay after the first failed probe (seconds)
+        :param float max_delay: ceiling for the delay between probes (seconds)
+        :param float multiplier: growth factor of the delay between probes
+        :param float jitter: fraction of the delay to randomly add or subtract (0.0 for none)
+        """
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self._attempts = {}
+        self._next_probe = {}
+        self._heap = []
+        self._due = set()
+
+    def __contains__(self, key):
+        return key in self._attempts
+
+    def __len__(self):
+        return len(self._attempts)
+
+    def add(self, key):
+        """
+        Register a key for probing, it will be due immediately. Resets the backoff if
+        it was already registered.
+
+        :param str key:
+        """
+        self._attempts[key] = 0
+        self._next_probe.pop(key, None)
+        self._due.add(key)
+
+    def remove(self, key):
+        """
+        Stop probing for this key (does nothing if it isn't registered).
+
+        :param str key:
+        """
+        self._attempts.pop(key, None)
+        self._next_probe.pop(key, None)
+        self._due.discard(key)
+
+    def update(self, now):
+        """
+        Flag every key whose probe time has been reached as due.
+
+        :param float now: current time (seconds)
+        """
+        while self._heap and self._heap[0][0] <= now:
+            (probe_time, key) = heapq.heappop(self._heap)
+            if self._next_probe.get(key, None) == probe_time:  # otherwise a stale entry
+                del self._next_probe[key]
+                self._due.add(key)
+
+    def is_due(self, key):
+        """
+        :param str key:
+        :returns: whether the key is registered and due for a probe.
+        :rtype: bool
+        """
+        return key in self._due
+
+    def backoff(self, key, now, not_after=None):
+        """
+        Reschedule a key after a failed probe.
+
+        :param str key:
+        :param float now: current time (seconds)
+        :param float not_after: optional time (e.g. a deadline) the next probe may not be scheduled beyond
+        """
+        if key not in self._attempts:
+            return
+        delay = min(self._max_delay, self._initial_delay * (self._multiplier ** self._attempts[key]))
+        if self._jitter:
+            delay *= 1.0 + random.uniform(-self._jitter, self._jitter)
+        probe_time = now + delay
+        if not_after is not None:
+            probe_time = max(now, min(probe_time, not_after))
+        self._attempts[key] += 1
+        self._due.discard(key)
+        self._next_probe[key] = probe_time
+        heapq.heappush(self._heap, (probe_time, key))
@@ -28,6 +28,10 @@ def setup_ros_parameters():
       * ~auto_invite (false) : don't automatically invite clients
       * ~local_clients_only (false) : don't invite clients from other pc's on the network, used for simulations.
       * ~oblivian_timeout (3600) : time before a bad, gone client is removed from the index.
+      * ~pending_timeout (10.0) : time a pending client has to have its platform_info and list_rapps services pulled before it is marked bad.
+      * ~joining_timeout (10.0) : time a joining client has to have its start_rapp and stop_rapp services flipped before it is marked bad.
+      * ~probe_initial_delay (1.0) : delay before reprobing a pending/joining client after the first failed probe.
+      * ~probe_max_delay (8.0) : ceiling for the exponentially growing delay between probes.
 
       :returns: dictionary of parameters
       :rtype: dict { parameter name : value }
@@ -36,4 +40,8 @@ def setup_ros_parameters():
     param['auto_invite'] = rospy.get_param('~auto_invite', False)
     param['local_clients_only'] = rospy.get_param('~local_clients_only', False)
     param['oblivion_timeout'] = rospy.get_param('~oblivion_timeout', 3600)
+    param['pending_timeout'] = rospy.get_param('~pending_timeout', 10.0)
+    param['joining_timeout'] = rospy.get_param('~joining_timeout', 10.0)
+    param['probe_initial_delay'] = rospy.get_param('~probe_initial_delay', 1.0)
+    param['probe_max_delay'] = rospy.get_param('~probe_max_delay', 8.0)
     return param
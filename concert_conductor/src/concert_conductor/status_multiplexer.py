@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+"""
+.. module:: status_multiplexer
+
+This module centrally manages the rapp manager status subscriptions for
+concert clients so that connections and threads stay proportional to the
+part of the fleet that actually needs them.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import threading
+
+import rocon_app_manager_msgs.msg as rapp_manager_msgs
+import rospy
+
+from .transitions import State
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class StatusMultiplexer(object):
+    """
+    Owns the ``/<gateway>/status`` subscriptions for all concert clients. Subscriptions
+    are only made for clients in a state where their rapp manager status is of
+    interest (see :attr:`subscribed_states`) and are dropped again when the client
+    transitions elsewhere. Incoming messages are dispatched to the client via a
+    dictionary lookup on the gateway name.
+
+    .. seealso:: :class:`.ConcertClients`, :class:`.ConcertClient`
+    """
+    __slots__ = [
+        '_subscribers',  # { gateway name : rospy.Subscriber }
+        '_clients',      # { gateway name : concert_client.ConcertClient }
+        '_lock',         # protects the dictionaries from the subscriber callback threads
+    ]
+
+    subscribed_states = [State.UNINVITED, State.AVAILABLE, State.MISSING]
+    """Concert client states for which a status subscription is maintained."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def update(self, concert_client):
+        """
+        Subscribe or unsubscribe depending on the client's current state. Call this
+        after every state transition.
+
+        :param concert_client.ConcertClient concert_client:
+        """
+        if concert_client.state in StatusMultiplexer.subscribed_states:
+            self.subscribe(concert_client)
+        else:
+            self.unsubscribe(concert_client.gateway_name)
+
+    def subscribe(self, concert_client):
+        """
+        Start relaying status messages to this client (does nothing if already subscribed).
+
+        :param concert_client.ConcertClient concert_client:
+        """
+        gateway_name = concert_client.gateway_name
+        with self._lock:
+            self._clients[gateway_name] = concert_client
+            if gateway_name not in self._subscribers:
+                self._subscribers[gateway_name] = rospy.Subscriber(
+                    concert_client.ros_names.status,
+                    rapp_manager_msgs.Status,
+                    self._ros_status_cb,
+                    callback_args=gateway_name
+                )
+
+    def unsubscribe(self, gateway_name):
+        """
+        Stop relaying status messages to this client (does nothing if not subscribed).
+
+        :param str gateway_name: the client's name on the gateway network
+        """
+        with self._lock:
+            self._clients.pop(gateway_name, None)
+            subscriber = self._subscribers.pop(gateway_name, None)
+        if subscriber is not None:
+            subscriber.unregister()
+
+    def shutdown(self):
+        """
+        Unregister all status subscriptions.
+        """
+        with self._lock:
+            subscribers = self._subscribers.values()
+            self._subscribers = {}
+            self._clients = {}
+        for subscriber in subscribers:
+            subscriber.unregister()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def _ros_status_cb(self, msg, gateway_name):
+        """
+        Dispatch the status message to the concert client it belongs to.
+
+        :param rocon_app_manager_msgs.Status msg:
+        :param str gateway_name: the client's name on the gateway network
+        """
+        with self._lock:
+            concert_client = self._clients.get(gateway_name, None)
+        if concert_client is not None:
+            concert_client.cache_status(msg)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+
+##############################################################################
+# Imports
+##############################################################################
+
+# enable some python3 compatibility options:
+# (unicode_literals not compatible with python2 uuid module)
+from __future__ import absolute_import, print_function
+
+import rocon_console.console as console
+
+from concert_conductor.probe_scheduler import ProbeScheduler
+
+##############################################################################
+# Tests
+##############################################################################
+
+
+def test_backoff():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Probe Scheduler Backoff" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    scheduler = ProbeScheduler(initial_delay=1.0, max_delay=4.0, multiplier=2.0, jitter=0.0)
+    scheduler.add('dude')
+    assert 'dude' in scheduler and len(scheduler) == 1
+    assert scheduler.is_due('dude')  # due straight away
+    # delays of 1, 2, 4 and then capped at 4
+    now = 0.0
+    for delay in [1.0, 2.0, 4.0, 4.0]:
+        scheduler.backoff('dude', now)
+        assert not scheduler.is_due('dude')
+        scheduler.update(now + delay - 0.1)
+        assert not scheduler.is_due('dude')
+        scheduler.update(now + delay)
+        assert scheduler.is_due('dude')
+        now += delay
+    # re-adding resets the backoff
+    scheduler.add('dude')
+    scheduler.backoff('dude', now)
+    scheduler.update(now + 1.0)
+    assert scheduler.is_due('dude')
+
+
+def test_not_after():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Probe Scheduler Deadlines" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    scheduler = ProbeScheduler(initial_delay=10.0, jitter=0.0)
+    scheduler.add('dude')
+    scheduler.backoff('dude', 0.0, not_after=3.0)
+    scheduler.update(3.0)
+    assert scheduler.is_due('dude')
+    # a deadline already passed makes it due on the next update
+    scheduler.backoff('dude', 5.0, not_after=4.0)
+    scheduler.update(5.0)
+    assert scheduler.is_due('dude')
+
+
+def test_jitter():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Probe Scheduler Jitter" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    scheduler = ProbeScheduler(initial_delay=1.0, jitter=0.5)
+    scheduler.add('dude')
+    for unused_i in range(20):
+        scheduler.add('dude')
+        scheduler.backoff('dude', 0.0)
+        scheduler.update(0.49)
+        assert not scheduler.is_due('dude')
+        scheduler.update(1.5)
+        assert scheduler.is_due('dude')
+
+
+def test_remove():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Probe Scheduler Removals" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    scheduler = ProbeScheduler(jitter=0.0)
+    scheduler.add('dude')
+    scheduler.add('dudette')
+    scheduler.backoff('dude', 0.0)
+    scheduler.remove('dude')
+    scheduler.remove('unknown')  # does nothing
+    assert 'dude' not in scheduler and len(scheduler) == 1
+    scheduler.update(100.0)
+    assert not scheduler.is_due('dude')  # stale heap entries are ignored
+    scheduler.backoff('dude', 100.0)     # as are backoffs for unregistered keys
+    assert 'dude' not in scheduler
+    assert scheduler.is_due('dudette')
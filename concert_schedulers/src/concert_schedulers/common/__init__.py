@@ -16,5 +16,7 @@ Common modules for the concert_schedulers package.
 ##############################################################################
 
 from .concert_client import ConcertClient
+from .deadline_scheduler import get_deadline_scheduler
+from .resource_pool_publisher import ResourcePoolPublisher
 import exceptions
 import utils
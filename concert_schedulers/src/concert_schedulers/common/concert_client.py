@@ -13,6 +13,8 @@ python class for convenient handling inside a scheduler node.
 # Imports
 ##############################################################################
 
+import collections
+
 import rospy
 import rocon_app_manager_msgs.srv as rapp_manager_srvs
 import scheduler_msgs.msg as scheduler_msgs
@@ -23,6 +25,33 @@ import uuid_msgs.msg as uuid_msgs
 from . import utils
 from .exceptions import FailedToStartRappsException, FailedToAllocateException
 
+##############################################################################
+# Ros Names
+##############################################################################
+
+RosNames = collections.namedtuple('RosNames', [
+    'unique_name',  # gateway name as used in ros names and resource uri's
+    'start_rapp',   # service
+    'stop_rapp',    # service
+])
+"""Immutable table of the resolved ros names for interacting with a concert client."""
+
+
+def create_ros_names(gateway_name):
+    """
+    Resolve the ros names for interacting with a concert client.
+
+    :param str gateway_name: the concert client's name on the gateway network
+    :returns: the resolved names
+    :rtype: :class:`.RosNames`
+    """
+    unique_name = gateway_name.lower().replace(' ', '_')
+    return RosNames(
+        unique_name=unique_name,
+        start_rapp='/' + unique_name + '/start_rapp',
+        stop_rapp='/' + unique_name + '/stop_rapp',
+    )
+
 ##############################################################################
 # Classes
 ##############################################################################
@@ -42,6 +71,8 @@ class ConcertClient(object):
             '_request_id',   # id (uuid hex string) of the request it is allocated to
             'allocated_priority',  # priority (int) of the request it is allocated to
             '_resource',     # scheduler_msgs.Resource it fulfills
+            '_ros_names',    # RosNames, lazily built
+            '_status_msg',   # scheduler_msgs.CurrentStatus cache, reset whenever the allocation changes
         ]
 
     ##########################################################################
@@ -61,6 +92,8 @@ class ConcertClient(object):
         """Whether or not it is currently allocated."""
         self._request_id = None
         self._resource = None
+        self._ros_names = None
+        self._status_msg = None
         self.allocated_priority = 0  # irrelevant while self.allocated is false
         """If allocated, this indicates its priority."""
 
@@ -70,6 +103,13 @@ class ConcertClient(object):
         self.gateway_name = self.msg.gateway_name
         """The concert client's name on the gateway network (typically has postfixed uuid)"""
 
+    @property
+    def ros_names(self):
+        """Resolved ros names (:class:`.RosNames`) used to interact with this client."""
+        if self._ros_names is None:
+            self._ros_names = create_ros_names(self.gateway_name)
+        return self._ros_names
+
     ##########################################################################
     # Convert
     ##########################################################################
@@ -92,9 +132,14 @@ class ConcertClient(object):
           The scheduler typically uses this to publish the resource on it's
           scheduler_resources_pool topic.
 
+          The message is cached until the allocation changes, so the same
+          object is returned for an unchanged client - treat it as read only.
+
           :returns: the message, with updated status if allocated.
           :rtype: concert_msgs.ConcertClient
         '''
+        if self._status_msg is not None:
+            return self._status_msg
         msg = scheduler_msgs.CurrentStatus()
         msg.uri = self.msg.platform_info.uri
         # TODO : scheduler_msgs.CurrentStatus.MISSING
@@ -104,6 +149,7 @@ class ConcertClient(object):
             msg.status = scheduler_msgs.CurrentStatus.AVAILABLE
         msg.owner = unique_id.toMsg(uuid.UUID(self._request_id)) if self._request_id else uuid_msgs.UniqueID()  # self._request_id is a hex string
         msg.rapps = [rapp.name for rapp in self.msg.rapps]
+        self._status_msg = msg
         return msg
 
     ##########################################################################
@@ -143,12 +189,14 @@ class ConcertClient(object):
         self.allocated = True
         self._request_id = request_id
         self._resource = resource
+        self._status_msg = None
         try:
-            self._start(self.msg.gateway_name, resource)
+            self._start(resource)
         except FailedToStartRappsException as e:
             self.allocated = False
             self._request_id = None
             self._resource = None
+            self._status_msg = None
             raise FailedToAllocateException(str(e))
 
     def abandon(self):
@@ -156,11 +204,12 @@ class ConcertClient(object):
         Abandon the resource. Usually called after a request is cancelled or on shutdown.
         This stops the rapp.
         '''
-        self._stop(self.msg.gateway_name)
+        self._stop()
         self.allocated = False
         self.allocated_priority = 0  # must set this after we set allocated to false
         self._request_id = None
         self._resource = None
+        self._status_msg = None
 
     def is_compatible(self, resource):
         '''
@@ -172,10 +221,10 @@ class ConcertClient(object):
         '''
         return utils.is_compatible(self.msg, resource)
 
-    def _start(self, gateway_name, resource):
+    def _start(self, resource):
         if self._resource == None:
             raise FailedToStartRappsException("this client hasn't been allocated yet [%s]" % self.name)
-        start_rapp = rospy.ServiceProxy('/' + gateway_name.lower().replace(' ', '_') + '/start_rapp', rapp_manager_srvs.StartRapp)
+        start_rapp = rospy.ServiceProxy(self.ros_names.start_rapp, rapp_manager_srvs.StartRapp)
         request = rapp_manager_srvs.StartRappRequest()
         request.name = resource.rapp
         request.remappings = resource.remappings
@@ -185,11 +234,11 @@ class ConcertClient(object):
         except (rospy.service.ServiceException, rospy.exceptions.ROSInterruptException) as e:  # Service not found or ros is shutting down
             raise FailedToStartRappsException("%s" % str(e))
 
-    def _stop(self, gateway_name):
+    def _stop(self):
         if self._resource == None:
             rospy.logwarn("Scheduler : this client hasn't been allocated yet, aborting stop app request  [%s]" % self.name)
             return False
-        stop_rapp = rospy.ServiceProxy('/' + gateway_name.lower().replace(' ', '_') + '/stop_rapp', rapp_manager_srvs.StopRapp)
+        stop_rapp = rospy.ServiceProxy(self.ros_names.stop_rapp, rapp_manager_srvs.StopRapp)
         request = rapp_manager_srvs.StopRappRequest()
         try:
             stop_rapp(request)
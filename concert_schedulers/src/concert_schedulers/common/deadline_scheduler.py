@@ -0,0 +1,140 @@
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+"""
+.. module:: common.deadline_scheduler
+
+This module provides a single shared thread for firing cancellable
+deadline callbacks (e.g. recovery timeouts), rather than spawning a
+thread per deadline. Deadlines are kept in ros time, so they follow a
+simulated clock (/use_sim_time) just like rospy timers do.
+"""
+##############################################################################
+# Imports
+##############################################################################
+
+import heapq
+import itertools
+import threading
+
+import rospy
+
+##############################################################################
+# Constants
+##############################################################################
+
+SIM_TIME_POLL_PERIOD = 0.1
+"""Longest (wall time) wait in between checks of a simulated clock, which can't be waited on directly."""
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class Deadline(object):
+    """
+    Handle for a scheduled deadline, returned by :meth:`.DeadlineScheduler.schedule`.
+    """
+    __slots__ = ['time', 'callback', 'cancelled']
+
+    def __init__(self, deadline_time, callback):
+        self.time = deadline_time
+        """Ros time (seconds) at which the callback fires."""
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Prevent the callback from firing (does nothing if it already fired).
+        """
+        self.cancelled = True
+
+
+class DeadlineScheduler(object):
+    """
+    A heap of deadlines served by one daemon thread that is started on demand.
+    Callbacks are executed in that thread, one at a time, so they should be
+    short and do their own locking.
+    """
+    __slots__ = ['_heap', '_counter', '_condition', '_thread', '_shutdown']
+
+    def __init__(self):
+        self._heap = []  # [(time, sequence number, Deadline)]
+        self._counter = itertools.count()  # tie breaker so deadlines themselves are never compared
+        self._condition = threading.Condition()
+        self._thread = None
+        self._shutdown = False
+
+    def schedule(self, delay, callback):
+        """
+        :param float delay: seconds (ros time) from now at which to fire the callback
+        :param func callback: function with no arguments
+        :returns: handle that can be used to cancel the deadline
+        :rtype: :class:`.Deadline`
+        """
+        deadline = Deadline(rospy.get_time() + delay, callback)
+        with self._condition:
+            heapq.heappush(self._heap, (deadline.time, next(self._counter), deadline))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="deadline_scheduler")
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return deadline
+
+    def shutdown(self):
+        """
+        Stop the thread, pending deadlines are dropped.
+        """
+        with self._condition:
+            self._shutdown = True
+            self._heap = []
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = None
+                while not self._shutdown:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    if self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    remaining = self._heap[0][0] - rospy.get_time()
+                    if remaining > 0.0:
+                        if not rospy.rostime.is_wallclock():
+                            remaining = min(remaining, SIM_TIME_POLL_PERIOD)  # the clock may run slow, fast or be paused
+                        self._condition.wait(remaining)
+                        continue
+                    deadline = heapq.heappop(self._heap)[2]
+                    break
+                if self._shutdown:
+                    return
+            try:
+                if not deadline.cancelled:
+                    deadline.callback()
+            except Exception as e:  # keep serving the other deadlines
+                rospy.logerr("Scheduler : deadline callback raised an exception [%s]" % str(e))
+
+##############################################################################
+# Shared Instance
+##############################################################################
+
+_deadline_scheduler = None
+_deadline_scheduler_lock = threading.Lock()
+
+
+def get_deadline_scheduler():
+    """
+    :returns: the deadline scheduler shared within this process.
+    :rtype: :class:`.DeadlineScheduler`
+    """
+    global _deadline_scheduler
+    with _deadline_scheduler_lock:
+        if _deadline_scheduler is None:
+            _deadline_scheduler = DeadlineScheduler()
+        return _deadline_scheduler
@@ -0,0 +1,130 @@
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+"""
+.. module:: common.resource_pool_publisher
+
+This module provides a rate limited, coalescing publisher for a scheduler's
+resource pool. Alongside the latched full list it publishes only the
+resources that changed since the last publication.
+"""
+##############################################################################
+# Imports
+##############################################################################
+
+import copy
+import threading
+import time
+
+import rospy
+import scheduler_msgs.msg as scheduler_msgs
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class ResourcePoolPublisher(object):
+    """
+    Publishes snapshots of the resource pool. Bursts of updates are coalesced
+    so that at most one publication is made per ``min_interval`` and only
+    the most recent snapshot is published.
+
+    Two topics are served:
+
+    * ``<topic_name>`` : latched, full list of known resources.
+    * ``<topic_name>_changes`` : only the resources that were added or changed since the
+      last publication. Resources that disappeared are reported with a
+      ``scheduler_msgs.CurrentStatus.MISSING`` status.
+
+    Changes are detected by identity of the ``scheduler_msgs.CurrentStatus``
+    messages in the snapshot, so callers should provide cached messages that
+    are only rebuilt when the resource actually changes (see :meth:`.ConcertClient.toMsg`).
+    """
+    __slots__ = [
+        '_publishers',
+        '_min_interval',       # minimum time (seconds) between publications
+        '_last_publish_time',  # wall time of the last publication
+        '_last_snapshot',      # { key : scheduler_msgs.CurrentStatus } as last published
+        '_pending_snapshot',   # { key : scheduler_msgs.CurrentStatus } awaiting publication or None
+        '_timer',              # threading.Timer for a deferred publication or None
+        '_lock',
+    ]
+
+    def __init__(self, topic_name='~resource_pool', min_interval=0.1):
+        """
+        :param str topic_name: name of the full resource pool topic, changes are published on this name + '_changes'
+        :param float min_interval: minimum time (seconds) between publications
+        """
+        self._publishers = {}
+        self._publishers['resource_pool'] = rospy.Publisher(topic_name, scheduler_msgs.KnownResources, latch=True, queue_size=10)
+        self._publishers['resource_pool_changes'] = rospy.Publisher(topic_name + '_changes', scheduler_msgs.KnownResources, queue_size=10)
+        self._min_interval = min_interval
+        self._last_publish_time = 0.0
+        self._last_snapshot = {}
+        self._pending_snapshot = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot):
+        """
+        Publish a snapshot of the resource pool, either immediately or, if a publication
+        was made very recently, when the minimum interval expires (superseding any snapshot
+        already waiting).
+
+        :param snapshot: the current resource pool
+        :type snapshot: { str : scheduler_msgs.CurrentStatus }
+        """
+        with self._lock:
+            self._pending_snapshot = snapshot
+            if self._timer is not None:
+                return  # a deferred publication will pick up this snapshot
+            remaining = self._last_publish_time + self._min_interval - time.time()
+            if remaining <= 0.0:
+                self._publish_pending()
+            else:
+                self._timer = threading.Timer(remaining, self._timer_callback)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def shutdown(self):
+        """
+        Cancel any deferred publication.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _timer_callback(self):
+        with self._lock:
+            self._timer = None
+            if self._pending_snapshot is not None:
+                self._publish_pending()
+
+    def _publish_pending(self):
+        """
+        Publish the pending snapshot. Must be called with the lock held.
+        """
+        snapshot = self._pending_snapshot
+        self._pending_snapshot = None
+        stamp = rospy.Time.now()
+        msg = scheduler_msgs.KnownResources()
+        msg.header.stamp = stamp
+        msg.resources = snapshot.values()
+        self._publishers['resource_pool'].publish(msg)
+        changes = [status for key, status in snapshot.iteritems() if self._last_snapshot.get(key, None) is not status]
+        for key, status in self._last_snapshot.iteritems():
+            if key not in snapshot:
+                lost_status = copy.copy(status)
+                lost_status.status = scheduler_msgs.CurrentStatus.MISSING
+                changes.append(lost_status)
+        if changes:
+            changes_msg = scheduler_msgs.KnownResources()
+            changes_msg.header.stamp = stamp
+            changes_msg.resources = changes
+            self._publishers['resource_pool_changes'].publish(changes_msg)
+        self._last_snapshot = snapshot
+        self._last_publish_time = time.time()
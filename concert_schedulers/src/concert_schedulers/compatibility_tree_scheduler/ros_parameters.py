@@ -28,5 +28,7 @@ def setup_ros_parameters():
     param = {}
     param['debug_show_compatibility_tree'] = rospy.get_param('~debug_show_compatibility_tree', True)
     param['enable_preemptions'] = rospy.get_param('~enable_preemptions', True)
+    # minimum time between resource pool publications, bursts of changes inside this are coalesced
+    param['resource_pool_min_interval'] = rospy.get_param('~resource_pool_min_interval', 0.1)
 
     return param
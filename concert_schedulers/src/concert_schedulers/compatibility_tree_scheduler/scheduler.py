@@ -84,16 +84,17 @@ class CompatibilityTreeScheduler(object):
         self._clients = {}           # common.ConcertClient.gateway_name : common.ConcertClient of all concert clients
         self._lock = threading.Lock()
 
+        self._parameters = setup_ros_parameters()
         self._scheduler = concert_scheduler_requests.Scheduler(callback=self._requester_update, topic=requests_topic_name)
         self._setup_ros_api(concert_clients_topic_name)
-        self._parameters = setup_ros_parameters()
 
         # aliases
         self.spin = rospy.spin
 
     def _setup_ros_api(self, concert_clients_topic_name):
         self._subscribers['concert_client_changes'] = rospy.Subscriber(concert_clients_topic_name, concert_msgs.ConcertClients, self._ros_subscriber_concert_client_changes)
-        self._publishers['resource_pool'] = rospy.Publisher('~resource_pool', scheduler_msgs.KnownResources, latch=True, queue_size=10)
+        # publishes both the latched ~resource_pool and the incremental ~resource_pool_changes
+        self._publishers['resource_pool'] = common.ResourcePoolPublisher('~resource_pool', self._parameters['resource_pool_min_interval'])
 
     ##########################################################################
     # Ros api handlers
@@ -167,12 +168,9 @@ class CompatibilityTreeScheduler(object):
     def _publish_resource_pool(self):
         '''
           Publishes the current resource pool. This is called whenever the state of the scheduler's
-          known resources changes.
+          known resources changes. Publications are coalesced and rate limited by the publisher.
         '''
-        msg = scheduler_msgs.KnownResources()
-        msg.header.stamp = rospy.Time.now()
-        msg.resources = [client.toMsg() for client in self._clients.values()]
-        self._publishers['resource_pool'].publish(msg)
+        self._publishers['resource_pool'].publish(dict((gateway_name, client.toMsg()) for gateway_name, client in self._clients.iteritems()))
 
     def _requester_update(self, request_set):
         '''
@@ -286,7 +284,7 @@ class CompatibilityTreeScheduler(object):
                             break
                         resource = copy.deepcopy(branch.limb)
                         uri = rocon_uri.parse(leaf.msg.platform_info.uri)  # leaf.msg is concert_msgs/ConcertClient
-                        uri.name = leaf.msg.gateway_name.lower().replace(' ', '_')  # store the unique name of the concert client
+                        uri.name = leaf.ros_names.unique_name  # store the unique name of the concert client
                         resource.uri = str(uri)
                         resources.append(resource)
                 if failed_to_allocate:
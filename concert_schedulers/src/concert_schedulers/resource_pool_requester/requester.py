@@ -15,12 +15,14 @@ The resource pool requester.
 import threading
 
 import rospy
-import unique_id
 import concert_scheduler_requests
 import scheduler_msgs.msg as scheduler_msgs
 import concert_msgs.msg as concert_msgs
 import rocon_uri
 
+from concert_schedulers.common import get_deadline_scheduler
+from concert_schedulers.common.exceptions import InvalidResourceGroupException
+
 ##############################################################################
 # Methods
 ##############################################################################
@@ -56,11 +58,14 @@ class ResourcePoolRequester(object):
     __slots__ = [
             '_requester',        # the base requester class from concert_scheduler_requests
             '_resource_groups',
+            '_resource_trackers',  # { raw uuid bytes : ResourceTracker } index over all resource groups
             '_state',            # state of the requester (see State class)
             '_feedback',
             '_high_priority',    # priority to set for necessary (minimum) resource requirements
             '_low_priority',     # priority to set for optional resource requirements
-            '_recovery_start',   # the timestamp recorded when moving from State.ALIVE -> State.RECOVERING (used for recovery timeout)
+            '_recovery_deadline',  # common.deadline_scheduler.Deadline, set when moving from State.ALIVE -> State.RECOVERING
+            '_request_signatures',  # { uuid.UUID : (status, priority, ((resource id bytes, uri), ...)) } last seen state of each request
+            '_feedback_statistics',  # counters for introspecting feedback processing (see feedback_statistics)
             '_lock'
         ]
 
@@ -91,20 +96,50 @@ class ResourcePoolRequester(object):
         '''
         self._requester = concert_scheduler_requests.Requester(self._requester_feedback, uuid, 0, topic, frequency)
         self._resource_groups = resource_groups
+        self._resource_trackers = {}
+        self._index_resource_trackers()
         self._feedback = feedback
         self._state = self.State.PENDING
         self._high_priority = high_priority
         self._low_priority = low_priority
+        self._recovery_deadline = None
+        self._request_signatures = {}
+        self._feedback_statistics = {
+            'feedbacks': 0,           # number of feedback callbacks received
+            'changed_feedbacks': 0,   # number of those in which at least one request changed
+            'changed_requests': 0,    # total number of changed (incl. vanished) requests processed
+        }
         self._lock = threading.Lock()
         self._issue_minimum_request()
         self._requester.send_requests()
 
+    def _index_resource_trackers(self):
+        '''
+          (Re)build the index of resource trackers across all resource groups, keyed
+          by the raw bytes of the resource ids so feedback lookups are a single hash lookup.
+        '''
+        self._resource_trackers = {}
+        for resource_group in self._resource_groups:
+            for resource_tracker in resource_group.get_resource_trackers():
+                self._resource_trackers[resource_tracker.resource.id.uuid] = resource_tracker
+
     def _issue_minimum_request(self):
         initial_resources = []
         for resource_group in self._resource_groups:
             initial_resources.extend(resource_group.initial_resources())
         unused_minimum_request_uuid = self._requester.new_request(initial_resources, priority=self._high_priority)
 
+    @property
+    def feedback_statistics(self):
+        '''
+          Counters of feedback processing, useful to see how many feedbacks actually
+          led to work on the resource trackers.
+
+          :returns: copy of the counters (feedbacks, changed_feedbacks, changed_requests)
+          :rtype: dict
+        '''
+        return dict(self._feedback_statistics)
+
     def cancel_all_requests(self):
         '''
           Exactly as it says! Used typically when shutting down or when
@@ -117,6 +152,77 @@ class ResourcePoolRequester(object):
         self._requester.send_requests()
         #self._lock.release()
 
+    def resize_resource_group(self, resource_group, minimum, maximum, create_resource):
+        '''
+          Change the min/max requirements of one of the resource groups at runtime. Only
+          individual requests are added or cancelled, running allocations are otherwise
+          left untouched.
+
+          Growing the maximum adds free resources (requested one at a time as usual once alive).
+          Shrinking it first drops free resources, then cancels single resource requests
+          (pending before allocated, low priority before high priority). Resources locked into the
+          minimum request can't be released individually, so the group may stay above the
+          requested maximum until that request is closed.
+
+          :param resource_group: one of the resource groups this requester was created with
+          :type resource_group: resource_group.ResourcePoolGroup
+          :param int minimum: new minimum
+          :param int maximum: new maximum
+          :param func create_resource: creates a new scheduler_msgs.Resource for the group
+
+          :raises: :exc:`.InvalidResourceGroupException` if the group or limits are invalid.
+        '''
+        if resource_group not in self._resource_groups:
+            raise InvalidResourceGroupException("Requester : attempted to resize an unknown resource group")
+        if minimum < 0 or minimum > maximum:
+            raise InvalidResourceGroupException("Requester : attempted to resize to an invalid min-max [%s, %s]" % (minimum, maximum))
+        with self._requester.lock:
+            if maximum > resource_group.maximum:
+                resources = [create_resource() for unused_i in range(maximum - resource_group.maximum)]
+                for resource_tracker in resource_group.add_resources(resources):
+                    self._resource_trackers[resource_tracker.resource.id.uuid] = resource_tracker
+            resource_group.set_minimum(min(minimum, resource_group.minimum))  # make room for dropping resources
+            surplus = resource_group.maximum - maximum
+            if surplus > 0:
+                for resource_tracker in resource_group.free_resource_trackers()[:surplus]:
+                    self._retire_resource_tracker(resource_group, resource_tracker)
+                    surplus -= 1
+            if surplus > 0:
+                for (request_id, resource_tracker) in self._cancellable_requests(resource_group)[:surplus]:
+                    rospy.loginfo("Requester : cancelling request [resource group resized]")
+                    self._requester.rset[request_id].cancel()
+                    self._retire_resource_tracker(resource_group, resource_tracker)
+                    surplus -= 1
+            if surplus > 0:
+                rospy.logwarn("Requester : can't drop resources held by the minimum request [%s over maximum]" % surplus)
+            resource_group.set_minimum(minimum)
+            self._requester.send_requests()
+
+    def _cancellable_requests(self, resource_group):
+        '''
+          Find the open, single resource requests for a resource group, most
+          expendable first.
+
+          :returns: list of (request uuid, resource tracker) pairs
+        '''
+        candidates = []
+        for request_id, (status, priority, resources) in self._request_signatures.iteritems():
+            if len(resources) != 1 or status not in [scheduler_msgs.Request.NEW, scheduler_msgs.Request.WAITING, scheduler_msgs.Request.GRANTED]:
+                continue
+            resource_tracker = self._find_resource_tracker(resources[0][0])
+            if resource_tracker is None or resource_group.find_resource_tracker(resource_tracker.key()) is not resource_tracker:
+                continue
+            candidates.append(((resource_tracker.allocated, priority == self._high_priority), request_id, resource_tracker))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [(request_id, resource_tracker) for (unused_order, request_id, resource_tracker) in candidates]
+
+    def _retire_resource_tracker(self, resource_group, resource_tracker):
+        '''
+          Drop a resource from a group and the index, feedback for it is ignored from thereon.
+        '''
+        resource_group.remove_resource_tracker(resource_tracker)
+        del self._resource_trackers[resource_tracker.resource.id.uuid]
+
     def _requester_feedback(self, request_set):
         '''
           This returns requests processed by the scheduler with whatever necessary modifications
@@ -128,21 +234,59 @@ class ResourcePoolRequester(object):
         # call self._feedback in here
         #print("Request set: %s" % request_set)
         ########################################
-        # Update all resource tracking info
+        # Update resource tracking info
         ########################################
-        for resource_group in self._resource_groups:
-            resource_group.reset_scheduler_flags()
-        for request in request_set.values():
+        # only requests whose status or resources changed since the last feedback are processed
+        self._feedback_statistics['feedbacks'] += 1
+        request_signatures = {}
+        changed_requests = 0
+        # requests that have vanished from the set no longer track their resources (do these
+        # first, their trackers may have since been reused by new requests)
+        reset_keys = set()
+        for request_id, signature in self._request_signatures.iteritems():
+            if request_id not in request_set.requests:
+                changed_requests += 1
+                for (key, unused_uri) in signature[2]:
+                    resource_tracker = self._find_resource_tracker(key)
+                    if resource_tracker is not None:
+                        resource_tracker.reset_scheduler_flags()
+                        reset_keys.add(key)
+        # changed closed (cancelling, ...) requests before live ones, so that a replacement request
+        # sharing trackers with a closed one always gets the last word on their flags, even if
+        # the replacement itself is unchanged
+        live_statuses = [scheduler_msgs.Request.NEW, scheduler_msgs.Request.WAITING, scheduler_msgs.Request.GRANTED]
+        live_requests = []
+        for request_id, request in request_set.requests.iteritems():
+            signature = (request.msg.status, request.msg.priority, tuple([(resource.id.uuid, resource.uri) for resource in request.msg.resources]))
+            request_signatures[request_id] = signature
+            if request.msg.status in live_statuses:
+                live_requests.append((request_id, request, signature))
+                continue
+            if self._request_signatures.get(request_id, None) == signature:
+                continue
+            changed_requests += 1
+            # its resources are no longer tracked
+            self._flag_resource_trackers(request.msg.resources, tracking=False, allocated=False)
+            reset_keys.update([key for (key, unused_uri) in signature[2]])
+        for request_id, request, signature in live_requests:
+            if self._request_signatures.get(request_id, None) == signature:
+                # unchanged, but its trackers need flagging again if a closed request just reset them
+                if not reset_keys.intersection([key for (key, unused_uri) in signature[2]]):
+                    continue
+            else:
+                changed_requests += 1
             high_priority_flag = True if request.msg.priority == self._high_priority else False
             if request.msg.status == scheduler_msgs.Request.NEW or request.msg.status == scheduler_msgs.Request.WAITING:
                 self._flag_resource_trackers(request.msg.resources, tracking=True, allocated=False, high_priority_flag=high_priority_flag)
-            elif request.msg.status == scheduler_msgs.Request.GRANTED:
+            else:  # granted
                 self._flag_resource_trackers(request.msg.resources, tracking=True, allocated=True, high_priority_flag=high_priority_flag)
                 if request_completely_unallocated(request):
                     rospy.loginfo("Requester : cancelling request [has been completely unallocated]")
                     request.cancel()
-            elif request.msg.status == scheduler_msgs.Request.CLOSED:
-                self._flag_resource_trackers(request.msg.resources, tracking=False, allocated=False)
+        self._request_signatures = request_signatures
+        if changed_requests:
+            self._feedback_statistics['changed_feedbacks'] += 1
+            self._feedback_statistics['changed_requests'] += changed_requests
 
         #for resource_group in self._resource_groups:
         #    print("\n%s" % str(resource_group))
@@ -162,17 +306,12 @@ class ResourcePoolRequester(object):
         elif self._state == self.State.ALIVE and not tentatively_alive:
             rospy.loginfo("Requester : state change [%s->%s]" % (self.State.ALIVE, self.State.RECOVERING))
             self._state = self.State.RECOVERING
-            self._recovery_start = rospy.Time.now()
-            # Not practical, but currently the safe non-thread way.
-            #self._requester.cancel_all()
-            #self._issue_minimum_request()
-            # maybe not such a great idea - the requester is not officially thread-safe,
-            # but it's interesting to test the problems with doing this
-            thread = threading.Thread(target=self._check_recovery_timeout)
-            thread.start()
+            self._schedule_recovery_deadline()
         elif self._state == self.State.RECOVERING and tentatively_alive:
+            rospy.loginfo("Requester : state change [%s->%s]" % (self.State.RECOVERING, self.State.ALIVE))
             self._state = self.State.ALIVE
-        # else moving from RECOVERING to PENDING is handled by the thread function
+            self._cancel_recovery_deadline()
+        # else moving from RECOVERING to PENDING is handled by the recovery deadline
 
         ########################################
         # Check optional request requirements
@@ -184,27 +323,52 @@ class ResourcePoolRequester(object):
                     priority = self._high_priority if high_priority_flag else self._low_priority
                     unused_request_uuid = self._requester.new_request([resource], priority=priority)
 
-    def _check_recovery_timeout(self):
+    def _schedule_recovery_deadline(self):
+        '''
+          Must be called with the base requester's lock held, so the deadline is recorded
+          before its callback can look at it.
+        '''
+        def recovery_timeout():
+            with self._requester.lock:
+                self._recovery_timeout(deadline)
+        deadline = get_deadline_scheduler().schedule(self.State.timeout.to_sec(), recovery_timeout)
+        self._recovery_deadline = deadline
+
+    def _cancel_recovery_deadline(self):
+        if self._recovery_deadline is not None:
+            self._recovery_deadline.cancel()
+            self._recovery_deadline = None
+
+    def _recovery_timeout(self, deadline):
         '''
-          Thread worker function that monitors the requester state while it's trying to
-          recover the minimum necessary requirements to run the resource pool. If
-          nothing happens for the duration of this wait, then it cancels all requests (deallocating
+          Deadline callback (from the shared deadline scheduler thread) for a requester that
+          is trying to recover the minimum necessary requirements to run the resource pool. If
+          it hasn't recovered by now, then it cancels all requests (deallocating
           any resources) and reissues brand new requests as needed.
 
+          This runs under the base requester's lock, i.e. serialised with the feedback callback.
+          Deadlines that have since been cancelled or replaced (the requester recovered and then
+          lost its resources again while this was waiting for the lock) are ignored.
+
           In the future this probably has to change as we can't dictate to the service how long
           it should wait before cancelling requests. Ultimately the service itself should handle
           what happens if this timeout is reached - it needs to cleanup (i.e. finalise
           whatever it is doing first such as sending robots back to home base) before finally issuing
           the cancel order for the request.
+
+          :param deadline: the deadline this callback was scheduled for
+          :type deadline: common.deadline_scheduler.Deadline
         '''
-        while (rospy.Time.now() - self._recovery_start) < self.State.timeout and not rospy.is_shutdown() and self._state == self.State.RECOVERING:
-            rospy.rostime.wallsleep(1.0)
-            if (rospy.Time.now() - self._recovery_start) > self.State.timeout:
-                self.cancel_all_requests()
-                rospy.logwarn("Requester : timed out trying to recover necessary resource pool state.")
-                rospy.logwarn("Requester : issuing new minimum request.")
-                self._issue_minimum_request()
-                self._state = self.State.PENDING
+        if self._recovery_deadline is not deadline or deadline.cancelled:
+            return
+        self._recovery_deadline = None
+        if rospy.is_shutdown() or self._state != self.State.RECOVERING:
+            return
+        self.cancel_all_requests()
+        rospy.logwarn("Requester : timed out trying to recover necessary resource pool state.")
+        rospy.logwarn("Requester : issuing new minimum request.")
+        self._issue_minimum_request()
+        self._state = self.State.PENDING
 
     def _flag_resource_trackers(self, resources, tracking, allocated, high_priority_flag=False):
         '''
@@ -218,7 +382,7 @@ class ResourcePoolRequester(object):
             if rocon_uri.parse(resource.uri).name.string == concert_msgs.Strings.SCHEDULER_UNALLOCATED_RESOURCE:
                 tracking = False
                 allocated = False
-            resource_tracker = self._find_resource_tracker(unique_id.toHexString(resource.id))
+            resource_tracker = self._find_resource_tracker(resource.id.uuid)
             if resource_tracker is None:
                 pass  # should raise an exception
             else:
@@ -228,14 +392,10 @@ class ResourcePoolRequester(object):
 
     def _find_resource_tracker(self, key):
         '''
-          @param key : unique identifier for the resource
-          @type hex string
+          @param key : unique identifier for the resource (raw bytes of the uuid_msgs.UniqueID)
+          @type str
 
           @return the resource tracker corresponding to the key
           @type ResourceTracker or None
         '''
-        for resource_group in self._resource_groups:
-            resource_tracker = resource_group.find_resource_tracker(key)
-            if resource_tracker is not None:
-                return resource_tracker
-        return None
+        return self._resource_trackers.get(key, None)
@@ -7,7 +7,7 @@
 # Imports
 ##############################################################################
 
-import copy
+import collections
 import unique_id
 
 # local imports
@@ -25,6 +25,11 @@ class ResourcePoolGroup(object):
             '_resources',  # resources this group must care for.
             '_min',
             '_max',
+            '_alive_min',            # allocations needed to be alive, lags behind a raised minimum until it is met
+            '_tracking_count',       # number of trackers that are tracking
+            '_allocated_count',      # number of trackers that are allocated (always also tracking)
+            '_high_priority_count',  # number of trackers that are tracking with a high priority
+            '_free_trackers',        # ordered set (OrderedDict with None values) of trackers that aren't tracking
         ]
 
     def __init__(self, minimum, resources):
@@ -38,14 +43,28 @@ class ResourcePoolGroup(object):
           @type { uuid hexstring : scheduler_msgs.Resource }
         '''
         self._resources = {}
+        self._tracking_count = 0
+        self._allocated_count = 0
+        self._high_priority_count = 0
+        self._free_trackers = collections.OrderedDict()
         for resource in resources:
             resource.id = unique_id.toMsg(unique_id.fromRandom())
             key = unique_id.toHexString(resource.id)
-            self._resources[key] = ResourceTracker(resource)
+            self._resources[key] = ResourceTracker(resource, listener=self._resource_tracker_flags_changed)
+            self._free_trackers[self._resources[key]] = None
         self._min = minimum
         self._max = len(resources)
+        self._alive_min = minimum
         self._validate()  # can raise an exception
 
+    @property
+    def minimum(self):
+        return self._min
+
+    @property
+    def maximum(self):
+        return self._max
+
     def get_resource_trackers(self):
         return self._resources.values()
 
@@ -57,40 +76,106 @@ class ResourcePoolGroup(object):
         return string_representation
 
     def is_alive(self):
-        count = 0
-        for resource_tracker in self._resources.values():
-            if resource_tracker.allocated:
-                count += 1
-        return False if count < self._min else True
+        return False if self._allocated_count < self._alive_min else True
 
     def requires_new_request(self):
         '''
           Checks to see if we should make offer a new one-resource request (basically
           when # tracking = # allocated >= minimum. Note, it also checks priority flags
           to determine whether it should request a high or low priority.
+
+          The returned resource is the tracked resource itself (not a copy).
         '''
-        tracking_and_allocated = 0
-        high_priority_trackers = 0
-        free_resource_trackers = []
-        unallocated_tracker_pending = False
-        for resource_tracker in self._resources.values():
-            if resource_tracker.tracking and not resource_tracker.allocated:
-                unallocated_tracker_pending = True
-            if resource_tracker.tracking:
-                tracking_and_allocated += 1
-                if resource_tracker.high_priority_flag:
-                    high_priority_trackers += 1
-            else:
-                free_resource_trackers.append(copy.deepcopy(resource_tracker))
-        # rospy.loginfo("Requester : length of free_resource_trackers: [%s][%s][%s]" % (tracking_and_allocated, high_priority_trackers, len(free_resource_trackers)))
-        if unallocated_tracker_pending or not free_resource_trackers:
+        unallocated_tracker_pending = self._tracking_count > self._allocated_count
+        # rospy.loginfo("Requester : length of free_resource_trackers: [%s][%s][%s]" % (self._tracking_count, self._high_priority_count, len(self._free_trackers)))
+        if unallocated_tracker_pending or not self._free_trackers:
             return (None, False)
-        resource = free_resource_trackers[0].resource
-        if high_priority_trackers < self._min:
+        resource = next(iter(self._free_trackers)).resource
+        if self._high_priority_count < self._min:
             return (resource, True)
         else:
             return (resource, False)
 
+    def _resource_tracker_flags_changed(self, resource_tracker, old_flags, new_flags):
+        '''
+          Keep the running counts and free tracker queue up to date as tracker flags change.
+
+          @param old_flags, new_flags : (tracking, allocated, high_priority_flag)
+          @type (bool, bool, bool)
+        '''
+        (old_tracking, old_allocated, old_high_priority_flag) = old_flags
+        (new_tracking, new_allocated, new_high_priority_flag) = new_flags
+        self._tracking_count += int(new_tracking) - int(old_tracking)
+        self._allocated_count += int(new_allocated) - int(old_allocated)
+        self._high_priority_count += int(new_tracking and new_high_priority_flag) - int(old_tracking and old_high_priority_flag)
+        if new_tracking and not old_tracking:
+            del self._free_trackers[resource_tracker]
+        elif old_tracking and not new_tracking:
+            self._free_trackers[resource_tracker] = None
+        if self._allocated_count >= self._min:
+            self._alive_min = self._min
+
+    def set_minimum(self, minimum):
+        '''
+          Change the minimum requirement at runtime. Lowering it takes effect immediately,
+          raising it only affects liveness once the extra resources have been allocated (in the
+          meantime new requests are made at high priority) so running allocations aren't disturbed.
+
+          @param minimum
+          @type int
+
+          @raise InvalidResourceGroupException : if the minimum is out of range
+        '''
+        if minimum < 0 or minimum > self._max:
+            raise InvalidResourceGroupException("Requester : attempted to set an invalid minimum [%s not in 0..%s]" % (minimum, self._max))
+        self._min = minimum
+        self._alive_min = minimum if (minimum <= self._alive_min or self._allocated_count >= minimum) else self._alive_min
+
+    def add_resources(self, resources):
+        '''
+          Add resources (raising the maximum) to the group. They start out free, i.e.
+          available for new requests.
+
+          @param resources : resources of the same type as those already in the group
+          @type scheduler_msgs.Resource[]
+
+          @return the trackers for the new resources
+          @rtype ResourceTracker[]
+        '''
+        resource_trackers = []
+        for resource in resources:
+            resource.id = unique_id.toMsg(unique_id.fromRandom())
+            resource_tracker = ResourceTracker(resource, listener=self._resource_tracker_flags_changed)
+            self._resources[unique_id.toHexString(resource.id)] = resource_tracker
+            self._free_trackers[resource_tracker] = None
+            resource_trackers.append(resource_tracker)
+        self._max = len(self._resources)
+        return resource_trackers
+
+    def free_resource_trackers(self):
+        '''
+          @return trackers that aren't part of any request, oldest first
+          @rtype ResourceTracker[]
+        '''
+        return list(self._free_trackers)
+
+    def remove_resource_tracker(self, resource_tracker):
+        '''
+          Drop a resource (lowering the maximum) from the group. The caller is responsible for
+          cancelling any request it is part of.
+
+          @param resource_tracker
+          @type ResourceTracker
+
+          @raise InvalidResourceGroupException : if it would drop the group below its minimum
+        '''
+        if len(self._resources) - 1 < self._min:
+            raise InvalidResourceGroupException("Requester : attempted to drop a resource below the minimum [%s]" % self._min)
+        resource_tracker.reset_scheduler_flags()  # keeps the counts consistent
+        del self._resources[resource_tracker.key()]
+        del self._free_trackers[resource_tracker]
+        self._max = len(self._resources)
+
     def _validate(self):
         '''
           Check that the stored resources are all of the same type:
@@ -100,6 +185,8 @@ class ResourcePoolGroup(object):
             raise InvalidResourceGroupException("Requester : attempted to create invalid min-max request [%s < 0]" % self._min)
         if len(self._resources) < self._min:
             raise InvalidResourceGroupException("Requester : attempted to create invalid min-max request [ %s < %s(min)]" % (len(self._resources.keys()), self._min))
+        if not self._resources:
+            return
         template = self._resources.values()[0]
         for resource in self._resources.values():
             if template.rapp != resource.rapp:
@@ -124,11 +211,4 @@ class ResourcePoolGroup(object):
             resource_tracker.reset_scheduler_flags()
 
     def find_resource_tracker(self, key):
-        if key in self._resources.keys():
-            return self._resources[key]
-        else:
-            return None
-#        for resource_tracker in self._resources.values():
-#            if resource_tracker.key() == key:
-#                return resource_tracker
-#        return None
+        return self._resources.get(key, None)
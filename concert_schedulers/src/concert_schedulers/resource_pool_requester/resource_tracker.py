@@ -16,25 +16,69 @@ import unique_id
 
 class ResourceTracker(object):
     __slots__ = [
-            'resource',            # the object we want to track
-            'high_priority_flag',  # if tracking, boolean for whether it is high or low priority
-            'tracking',            # it is part of a currently issued request
-            'allocated',           # it is tracking and has been allocated by the scheduler
-            'rapp',                # name of the resource (rapp), for easy reference (ros_package/rapp name)
-            'uri'                  # rocon uri representation of this resource for easy reference (rocon uri string)
+            'resource',             # the object we want to track
+            '_high_priority_flag',  # if tracking, boolean for whether it is high or low priority
+            '_tracking',            # it is part of a currently issued request
+            '_allocated',           # it is tracking and has been allocated by the scheduler
+            '_listener',            # callable(tracker, old flags, new flags) notified of flag changes
+            'rapp',                 # name of the resource (rapp), for easy reference (ros_package/rapp name)
+            'uri'                   # rocon uri representation of this resource for easy reference (rocon uri string)
         ]
 
-    def __init__(self, resource):
+    def __init__(self, resource, listener=None):
         '''
           @param resource : resource object to track.
           @type scheduler_msgs.Resource
+
+          @param listener : notified with (tracker, old flags, new flags) whenever the
+                            (tracking, allocated, high_priority_flag) flags change.
+          @type callable
         '''
         self.resource = resource
+        self._tracking = False
+        self._allocated = False
+        self._high_priority_flag = False
+        self._listener = listener
 
         # aliases
         self.rapp = self.resource.rapp
         self.uri = self.resource.uri
-        self.reset_scheduler_flags()
+
+    @property
+    def tracking(self):
+        return self._tracking
+
+    @tracking.setter
+    def tracking(self, value):
+        self.set_flags(value, self._allocated, self._high_priority_flag)
+
+    @property
+    def allocated(self):
+        return self._allocated
+
+    @allocated.setter
+    def allocated(self, value):
+        self.set_flags(self._tracking, value, self._high_priority_flag)
+
+    @property
+    def high_priority_flag(self):
+        return self._high_priority_flag
+
+    @high_priority_flag.setter
+    def high_priority_flag(self, value):
+        self.set_flags(self._tracking, self._allocated, value)
+
+    def set_flags(self, tracking, allocated, high_priority_flag):
+        '''
+          Update all scheduler flags at once, notifying the listener only if something changed.
+        '''
+        old_flags = (self._tracking, self._allocated, self._high_priority_flag)
+        new_flags = (tracking, allocated, high_priority_flag)
+        if old_flags == new_flags:
+            return
+        (self._tracking, self._allocated, self._high_priority_flag) = new_flags
+        if self._listener is not None:
+            self._listener(self, old_flags, new_flags)
 
     def __str__(self):
         """ Generate string representation. """
@@ -48,6 +92,4 @@ class ResourceTracker(object):
         return unique_id.toHexString(self.resource.id)
 
     def reset_scheduler_flags(self):
-        self.allocated = False
-        self.tracking = False
-        self.high_priority_flag = False
+        self.set_flags(False, False, False)
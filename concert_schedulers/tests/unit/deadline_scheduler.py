@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import sys
+import threading
+import unittest
+import concert_schedulers.common.deadline_scheduler as deadline_scheduler
+import rospy
+import rosunit
+import rocon_console.console as console
+
+##############################################################################
+# Utilities
+##############################################################################
+
+
+class Recorder(object):
+    '''
+      Callback for deadlines, records the order in which they fired.
+    '''
+    def __init__(self, fired, name, done=None, expected=1):
+        self.fired = fired
+        self.name = name
+        self.done = done  # event set once the expected number of deadlines fired
+        self.expected = expected
+
+    def __call__(self):
+        self.fired.append(self.name)
+        if self.done is not None and len(self.fired) == self.expected:
+            self.done.set()
+
+##############################################################################
+# UnitTestClass
+##############################################################################
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)  # ros time without a node (i.e. wall time)
+        self.scheduler = deadline_scheduler.DeadlineScheduler()
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_order(self):
+        console.pretty_println("\n*************** Deadline Order ************\n", console.bold)
+        fired = []
+        done = threading.Event()
+        for name, delay in [('third', 0.3), ('first', 0.1), ('second', 0.2)]:
+            self.scheduler.schedule(delay, Recorder(fired, name, done, expected=3))
+        done.wait(5.0)
+        self.assertEquals(['first', 'second', 'third'], fired)
+
+    def test_cancel(self):
+        console.pretty_println("\n*************** Deadline Cancellation ************\n", console.bold)
+        fired = []
+        done = threading.Event()
+        cancelled = self.scheduler.schedule(0.1, Recorder(fired, 'cancelled'))
+        self.scheduler.schedule(0.2, Recorder(fired, 'kept', done))
+        cancelled.cancel()
+        done.wait(5.0)
+        self.assertEquals(['kept'], fired)
+
+    def test_exceptions(self):
+        console.pretty_println("\n*************** Deadline Exceptions ************\n", console.bold)
+        fired = []
+        done = threading.Event()
+
+        def broken():
+            raise RuntimeError("broken callback")
+        self.scheduler.schedule(0.05, broken)
+        self.scheduler.schedule(0.1, Recorder(fired, 'after', done))
+        done.wait(5.0)
+        self.assertEquals(['after'], fired)  # still serving the other deadlines
+
+    def test_shutdown(self):
+        console.pretty_println("\n*************** Deadline Shutdown ************\n", console.bold)
+        fired = []
+        self.scheduler.schedule(0.1, Recorder(fired, 'dropped'))
+        self.scheduler.shutdown()
+        threading.Event().wait(0.3)
+        self.assertEquals([], fired)
+
+    def test_simulated_time(self):
+        console.pretty_println("\n*************** Deadlines In Simulated Time ************\n", console.bold)
+        fired = []
+        done = threading.Event()
+        try:
+            rospy.rostime._set_rostime(rospy.Time(100))  # paused simulated clock
+            self.scheduler.schedule(1.0, Recorder(fired, 'simulated', done))
+            done.wait(0.5)
+            self.assertEquals([], fired)  # regardless of the wall time passing by
+            rospy.rostime._set_rostime(rospy.Time(101))
+            done.wait(5.0)
+            self.assertEquals(['simulated'], fired)
+        finally:
+            rospy.rostime._set_rostime(None)
+
+    def test_shared_instance(self):
+        console.pretty_println("\n*************** Shared Deadline Scheduler ************\n", console.bold)
+        self.assertTrue(deadline_scheduler.get_deadline_scheduler() is deadline_scheduler.get_deadline_scheduler())
+
+if __name__ == '__main__':
+    rosunit.unitrun('concert_schedulers_deadline_scheduler',
+                    'test_deadline_scheduler',
+                    TestDeadlineScheduler,
+                    sys.argv,
+                    coverage_packages=['concert_schedulers']
+                   )
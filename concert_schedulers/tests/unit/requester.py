@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import sys
+import threading
+import unittest
+import uuid
+import concert_scheduler_requests
+import concert_schedulers.resource_pool_requester.requester as requester
+from concert_schedulers.resource_pool_requester import ResourcePoolGroup
+import rospy
+import rosunit
+import scheduler_msgs.msg as scheduler_msgs
+import rocon_console.console as console
+
+##############################################################################
+# Utilities
+##############################################################################
+
+
+class Request(object):
+    '''
+      A request as handed back in the base requester's feedback.
+    '''
+    def __init__(self, status, priority, resources):
+        self.msg = scheduler_msgs.Request(status=status, priority=priority, resources=resources)
+
+    def cancel(self):
+        self.msg.status = scheduler_msgs.Request.CANCELING
+
+
+class RequestSet(object):
+    def __init__(self, requests):
+        self.requests = requests  # { uuid.UUID : Request }
+
+
+class SchedulerlessRequester(object):
+    '''
+      Base requester that just records the requests, instead of talking to a scheduler.
+    '''
+    def __init__(self, feedback, uuid=None, priority=0, topic=None, frequency=None):
+        self.feedback = feedback
+        self.lock = threading.RLock()
+        self.rset = {}
+        self.new_requests = []  # [(uuid.UUID, resources, priority)]
+
+    def new_request(self, resources, priority=None):
+        request_id = uuid.uuid4()
+        self.new_requests.append((request_id, resources, priority))
+        return request_id
+
+    def send_requests(self):
+        pass
+
+    def cancel_all(self):
+        pass
+
+##############################################################################
+# UnitTestClass
+##############################################################################
+
+
+class TestResourcePoolRequester(unittest.TestCase):
+
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)  # ros time without a node (i.e. wall time)
+        self.requester_class = concert_scheduler_requests.Requester
+        concert_scheduler_requests.Requester = SchedulerlessRequester
+
+    def tearDown(self):
+        concert_scheduler_requests.Requester = self.requester_class
+
+    def feedback(self, pool_requester, requests):
+        with pool_requester._requester.lock:
+            pool_requester._requester_feedback(RequestSet(requests))
+
+    def test_closed_request_with_unchanged_replacement(self):
+        console.pretty_println("\n*************** Closed Requests With Unchanged Replacements ************\n", console.bold)
+        group = ResourcePoolGroup(1, [scheduler_msgs.Resource(rapp='rocon_apps/talker', uri='rocon:/*')])
+        pool_requester = requester.ResourcePoolRequester([group], feedback=None)
+        tracker = group.get_resource_trackers()[0]
+        (original_id, resources, priority) = pool_requester._requester.new_requests[0]
+        replacement_id = uuid.uuid4()
+        self.feedback(pool_requester, {original_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.assertTrue(tracker.allocated)
+        self.assertEquals(requester.ResourcePoolRequester.State.ALIVE, pool_requester._state)
+        # the original is being cancelled, a replacement for the same resource has been granted
+        self.feedback(pool_requester, {original_id: Request(scheduler_msgs.Request.CANCELING, priority, resources),
+                                       replacement_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.assertTrue(tracker.allocated)
+        # the original closes, the replacement is unchanged
+        self.feedback(pool_requester, {original_id: Request(scheduler_msgs.Request.CLOSED, priority, resources),
+                                       replacement_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.assertTrue(tracker.allocated)
+        self.assertEquals(requester.ResourcePoolRequester.State.ALIVE, pool_requester._state)
+        # and vanishes
+        self.feedback(pool_requester, {replacement_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.assertTrue(tracker.allocated)
+        self.assertEquals(requester.ResourcePoolRequester.State.ALIVE, pool_requester._state)
+
+    def test_stale_recovery_deadline(self):
+        console.pretty_println("\n*************** Stale Recovery Deadlines ************\n", console.bold)
+        group = ResourcePoolGroup(1, [scheduler_msgs.Resource(rapp='rocon_apps/talker', uri='rocon:/*')])
+        pool_requester = requester.ResourcePoolRequester([group], feedback=None)
+        (request_id, resources, priority) = pool_requester._requester.new_requests[0]
+        self.feedback(pool_requester, {request_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.feedback(pool_requester, {request_id: Request(scheduler_msgs.Request.CLOSED, priority, resources)})
+        self.assertEquals(requester.ResourcePoolRequester.State.RECOVERING, pool_requester._state)
+        stale_deadline = pool_requester._recovery_deadline
+        # recovers and loses it again while the first deadline is waiting for the lock
+        replacement_id = uuid.uuid4()
+        self.feedback(pool_requester, {replacement_id: Request(scheduler_msgs.Request.GRANTED, priority, resources)})
+        self.assertEquals(requester.ResourcePoolRequester.State.ALIVE, pool_requester._state)
+        self.feedback(pool_requester, {replacement_id: Request(scheduler_msgs.Request.CLOSED, priority, resources)})
+        self.assertEquals(requester.ResourcePoolRequester.State.RECOVERING, pool_requester._state)
+        deadline = pool_requester._recovery_deadline
+        self.assertFalse(deadline is stale_deadline)
+        try:
+            with pool_requester._requester.lock:
+                pool_requester._recovery_timeout(stale_deadline)
+            self.assertEquals(requester.ResourcePoolRequester.State.RECOVERING, pool_requester._state)
+            self.assertTrue(pool_requester._recovery_deadline is deadline)
+            with pool_requester._requester.lock:
+                pool_requester._recovery_timeout(deadline)
+            self.assertEquals(requester.ResourcePoolRequester.State.PENDING, pool_requester._state)
+        finally:
+            deadline.cancel()
+
+if __name__ == '__main__':
+    rosunit.unitrun('concert_schedulers_requester',
+                    'test_requester',
+                    TestResourcePoolRequester,
+                    sys.argv,
+                    coverage_packages=['concert_schedulers']
+                   )
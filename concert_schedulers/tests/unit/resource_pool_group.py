@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import sys
+import unittest
+import concert_schedulers.common.exceptions as exceptions
+from concert_schedulers.resource_pool_requester import ResourcePoolGroup
+import rosunit
+import scheduler_msgs.msg as scheduler_msgs
+import rocon_console.console as console
+
+##############################################################################
+# Utilities
+##############################################################################
+
+
+def create_resources(number):
+    return [scheduler_msgs.Resource(rapp='rocon_apps/talker', uri='rocon:/*') for unused_i in range(number)]
+
+##############################################################################
+# UnitTestClass
+##############################################################################
+
+
+class TestResourcePoolGroup(unittest.TestCase):
+
+    def assertCountsConsistent(self, group):
+        '''
+          The incremental counts must always agree with a rescan of the trackers.
+        '''
+        trackers = group.get_resource_trackers()
+        self.assertEquals(len([t for t in trackers if t.tracking]), group._tracking_count)
+        self.assertEquals(len([t for t in trackers if t.allocated]), group._allocated_count)
+        self.assertEquals(len([t for t in trackers if t.tracking and t.high_priority_flag]), group._high_priority_count)
+        self.assertEquals(set([t for t in trackers if not t.tracking]), set(group.free_resource_trackers()))
+
+    def test_requests(self):
+        console.pretty_println("\n*************** Resource Pool Group Requests ************\n", console.bold)
+        group = ResourcePoolGroup(1, create_resources(3))
+        self.assertFalse(group.is_alive())
+        (resource, high_priority) = group.requires_new_request()
+        self.assertTrue(high_priority)
+        tracker = group.free_resource_trackers()[0]
+        self.assertTrue(resource is tracker.resource)
+        # requested, nothing new until it is allocated
+        tracker.set_flags(True, False, True)
+        self.assertCountsConsistent(group)
+        self.assertEquals((None, False), group.requires_new_request())
+        self.assertFalse(group.is_alive())
+        # allocated, the minimum is met so extras are requested at low priority
+        tracker.allocated = True
+        self.assertCountsConsistent(group)
+        self.assertTrue(group.is_alive())
+        (resource, high_priority) = group.requires_new_request()
+        self.assertFalse(high_priority)
+        self.assertTrue(resource is group.free_resource_trackers()[0].resource)
+        self.assertFalse(resource is tracker.resource)
+        # all of them allocated
+        for other in group.free_resource_trackers():
+            other.set_flags(True, True, False)
+        self.assertCountsConsistent(group)
+        self.assertEquals((None, False), group.requires_new_request())
+        # losing the allocation puts the tracker at the back of the free queue
+        tracker.reset_scheduler_flags()
+        self.assertCountsConsistent(group)
+        self.assertTrue(group.is_alive())  # the others are still allocated
+        self.assertEquals([tracker], group.free_resource_trackers())
+        group.reset_scheduler_flags()
+        self.assertCountsConsistent(group)
+        self.assertFalse(group.is_alive())
+        self.assertEquals(3, len(group.free_resource_trackers()))
+        self.assertTrue(group.free_resource_trackers()[0] is tracker)
+
+    def test_set_minimum(self):
+        console.pretty_println("\n*************** Resource Pool Group Minimums ************\n", console.bold)
+        group = ResourcePoolGroup(1, create_resources(3))
+        trackers = group.free_resource_trackers()
+        trackers[0].set_flags(True, True, True)
+        self.assertTrue(group.is_alive())
+        # raising the minimum doesn't kill the group, but requests go out at high priority
+        group.set_minimum(2)
+        self.assertTrue(group.is_alive())
+        self.assertTrue(group.requires_new_request()[1])
+        trackers[1].set_flags(True, True, True)
+        self.assertTrue(group.is_alive())
+        # now the raised minimum applies
+        trackers[1].reset_scheduler_flags()
+        self.assertFalse(group.is_alive())
+        # lowering takes effect immediately
+        group.set_minimum(1)
+        self.assertTrue(group.is_alive())
+        self.assertRaises(exceptions.InvalidResourceGroupException, group.set_minimum, 4)
+        self.assertRaises(exceptions.InvalidResourceGroupException, group.set_minimum, -1)
+        self.assertCountsConsistent(group)
+
+    def test_add_remove_resources(self):
+        console.pretty_println("\n*************** Resource Pool Group Resizing ************\n", console.bold)
+        group = ResourcePoolGroup(1, create_resources(1))
+        self.assertEquals(1, group.maximum)
+        added = group.add_resources(create_resources(2))
+        self.assertEquals(3, group.maximum)
+        self.assertEquals(added, group.free_resource_trackers()[1:])
+        added[0].set_flags(True, True, True)
+        self.assertCountsConsistent(group)
+        self.assertTrue(group.is_alive())
+        # removing an allocated tracker drops it from the counts
+        group.remove_resource_tracker(added[0])
+        self.assertCountsConsistent(group)
+        self.assertFalse(group.is_alive())
+        self.assertEquals(2, group.maximum)
+        self.assertTrue(group.find_resource_tracker(added[0].key()) is None)
+        group.remove_resource_tracker(added[1])
+        self.assertRaises(exceptions.InvalidResourceGroupException, group.remove_resource_tracker, group.free_resource_trackers()[0])
+        self.assertCountsConsistent(group)
+
+    def test_invalid_groups(self):
+        console.pretty_println("\n*************** Invalid Resource Pool Groups ************\n", console.bold)
+        self.assertRaises(exceptions.InvalidResourceGroupException, ResourcePoolGroup, 2, create_resources(1))
+        self.assertRaises(exceptions.InvalidResourceGroupException, ResourcePoolGroup, -1, create_resources(1))
+        resources = create_resources(2)
+        resources[1].uri = 'rocon:/turtlebot'
+        self.assertRaises(exceptions.InvalidResourceGroupException, ResourcePoolGroup, 1, resources)
+
+if __name__ == '__main__':
+    rosunit.unitrun('concert_schedulers_resource_pool_group',
+                    'test_resource_pool_group',
+                    TestResourcePoolGroup,
+                    sys.argv,
+                    coverage_packages=['concert_schedulers']
+                   )
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import sys
+
+import rospy
+import concert_service_link_graph
+import concert_service_utilities
+
+##############################################################################
+# Main
+##############################################################################
+
+if __name__ == '__main__':
+    rospy.init_node('dynamic_link_graph_service', anonymous=True)
+
+    # this is a uuid.UUID key
+    (name, description, priority, uuid) = concert_service_utilities.get_service_info()
+    filename = rospy.get_param('~filename')
+
+    try:
+        impl = concert_service_link_graph.load_compiled_linkgraph_from_file(filename)
+    except concert_service_link_graph.InvalidLinkGraphException as e:
+        rospy.logerr("Dynamic Link Graph : invalid link graph, aborting [%s][%s]" % (filename, str(e)))
+        sys.exit(1)
+
+    if not name:
+        name = impl.name
+
+    dynamic_link_graph_service = concert_service_link_graph.DynamicLinkGraphHandler(name, description, priority, uuid, impl)
+    dynamic_link_graph_service.spin()
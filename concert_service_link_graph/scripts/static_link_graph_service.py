@@ -7,6 +7,8 @@
 # Imports
 ##############################################################################
 
+import sys
+
 import rospy
 import concert_service_link_graph
 import concert_service_utilities
@@ -22,10 +24,14 @@ if __name__ == '__main__':
     (name, description, priority, uuid) = concert_service_utilities.get_service_info()
     filename = rospy.get_param('~filename')
 
-    impl_name, impl = concert_service_link_graph.load_linkgraph_from_file(filename)
+    try:
+        impl = concert_service_link_graph.load_compiled_linkgraph_from_file(filename)
+    except concert_service_link_graph.InvalidLinkGraphException as e:
+        rospy.logerr("Static Link Graph : invalid link graph, aborting [%s][%s]" % (filename, str(e)))
+        sys.exit(1)
 
     if not name:
-        name = impl_name
+        name = impl.name
 
     static_link_graph_service = concert_service_link_graph.StaticLinkGraphHandler(name, description, priority, uuid, impl)
     static_link_graph_service.spin()
@@ -6,4 +6,7 @@
 # Imports
 ##############################################################################
 
+from .exceptions import InvalidLinkGraphException
+from .link_graph_compiler import CompiledLinkGraph, compile_linkgraph, load_compiled_linkgraph_from_file
 from .static_link_graph_handler import *
+from .dynamic_link_graph_handler import DynamicLinkGraphHandler
@@ -0,0 +1,102 @@
+#
+# License: BSD
+#
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+# Used for running link graph services whose nodes can be scaled up or
+# down while the service is running. The entities and connections are
+# fixed as for the static link graph, but the min/max requirements of each
+# node can be updated at runtime without restarting the service.
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import copy
+import rospy
+
+import concert_msgs.msg as concert_msgs
+from concert_schedulers.common.exceptions import InvalidResourceGroupException
+
+from .static_link_graph_handler import StaticLinkGraphHandler
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class DynamicLinkGraphHandler(StaticLinkGraphHandler):
+    '''
+      A link graph handler that accepts min/max updates for its nodes on
+      the 'resize' topic (a concert_msgs.LinkGraph, only the id, min and max of
+      its nodes are used) and publishes the current limits on the latched
+      'link_graph' topic.
+    '''
+    __slots__ = [
+        '_node_limits',  # { node id : (min, max) } as currently configured
+        '_publishers',
+    ]
+
+    def __init__(self, name, description, priority, key, linkgraph):
+        '''
+          @param name
+          @type str
+
+          @param description
+          @type string
+
+          @param key
+          @type uuid.UUID
+
+          @param linkgraph : compiled link graph (preferred) or a link graph msg (compiled here)
+          @type CompiledLinkGraph or concert_msgs.LinkGraph
+        '''
+        self._publishers = {}
+        self._node_limits = {}
+        super(DynamicLinkGraphHandler, self).__init__(name, description, priority, key, linkgraph)
+        self._node_limits = dict((node.id, (node.min, node.max)) for node in self._linkgraph.linkgraph.nodes)
+        self._publishers['link_graph'] = rospy.Publisher('link_graph', concert_msgs.LinkGraph, latch=True, queue_size=1)
+        self._publish_link_graph()
+
+    def _setup_ros_subscribers(self):
+        super(DynamicLinkGraphHandler, self)._setup_ros_subscribers()
+        self._subscribers['resize'] = rospy.Subscriber('resize', concert_msgs.LinkGraph, self._ros_subscriber_resize)
+
+    def _ros_subscriber_resize(self, msg):
+        '''
+          Update the min/max requirements of the nodes listed in the message. Nodes
+          that aren't listed are left as they are.
+
+          @param msg : nodes with their new min/max
+          @type concert_msgs.LinkGraph
+        '''
+        if self._requester is None or self._disabled:
+            rospy.logwarn("Service : ignoring resize request, not running [%s]" % self._name)
+            return
+        for node in msg.nodes:
+            if node.id not in self._resource_groups:
+                rospy.logwarn("Service : ignoring resize request for unknown node [%s][%s]" % (self._name, node.id))
+                continue
+            if self._node_limits[node.id] == (node.min, node.max):
+                continue
+            try:
+                self._requester.resize_resource_group(self._resource_groups[node.id],
+                                                      node.min,
+                                                      node.max,
+                                                      lambda node_id=node.id: self._linkgraph.create_resource(node_id))
+            except InvalidResourceGroupException as e:
+                rospy.logwarn("Service : ignoring invalid resize request [%s][%s][%s]" % (self._name, node.id, str(e)))
+                continue
+            rospy.loginfo("Service : resized [%s][%s][%s-%s]" % (self._name, node.id, node.min, node.max))
+            self._node_limits[node.id] = (node.min, node.max)
+        self._publish_link_graph()
+
+    def _publish_link_graph(self):
+        '''
+          Publish the link graph with the current min/max limits (the compiled link graph
+          itself is shared, so a copy is modified).
+        '''
+        linkgraph = copy.deepcopy(self._linkgraph.linkgraph)
+        for node in linkgraph.nodes:
+            (node.min, node.max) = self._node_limits[node.id]
+        self._publishers['link_graph'].publish(linkgraph)
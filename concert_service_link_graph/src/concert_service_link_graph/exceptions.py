@@ -0,0 +1,22 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: exceptions
+
+This module defines exceptions raised by the concert_service_link_graph package.
+"""
+
+##############################################################################
+# Exceptions
+##############################################################################
+
+
+class InvalidLinkGraphException(Exception):
+    """Raised when a link graph specification fails validation."""
+    pass
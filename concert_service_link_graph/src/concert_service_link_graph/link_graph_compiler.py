@@ -0,0 +1,255 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+# Validates link graph specifications once and compiles them into a form
+# that is cheap to turn into resource requests (node -> edges index and
+# shared resource templates). Compiled graphs are cached by the hash of
+# their source file so services can start without recompiling.
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+
+import concert_msgs.msg as concert_msgs
+import rocon_python_utils
+import rocon_std_msgs.msg as rocon_std_msgs
+import rocon_uri
+import rospy
+import scheduler_msgs.msg as scheduler_msgs
+import yaml
+
+from .exceptions import InvalidLinkGraphException
+
+##############################################################################
+# Constants
+##############################################################################
+
+COMPILER_VERSION = '1'
+"""Bump this whenever the compiled format changes, it invalidates the file cache."""
+
+_compiled_link_graphs = {}
+"""In process cache of compiled link graphs, { file hash : CompiledLinkGraph }"""
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class CompiledLinkGraph(object):
+    '''
+      A link graph along with a node -> edges index and an immutable resource
+      template for each node. Treat instances as read only, they are shared
+      via the cache.
+    '''
+    __slots__ = [
+        'name',                # name of the link graph
+        'linkgraph',           # concert_msgs.LinkGraph
+        'edges_by_node',       # { node id : (concert_msgs.LinkEdge, ...) }
+        'resource_templates',  # { node id : scheduler_msgs.Resource }
+    ]
+
+    def __init__(self, name, linkgraph):
+        '''
+          @param name : name of the link graph
+          @type str
+
+          @param linkgraph
+          @type concert_msgs.LinkGraph
+        '''
+        self.name = name
+        self.linkgraph = linkgraph
+        edges_by_node = dict((node.id, []) for node in linkgraph.nodes)
+        for edge in linkgraph.edges:
+            if edge.start in edges_by_node:
+                edges_by_node[edge.start].append(edge)
+            if edge.finish in edges_by_node and edge.finish != edge.start:
+                edges_by_node[edge.finish].append(edge)
+        self.edges_by_node = dict((node_id, tuple(edges)) for node_id, edges in edges_by_node.iteritems())
+        self.resource_templates = {}
+        for node in linkgraph.nodes:
+            template = scheduler_msgs.Resource()
+            template.rapp = rocon_uri.parse(node.resource).rapp
+            template.uri = node.resource
+            template.remappings = tuple([rocon_std_msgs.Remapping(e.remap_from, e.remap_to) for e in self.edges_by_node[node.id]])
+            template.parameters = tuple([rocon_std_msgs.KeyValue(key, str(val)) for key, val in node.parameters.items()])
+            self.resource_templates[node.id] = template
+
+    def create_resource(self, node_id):
+        '''
+          Instantiate a resource for one slot of a node. The remappings and parameters
+          are shared (immutable) with the template, only the id is left for the caller
+          (e.g. the resource pool group) to fill in.
+
+          @param node_id : id of the link graph node
+          @type str
+
+          @return resource
+          @rtype scheduler_msgs.Resource
+        '''
+        template = self.resource_templates[node_id]
+        return scheduler_msgs.Resource(rapp=template.rapp,
+                                       uri=template.uri,
+                                       remappings=template.remappings,
+                                       parameters=template.parameters)
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def validate_linkgraph_yaml(data):
+    '''
+      Check a link graph specification loaded from yaml, filling in defaults
+      for the optional node fields.
+
+      @param data : the link graph as loaded from yaml
+      @type dict
+
+      @raise InvalidLinkGraphException : if the specification is malformed
+    '''
+    def check_fields(entry, fields, what):
+        if not isinstance(entry, dict):
+            raise InvalidLinkGraphException("%s must be a dictionary [%s]" % (what, entry))
+        for field in fields:
+            if field not in entry:
+                raise InvalidLinkGraphException("%s is missing the '%s' field [%s]" % (what, field, entry))
+
+    def check_list(key):
+        if key not in data or data[key] is None:
+            data[key] = []
+        if not isinstance(data[key], list):
+            raise InvalidLinkGraphException("'%s' must be a list" % key)
+
+    if not isinstance(data, dict):
+        raise InvalidLinkGraphException("link graph must be a dictionary")
+    if 'name' not in data:
+        raise InvalidLinkGraphException("link graph is missing the 'name' field")
+    for key in ['nodes', 'topics', 'services', 'actions', 'edges']:
+        check_list(key)
+    if not data['nodes']:
+        raise InvalidLinkGraphException("link graph has no nodes [%s]" % data['name'])
+    ids = set()
+    for node in data['nodes']:
+        check_fields(node, ['id', 'uri'], 'node')
+        if node['id'] in ids:
+            raise InvalidLinkGraphException("duplicate id in link graph [%s]" % node['id'])
+        ids.add(node['id'])
+        node.setdefault('min', 1)
+        node.setdefault('max', 1)
+        node.setdefault('force_name_matching', False)
+        if node.get('parameters', None) is None:
+            node['parameters'] = {}
+        if not isinstance(node['min'], int) or not isinstance(node['max'], int) or not 0 <= node['min'] <= node['max']:
+            raise InvalidLinkGraphException("node must have integer 0 <= min <= max [%s][%s, %s]" % (node['id'], node['min'], node['max']))
+        if not isinstance(node['parameters'], dict):
+            raise InvalidLinkGraphException("node parameters must be a dictionary [%s]" % node['id'])
+        try:
+            rocon_uri.parse(node['uri'])
+        except rocon_uri.RoconURIValueError as e:
+            raise InvalidLinkGraphException("node has an invalid rocon uri [%s][%s]" % (node['id'], str(e)))
+    for key in ['topics', 'services', 'actions']:
+        for connection in data[key]:
+            check_fields(connection, ['id', 'type'], key[:-1])
+            if connection['id'] in ids:
+                raise InvalidLinkGraphException("duplicate id in link graph [%s]" % connection['id'])
+            ids.add(connection['id'])
+    for edge in data['edges']:
+        check_fields(edge, ['start', 'finish', 'remap_from', 'remap_to'], 'edge')
+        for end in ['start', 'finish']:
+            if edge[end] not in ids:
+                raise InvalidLinkGraphException("edge %s refers to an unknown node or connection [%s]" % (end, edge[end]))
+
+
+def compile_linkgraph(data):
+    '''
+      Validate and compile a link graph specification.
+
+      @param data : the link graph as loaded from yaml
+      @type dict
+
+      @return the compiled link graph
+      @rtype CompiledLinkGraph
+
+      @raise InvalidLinkGraphException : if the specification is malformed
+    '''
+    validate_linkgraph_yaml(data)
+    lg = concert_msgs.LinkGraph()
+    for node in data['nodes']:
+        lg.nodes.append(concert_msgs.LinkNode(node['id'], node['uri'], node['min'], node['max'], node['force_name_matching'], node['parameters']))
+    for topic in data['topics']:
+        lg.topics.append(concert_msgs.LinkConnection(topic['id'], topic['type']))
+    for service in data['services']:
+        lg.services.append(concert_msgs.LinkConnection(service['id'], service['type']))
+    for action in data['actions']:
+        lg.actions.append(concert_msgs.LinkConnection(action['id'], action['type']))
+    for edge in data['edges']:
+        lg.edges.append(concert_msgs.LinkEdge(edge['start'], edge['finish'], edge['remap_from'], edge['remap_to']))
+    return CompiledLinkGraph(data['name'], lg)
+
+
+def get_linkgraph_cache_home():
+    '''
+      Retrieve the location of the directory used for caching compiled link graphs,
+      creating it if necessary.
+
+      @return the directory
+      @rtype str
+    '''
+    cache_home = os.path.join(rocon_python_utils.ros.get_rocon_home(), 'link_graphs')
+    if not os.path.isdir(cache_home):
+        os.makedirs(cache_home)
+    return cache_home
+
+
+def load_compiled_linkgraph_from_file(filename):
+    '''
+      Load a compiled link graph for a yaml file, using the in process or on disk
+      cache (keyed by a hash of the file contents) where possible.
+
+      @param filename : yaml file
+      @type str
+
+      @return the compiled link graph
+      @rtype CompiledLinkGraph
+
+      @raise InvalidLinkGraphException : if the specification is malformed
+    '''
+    with open(filename) as f:
+        contents = f.read()
+    key = hashlib.sha1(COMPILER_VERSION + contents).hexdigest()
+    try:
+        return _compiled_link_graphs[key]
+    except KeyError:
+        pass
+    cache_file = None
+    try:
+        cache_file = os.path.join(get_linkgraph_cache_home(), key + '.pickle')
+        with open(cache_file, 'rb') as f:
+            compiled = pickle.load(f)
+        _compiled_link_graphs[key] = compiled
+        return compiled
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError):
+        pass  # not cached (or unusable), compile it
+    try:
+        compiled = compile_linkgraph(yaml.load(contents))
+    except yaml.YAMLError as e:
+        raise InvalidLinkGraphException("failed to parse link graph yaml [%s][%s]" % (filename, str(e)))
+    _compiled_link_graphs[key] = compiled
+    if cache_file is not None:
+        tmp_name = None
+        try:
+            (fd, tmp_name) = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(compiled, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_name, cache_file)  # atomic, readers never see a partial file
+        except (IOError, OSError, pickle.PicklingError) as e:
+            rospy.logwarn("Service : failed to cache compiled link graph [%s][%s]" % (filename, str(e)))
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+    return compiled
@@ -12,19 +12,16 @@
 # Imports
 ##############################################################################
 
-import copy
+import collections
 import rospy
 
-import rocon_std_msgs.msg as rocon_std_msgs
-import concert_msgs.msg as concert_msgs
 import concert_service_utilities
-import scheduler_msgs.msg as scheduler_msgs
 import std_msgs.msg as std_msgs
 import concert_schedulers
-import yaml
-import rocon_uri
 import rocon_python_comms
 
+from .link_graph_compiler import CompiledLinkGraph, compile_linkgraph, load_compiled_linkgraph_from_file
+
 ##############################################################################
 # Classes
 ##############################################################################
@@ -37,6 +34,7 @@ class StaticLinkGraphHandler(object):
         '_priority',
         '_uuid',
         '_linkgraph',
+        '_resource_groups',  # { node id : concert_schedulers.ResourcePoolGroup }
         '_requester',
         'spin',
         '_subscribers',
@@ -54,14 +52,14 @@ class StaticLinkGraphHandler(object):
           @param key
           @type uuid.UUID
 
-          @param linkgraph
-          @type concert_msgs.LinkGraph
+          @param linkgraph : compiled link graph (preferred) or a link graph msg (compiled here)
+          @type CompiledLinkGraph or concert_msgs.LinkGraph
         '''
         self._name = name
         self._description = description
         self._priority = priority
         self._uuid = key
-        self._linkgraph = linkgraph
+        self._linkgraph = linkgraph if isinstance(linkgraph, CompiledLinkGraph) else CompiledLinkGraph(name, linkgraph)
         self._disabled = False
         self._setup_resource_pool_requester()
         self._setup_ros_subscribers()
@@ -86,7 +84,8 @@ class StaticLinkGraphHandler(object):
           @type std_msgs.Empty
         '''
         rospy.loginfo("Service : disabling [%s]" % self._name)
-        self._requester.cancel_all_requests()
+        if self._requester is not None:
+            self._requester.cancel_all_requests()
         self._disabled = True
 
     def _setup_resource_pool_requester(self):
@@ -94,13 +93,11 @@ class StaticLinkGraphHandler(object):
           Setup the resource groups, then feed it into and Initialise the
           resource pool requester, It looks everything from thereon.
         '''
-        resource_groups = []
-        for node in self._linkgraph.nodes:
-            resources = []
-            resource = _node_to_resource(node, self._linkgraph)
-            for unused_i in range(node.max):
-                resources.append(copy.deepcopy(resource))
-            resource_groups.append(concert_schedulers.ResourcePoolGroup(node.min, resources))
+        self._resource_groups = collections.OrderedDict()
+        for node in self._linkgraph.linkgraph.nodes:
+            resources = [self._linkgraph.create_resource(node.id) for unused_i in range(node.max)]
+            self._resource_groups[node.id] = concert_schedulers.ResourcePoolGroup(node.min, resources)
+        self._requester = None
         try:
             scheduler_requests_topic_name = concert_service_utilities.find_scheduler_requests_topic()
             #rospy.loginfo("Service : found scheduler [%s][%s]" % (topic_name))
@@ -108,7 +105,7 @@ class StaticLinkGraphHandler(object):
             rospy.logerr("Service : %s [%s]" % (str(e), self._name))
             return  # raise an exception here?
         self._requester = concert_schedulers.ResourcePoolRequester(
-                                            resource_groups,
+                                            self._resource_groups.values(),
                                             feedback=self._requester_feedback,
                                             high_priority=self._priority,
                                             uuid=self._uuid,
@@ -139,26 +136,11 @@ def load_linkgraph_from_yaml(yaml):
         @rtype str
         @return linkgraph
         @rtype concert_msgs.msg.LinkGraph
+
+        @raise InvalidLinkGraphException : if the specification is malformed
     """
-    lg = concert_msgs.LinkGraph()
-    name = yaml['name']
-    for node in yaml['nodes']:
-        node['min'] = node['min'] if 'min' in node else 1
-        node['max'] = node['max'] if 'max' in node else 1
-        node['force_name_matching'] = node['force_name_matching'] if 'force_name_matching' in node else False
-        node['parameters'] = node['parameters'] if 'parameters' in node else {}
-        lg.nodes.append(concert_msgs.LinkNode(node['id'], node['uri'], node['min'], node['max'], node['force_name_matching'],node['parameters']))
-    for topic in yaml['topics']:
-        lg.topics.append(concert_msgs.LinkConnection(topic['id'], topic['type']))
-    if 'service' in yaml:
-        for service in yaml['services']:
-            lg.services.append(concert_msgs.LinkConnection(service['id'], service['type']))
-    for action in yaml['actions']:
-        lg.actions.append(concert_msgs.LinkConnection(action['id'], action['type']))
-    for edge in yaml['edges']:
-        lg.edges.append(concert_msgs.LinkEdge(edge['start'], edge['finish'], edge['remap_from'], edge['remap_to']))
-
-    return name, lg
+    compiled = compile_linkgraph(yaml)
+    return compiled.name, compiled.linkgraph
 
 
 def load_linkgraph_from_file(filename):
@@ -172,30 +154,8 @@ def load_linkgraph_from_file(filename):
         @rtype str
         @return linkgraph
         @rtype concert_msgs.msg.LinkGraph
-    """
-    with open(filename) as f:
-        impl = yaml.load(f)
-        name, lg = load_linkgraph_from_yaml(impl)
-
-    return name, lg
-
 
-def _node_to_resource(node, linkgraph):
-    '''
-      Convert linkgraph information for a particular node to a scheduler_msgs.Resource type.
-
-      @param node : a node from the linkgraph
-      @type concert_msgs.LinkNode
-
-      @param linkgraph : the entire linkgraph (used to lookup the node's edges)
-      @type concert_msgs.LinkGraph
-
-      @return resource
-      @rtype scheduler_msgs.Resource
-    '''
-    resource = scheduler_msgs.Resource()
-    resource.rapp = rocon_uri.parse(node.resource).rapp
-    resource.uri = node.resource
-    resource.remappings = [rocon_std_msgs.Remapping(e.remap_from, e.remap_to) for e in linkgraph.edges if e.start == node.id or e.finish == node.id]
-    resource.parameters = [rocon_std_msgs.KeyValue(key,str(val)) for key, val in node.parameters.items()]
-    return resource
+        @raise InvalidLinkGraphException : if the specification is malformed
+    """
+    compiled = load_compiled_linkgraph_from_file(filename)
+    return compiled.name, compiled.linkgraph
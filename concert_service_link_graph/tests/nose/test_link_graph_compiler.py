@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+
+##############################################################################
+# Imports
+##############################################################################
+
+# enable some python3 compatibility options:
+# (unicode_literals not compatible with python2 uuid module)
+from __future__ import absolute_import, print_function
+
+from nose.tools import assert_raises
+
+import copy
+import os
+import shutil
+import tempfile
+
+import rocon_console.console as console
+
+from concert_service_link_graph import InvalidLinkGraphException, compile_linkgraph, load_compiled_linkgraph_from_file
+import concert_service_link_graph.link_graph_compiler as link_graph_compiler
+
+##############################################################################
+# Link Graphs
+##############################################################################
+
+chatter_yaml = '''name: chatter
+nodes:
+  - id: talker
+    uri: rocon:/*#rocon_apps/talker
+    max: 2
+    parameters:
+      message: hello
+  - id: listener
+    uri: rocon:/*#rocon_apps/listener
+topics:
+  - id: chatter
+    type: std_msgs/String
+edges:
+  - start: talker
+    finish: chatter
+    remap_from: chatter
+    remap_to: /conversation/chatter
+  - start: chatter
+    finish: listener
+    remap_from: chatter
+    remap_to: /conversation/chatter
+  - start: listener
+    finish: listener
+    remap_from: status
+    remap_to: /conversation/status
+'''
+
+chatter = {
+    'name': 'chatter',
+    'nodes': [{'id': 'talker', 'uri': 'rocon:/*#rocon_apps/talker', 'max': 2, 'parameters': {'message': 'hello'}},
+              {'id': 'listener', 'uri': 'rocon:/*#rocon_apps/listener'}],
+    'topics': [{'id': 'chatter', 'type': 'std_msgs/String'}],
+    'edges': [{'start': 'talker', 'finish': 'chatter', 'remap_from': 'chatter', 'remap_to': '/conversation/chatter'},
+              {'start': 'chatter', 'finish': 'listener', 'remap_from': 'chatter', 'remap_to': '/conversation/chatter'},
+              {'start': 'listener', 'finish': 'listener', 'remap_from': 'status', 'remap_to': '/conversation/status'}]
+}
+
+##############################################################################
+# Tests
+##############################################################################
+
+
+def test_compile_linkgraph():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Compile Link Graphs" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    compiled = compile_linkgraph(copy.deepcopy(chatter))
+    assert compiled.name == 'chatter'
+    # defaults are filled in
+    nodes = dict((node.id, node) for node in compiled.linkgraph.nodes)
+    assert (nodes['talker'].min, nodes['talker'].max) == (1, 2)
+    assert (nodes['listener'].min, nodes['listener'].max) == (1, 1)
+    assert not nodes['listener'].force_name_matching
+    assert nodes['listener'].parameters == {}
+    assert len(compiled.linkgraph.topics) == 1 and not compiled.linkgraph.services and not compiled.linkgraph.actions
+    # edges are indexed by both of their ends, a node's edge to itself only once
+    assert [e.remap_to for e in compiled.edges_by_node['talker']] == ['/conversation/chatter']
+    assert [e.remap_from for e in compiled.edges_by_node['listener']] == ['chatter', 'status']
+    assert 'chatter' not in compiled.edges_by_node  # only nodes are indexed
+    # resources share the template's remappings and parameters
+    resource = compiled.create_resource('talker')
+    template = compiled.resource_templates['talker']
+    assert resource is not template
+    assert resource.uri == 'rocon:/*#rocon_apps/talker'
+    assert resource.rapp == 'rocon_apps/talker'
+    assert resource.remappings is template.remappings and resource.parameters is template.parameters
+    assert [(r.remap_from, r.remap_to) for r in resource.remappings] == [('chatter', '/conversation/chatter')]
+    assert [(kv.key, kv.value) for kv in resource.parameters] == [('message', 'hello')]
+
+
+def test_invalid_linkgraphs():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Invalid Link Graphs" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+
+    def invalid(modify):
+        data = copy.deepcopy(chatter)
+        modify(data)
+        assert_raises(InvalidLinkGraphException, compile_linkgraph, data)
+
+    invalid(lambda data: data.pop('name'))
+    invalid(lambda data: data.update(nodes=[]))
+    invalid(lambda data: data.update(edges={}))
+    invalid(lambda data: data['nodes'][0].pop('uri'))
+    invalid(lambda data: data['nodes'].append({'id': 'talker', 'uri': 'rocon:/*#rocon_apps/talker'}))  # duplicate node
+    invalid(lambda data: data['topics'].append({'id': 'listener', 'type': 'std_msgs/String'}))  # clashes with a node
+    invalid(lambda data: data['nodes'][0].update(min=3))  # above max
+    invalid(lambda data: data['nodes'][0].update(max='2'))
+    invalid(lambda data: data['nodes'][0].update(parameters=['message']))
+    invalid(lambda data: data['nodes'][0].update(uri='not a rocon uri'))
+    invalid(lambda data: data['edges'][0].update(finish='babbler'))  # unknown end
+    invalid(lambda data: data['edges'][0].pop('remap_to'))
+    assert_raises(InvalidLinkGraphException, compile_linkgraph, ['chatter'])
+
+
+def test_load_compiled_linkgraph_from_file():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Load Compiled Link Graphs" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    ros_home = os.environ.get('ROS_HOME', None)
+    directory = tempfile.mkdtemp()
+    try:
+        os.environ['ROS_HOME'] = directory  # keep the on disk cache out of the user's rocon home
+        filename = os.path.join(directory, 'chatter.link_graph')
+        with open(filename, 'w') as f:
+            f.write(chatter_yaml)
+        compiled = load_compiled_linkgraph_from_file(filename)
+        assert load_compiled_linkgraph_from_file(filename) is compiled  # in process cache
+        cache_files = os.listdir(link_graph_compiler.get_linkgraph_cache_home())
+        assert len(cache_files) == 1 and cache_files[0].endswith('.pickle')
+        # on disk cache
+        link_graph_compiler._compiled_link_graphs.clear()
+        cached = load_compiled_linkgraph_from_file(filename)
+        assert cached is not compiled
+        assert cached.name == 'chatter' and sorted(cached.edges_by_node.keys()) == ['listener', 'talker']
+        # malformed yaml
+        with open(filename, 'w') as f:
+            f.write('name: [chatter')
+        assert_raises(InvalidLinkGraphException, load_compiled_linkgraph_from_file, filename)
+    finally:
+        if ros_home is None:
+            del os.environ['ROS_HOME']
+        else:
+            os.environ['ROS_HOME'] = ros_home
+        link_graph_compiler._compiled_link_graphs.clear()
+        shutil.rmtree(directory)
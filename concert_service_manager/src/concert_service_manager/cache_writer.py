@@ -0,0 +1,132 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: cache_writer
+
+Writes the service manager's cache files (solution configuration and service
+profiles) atomically, i.e. to a temporary file that is synced and then
+renamed over the original, so a crash never leaves a truncated cache
+behind. Frequently rewritten files (e.g. the solution configuration on every
+enable/disable) can be deferred so that bursts of updates coalesce into a
+single write.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import os
+import tempfile
+import threading
+
+import rospy
+import yaml
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def write_yaml_atomically(filename, data):
+    '''
+      Dump data as yaml to a temporary file in the same directory, sync it and
+      rename it over the target.
+
+      @param filename : target file
+      @type str
+      @param data : anything yaml.safe_dump can handle
+
+      @raise IOError, OSError : if it could not be written
+    '''
+    (fd, tmp_name) = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.' + os.path.basename(filename) + '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yaml.safe_dump(data, f, default_flow_style=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_name, filename)
+    except:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class CacheWriter(object):
+    """
+    Coalesces writes to cache files. Only the most recent data for each file
+    is written, at most ``delay`` seconds after it was first scheduled.
+    """
+    __slots__ = [
+        '_delay',       # seconds to wait for further updates before writing
+        '_pending',     # { filename : data } waiting to be written
+        '_timer',       # threading.Timer for the pending writes or None
+        '_on_written',  # callable(filename) called after each write
+        '_lock',
+    ]
+
+    def __init__(self, delay=0.5, on_written=None):
+        '''
+          @param delay : seconds to wait for further updates before writing
+          @type float
+          @param on_written : called with the filename after each write (e.g. to ignore our own file changes)
+          @type callable
+        '''
+        self._delay = delay
+        self._pending = {}
+        self._timer = None
+        self._on_written = on_written
+        self._lock = threading.Lock()
+
+    def write(self, filename, data, immediate=False):
+        '''
+          Schedule data to be written as yaml to a file, superseding anything already scheduled for it.
+
+          @param filename : target file
+          @type str
+          @param data : anything yaml.safe_dump can handle
+          @param immediate : write it (and anything else pending) now
+          @type bool
+        '''
+        with self._lock:
+            self._pending[filename] = data
+            if immediate:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        '''
+          Write everything that is pending now, e.g. on shutdown.
+        '''
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        '''
+          Must be called with the lock held.
+        '''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending = self._pending
+        self._pending = {}
+        for filename, data in pending.iteritems():
+            try:
+                write_yaml_atomically(filename, data)
+            except (IOError, OSError) as e:
+                rospy.logwarn("Service Manager : failed to write cache file [%s][%s]" % (filename, str(e)))
+                continue
+            if self._on_written is not None:
+                self._on_written(filename)
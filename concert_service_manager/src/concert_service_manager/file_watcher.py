@@ -0,0 +1,248 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: file_watcher
+
+Watches the files backing the service pool (solution configuration, service
+profiles, parameters and interactions) and reports exactly the files that
+changed. On linux this uses inotify (via ctypes, no extra dependencies) so
+checking for changes is a single non-blocking read, elsewhere it falls back
+to polling modification times.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import threading
+
+import rospy
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class PollingFileWatcher(object):
+    """
+    Detects changes by comparing modification times on every call to
+    :meth:`changes`.
+    """
+    __slots__ = [
+        '_mtimes',  # { filename : modification time or None if missing }
+        '_lock',
+    ]
+
+    def __init__(self):
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def set_files(self, filenames):
+        """
+        Replace the set of watched files. Files that were already watched keep their
+        state, new ones start out unchanged.
+
+        :param filenames: files to watch
+        :type filenames: [str]
+        """
+        with self._lock:
+            mtimes = {}
+            for filename in filenames:
+                filename = os.path.abspath(filename)
+                mtimes[filename] = self._mtimes[filename] if filename in self._mtimes else _get_mtime(filename)
+            self._mtimes = mtimes
+
+    def changes(self):
+        """
+        :returns: the watched files that were modified, created or removed since the last call
+        :rtype: set of str
+        """
+        changed = set()
+        with self._lock:
+            for filename, mtime in self._mtimes.iteritems():
+                new_mtime = _get_mtime(filename)
+                if new_mtime != mtime:  # disappearing (None) and reappearing are changes like any other
+                    changed.add(filename)
+                    self._mtimes[filename] = new_mtime
+        return changed
+
+    def discard(self, filename):
+        """
+        Forget any pending change for a file (e.g. after writing it ourselves).
+
+        :param str filename:
+        """
+        with self._lock:
+            filename = os.path.abspath(filename)
+            if filename in self._mtimes:
+                self._mtimes[filename] = _get_mtime(filename)
+
+    def shutdown(self):
+        pass
+
+
+class InotifyFileWatcher(object):
+    """
+    Detects changes with inotify. The directories of the watched files are
+    watched rather than the files themselves so that editors that replace
+    files (write + rename) are caught.
+
+    :raises: :exc:`OSError` if inotify is not available.
+    """
+    __slots__ = [
+        '_fd',           # inotify file descriptor (non blocking)
+        '_directories',  # { directory : watch descriptor }
+        '_watch_descriptors',  # { watch descriptor : directory }
+        '_files',        # { real path : filename as given to set_files }
+        '_pending',      # set of changed filenames not yet returned by changes()
+        '_lock',
+    ]
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    mask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    event_header = struct.Struct('iIII')  # wd, mask, cookie, len
+
+    _libc = None
+
+    def __init__(self):
+        if InotifyFileWatcher._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            if not hasattr(libc, 'inotify_init1'):
+                raise OSError(errno.ENOSYS, "inotify is not available")
+            InotifyFileWatcher._libc = libc
+        self._fd = InotifyFileWatcher._libc.inotify_init1(InotifyFileWatcher.IN_NONBLOCK | InotifyFileWatcher.IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._directories = {}
+        self._watch_descriptors = {}
+        self._files = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def set_files(self, filenames):
+        """
+        Replace the set of watched files. Files that were already watched keep their
+        pending changes, new ones start out unchanged.
+
+        :param filenames: files to watch
+        :type filenames: [str]
+        """
+        with self._lock:
+            self._read_events()
+            files = {}
+            for filename in filenames:
+                files[os.path.realpath(filename)] = os.path.abspath(filename)
+            directories = set([os.path.dirname(path) for path in files.keys()])
+            for directory in [d for d in self._directories.keys() if d not in directories]:
+                InotifyFileWatcher._libc.inotify_rm_watch(self._fd, self._directories[directory])
+                del self._watch_descriptors[self._directories[directory]]
+                del self._directories[directory]
+            for directory in [d for d in directories if d not in self._directories]:
+                wd = InotifyFileWatcher._libc.inotify_add_watch(self._fd, directory, InotifyFileWatcher.mask)
+                if wd < 0:
+                    rospy.logwarn("Service Manager : can't watch directory for changes [%s][%s]" % (directory, os.strerror(ctypes.get_errno())))
+                    continue
+                self._directories[directory] = wd
+                self._watch_descriptors[wd] = directory
+            self._files = files
+            self._pending &= set(files.values())
+
+    def changes(self):
+        """
+        :returns: the watched files that were modified, created or removed since the last call
+        :rtype: set of str
+        """
+        with self._lock:
+            self._read_events()
+            changed = self._pending
+            self._pending = set()
+        return changed
+
+    def discard(self, filename):
+        """
+        Forget any pending change for a file (e.g. after writing it ourselves).
+
+        :param str filename:
+        """
+        with self._lock:
+            self._read_events()
+            self._pending.discard(os.path.abspath(filename))
+
+    def shutdown(self):
+        with self._lock:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+    def _read_events(self):
+        """
+        Drain the inotify queue into the pending set. Must be called with the lock held.
+        """
+        while self._fd >= 0:
+            try:
+                buf = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno != errno.EAGAIN:
+                    rospy.logwarn("Service Manager : failed to read file change events [%s]" % str(e))
+                return
+            offset = 0
+            while offset + InotifyFileWatcher.event_header.size <= len(buf):
+                (wd, mask, unused_cookie, length) = InotifyFileWatcher.event_header.unpack_from(buf, offset)
+                offset += InotifyFileWatcher.event_header.size
+                name = buf[offset:offset + length].rstrip('\0')
+                offset += length
+                if mask & InotifyFileWatcher.IN_Q_OVERFLOW:
+                    self._pending.update(self._files.values())  # lost track, assume everything changed
+                    continue
+                directory = self._watch_descriptors.get(wd, None)
+                if directory is None or not name:
+                    continue
+                filename = self._files.get(os.path.join(directory, name), None)
+                if filename is not None:
+                    self._pending.add(filename)
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def _get_mtime(filename):
+    try:
+        return os.stat(filename).st_mtime
+    except OSError:
+        return None
+
+
+def create_file_watcher():
+    """
+    :returns: an inotify file watcher if possible, otherwise a polling file watcher.
+    :rtype: :class:`.InotifyFileWatcher` or :class:`.PollingFileWatcher`
+    """
+    try:
+        return InotifyFileWatcher()
+    except (OSError, AttributeError) as e:
+        rospy.loginfo("Service Manager : inotify unavailable, polling for file changes instead [%s]" % str(e))
+        return PollingFileWatcher()
@@ -0,0 +1,137 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: launcher_pool
+
+Keeps a few launcher processes (see :mod:`.launcher_worker`) warm, i.e. with
+python and roslaunch already loaded, so that enabling a roslaunched service
+only has to hand over its launch description.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import collections
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import concert_service_utilities
+import rospy
+
+from . import launcher_worker
+
+##############################################################################
+# Classes
+##############################################################################
+
+
+class LauncherPool(object):
+    """
+    A pool of warm launcher processes. Each launch consumes a worker (it
+    becomes the launch's parent process) and a fresh one is forked in its place.
+    """
+    __slots__ = [
+        '_size',     # number of warm workers to keep around
+        '_workers',  # collections.deque of idle subprocess.Popen workers
+        '_lock',
+    ]
+
+    def __init__(self, size=2):
+        '''
+          @param size : number of warm workers to keep around (0 to fork on demand)
+          @type int
+        '''
+        self._size = size
+        self._workers = collections.deque()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._replenish()
+
+    def launch(self, name, launch_text, force_screen=True):
+        '''
+          Hand a launch description to a worker and wait for it to be started.
+
+          @param name : of the launch, for logging
+          @type str
+          @param launch_text : roslaunch xml
+          @type str
+          @param force_screen : force output of the launched nodes to the screen
+          @type bool
+
+          @return handle for the launch, interrupting (or killing) it shuts the launch down gracefully. The
+                  worker is never killed outright, roslaunch has to stop its nodes (they run in their
+                  own sessions, nothing else would ever reap them).
+          @rtype concert_service_utilities.SubprocessHandle
+
+          @raise OSError : if the worker failed to start the launch
+        '''
+        with self._lock:
+            worker = None
+            while self._workers and worker is None:
+                worker = self._workers.popleft()
+                if worker.poll() is not None:
+                    worker = None  # died while idle
+            if worker is None:
+                worker = self._fork_worker()
+            self._replenish()
+        try:
+            worker.stdin.write(json.dumps({'run_id': rospy.get_param('/run_id'), 'launch_text': launch_text, 'force_screen': force_screen}) + '\n')
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+            worker.stdout.close()
+            response = json.loads(line) if line else {'success': False, 'message': "launcher process died"}
+        except (IOError, OSError, ValueError) as e:
+            response = {'success': False, 'message': "lost contact with the launcher process [%s]" % str(e)}
+        if not response['success']:
+            _close_quietly(worker.stdin)
+            if worker.poll() is None:
+                worker.kill()
+            worker.wait()
+            raise OSError(response['message'])
+        shutdown_launch = lambda: _close_quietly(worker.stdin)
+        return concert_service_utilities.SubprocessHandle(worker, name=name, interrupt=shutdown_launch, kill=shutdown_launch)
+
+    def shutdown(self):
+        '''
+          Let the idle workers exit (launches already handed out are unaffected).
+        '''
+        with self._lock:
+            self._size = 0
+            while self._workers:
+                _close_quietly(self._workers.popleft().stdin)
+
+    def _replenish(self):
+        '''
+          Must be called with the lock held.
+        '''
+        while len(self._workers) < self._size:
+            try:
+                self._workers.append(self._fork_worker())
+            except OSError as e:
+                rospy.logwarn("Service Manager : failed to fork a launcher process [%s]" % str(e))
+                break
+
+    def _fork_worker(self):
+        worker_script = os.path.splitext(launcher_worker.__file__)[0] + '.py'
+        return subprocess.Popen([sys.executable, worker_script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, close_fds=True)
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def _close_quietly(pipe):
+    try:
+        pipe.close()
+    except (IOError, OSError):
+        pass
@@ -0,0 +1,87 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: launcher_worker
+
+Entry point for the warm launcher processes of the :mod:`.launcher_pool`.
+It is run as a script (not imported) so the worker only pays for importing
+roslaunch, which it does before it is handed any work. The launch
+description is handed to roslaunch in memory, nothing is written to disk.
+
+Protocol:
+
+* stdin : a single json line with the request, ``{'run_id', 'launch_text', 'force_screen'}``.
+  Closing stdin afterwards (or SIGTERM) asks the worker to shut the launch down.
+* stdout : a single json line with the response, ``{'success', 'message'}``. Afterwards stdout
+  is redirected to stderr so output of the launched nodes doesn't end up in the pipe.
+
+The worker exits when everything it launched has terminated, with the first
+non-zero exit code of the launched nodes (128 + signal number for nodes that
+were killed by a signal).
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import json
+import os
+import signal
+import sys
+import threading
+
+import concert_service_utilities
+
+##############################################################################
+# Main
+##############################################################################
+
+
+def _respond(response_file, success, message):
+    response_file.write(json.dumps({'success': success, 'message': message}) + '\n')
+    response_file.flush()
+    response_file.close()
+
+
+def _shutdown_on_eof(parent):
+    '''
+      Shut the launch down when the service manager closes our stdin (or dies).
+    '''
+    while sys.stdin.read(4096):
+        pass
+    parent.shutdown()
+
+
+def main():
+    response_file = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    line = sys.stdin.readline()
+    if not line:
+        return  # the pool was shut down before handing us any work
+    try:
+        request = json.loads(line)
+        parent = concert_service_utilities.create_roslaunch_parent(request['run_id'], request['launch_text'], request['force_screen'])
+        parent.start()
+    except Exception as e:  # anything roslaunch may raise, report it rather than die silently
+        _respond(response_file, False, "failed to roslaunch [%s]" % str(e))
+        return
+    _respond(response_file, True, "success")
+    thread = threading.Thread(target=_shutdown_on_eof, args=(parent,))
+    thread.daemon = True
+    thread.start()
+    # shutting down blocks until the nodes are gone, don't do that in the signal handler
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=parent.shutdown).start())
+    launch = concert_service_utilities.ROSLaunchHandle(parent, 'launcher_worker')  # collects the node exit codes
+    parent.spin()
+    launch.wait()
+    sys.exit(launch.returncode if launch.returncode >= 0 else 128 - launch.returncode)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,11 @@
 # Imports
 ##############################################################################
 
+import ast
+
 import rospy
 import yaml
-import rocon_python_utils
+import concert_service_utilities
 
 
 INVALID_PARAM = ['name', 'description', 'uuid']
@@ -18,31 +20,95 @@ INVALID_PARAM = ['name', 'description', 'uuid']
 ##############################################################################
 
 
-def load_parameters_from_key_value_msg(parameter_key_value_msg, namespace, name, load):
-    for kv in parameter_key_value_msg:
-        load_parameter(kv.key, kv.value, namespace, name, load)
-
-def load_parameters_from_resource(parameter_resource_name, namespace, name, load):
-    filepath = rocon_python_utils.ros.find_resource_from_string(parameter_resource_name, extension='parameters')
-    load_parameters_from_file(filepath, namespace, name, load)
-
-def load_parameters_from_file(parameter_file_path, namespace, name, load):
-    filepath = parameter_file_path
-    with open(filepath) as f:
-        params = yaml.load(f)
-        for k, v in params.items():
-            load_parameter(k, v, namespace, name, load)
-
-def load_parameter(key, value, namespace, name, load):
-    if key in INVALID_PARAM:
-        if load:
-            rospy.logwarn("Service Manager : %s%s [%s]" % (str(k), ' is prohibitted parameter. Ignoring...', name))
-    else:
-        param_name = namespace + '/' + key
-        if load:
-            try:
-                rospy.set_param(param_name, eval(value))
-            except (NameError, TypeError, SyntaxError):
-                rospy.set_param(param_name, value)
-        else:
-            rospy.delete_param(param_name)
+def parse_parameter_value(value):
+    '''
+      Parse a parameter value given as a string into the python literal it represents
+      (numbers, booleans, None, quoted strings, lists, dicts, ...). Anything else, e.g. a bare
+      word, is kept as a string. Unlike eval, this never executes code.
+
+      @param value : the value, only strings are parsed
+      @return the typed value
+    '''
+    if not isinstance(value, basestring):
+        return value
+    try:
+        return ast.literal_eval(value.strip())
+    except (ValueError, SyntaxError, TypeError):
+        return value
+
+
+def build_parameter_tree(parameters, name):
+    '''
+      Build the parameter tree for a service from its (key, value) pairs, so it can be loaded
+      onto the parameter server in a single call. Keys with slashes end up in nested dictionaries.
+
+      @param parameters : (key, value) pairs
+      @type [(str, obj)]
+      @param name : name of the service, for logging
+      @type str
+
+      @return the parameter tree
+      @rtype dict
+    '''
+    tree = {}
+    for key, value in parameters:
+        if key in INVALID_PARAM:
+            rospy.logwarn("Service Manager : %s%s [%s]" % (str(key), ' is prohibitted parameter. Ignoring...', name))
+            continue
+        names = [n for n in key.split('/') if n]
+        if not names:
+            continue
+        subtree = tree
+        for n in names[:-1]:
+            if not isinstance(subtree.get(n, None), dict):
+                subtree[n] = {}
+            subtree = subtree[n]
+        subtree[names[-1]] = parse_parameter_value(value)
+    return tree
+
+
+def parameters_from_key_value_msg(parameter_key_value_msg, name):
+    '''
+      @param parameter_key_value_msg : parameters of a service profile
+      @type [rocon_std_msgs.KeyValue]
+      @return the parameter tree
+      @rtype dict
+    '''
+    return build_parameter_tree([(kv.key, kv.value) for kv in parameter_key_value_msg], name)
+
+
+def parameters_from_resource(parameter_resource_name, name):
+    filepath = concert_service_utilities.find_resource_from_string(parameter_resource_name, extension='parameters')
+    return parameters_from_file(filepath, name)
+
+
+def parameters_from_file(parameter_file_path, name):
+    with open(parameter_file_path) as f:
+        params = yaml.safe_load(f)
+    return build_parameter_tree(params.items() if params else [], name)
+
+
+def set_parameters(namespace, tree):
+    '''
+      Load a parameter tree with a single call to the parameter server. This replaces anything
+      that was previously set under the namespace.
+
+      @param namespace : namespace to load the parameters into
+      @type str
+      @param tree : parameter tree, e.g. from build_parameter_tree()
+      @type dict
+    '''
+    rospy.set_param(namespace, tree)
+
+
+def delete_parameters(namespace):
+    '''
+      Delete a namespace from the parameter server with a single call.
+
+      @param namespace : namespace to remove
+      @type str
+    '''
+    try:
+        rospy.delete_param(namespace)
+    except KeyError:
+        pass  # not set
@@ -9,17 +9,16 @@
 import rospy
 import os
 import subprocess
-import tempfile
 import threading
 
-import roslaunch
+import concert_service_utilities
 import rocon_python_utils
 import concert_msgs.msg as concert_msgs
 import std_msgs.msg as std_msgs
 import rocon_interactions
 import unique_id
 
-from .load_params import load_parameters_from_file, load_parameters_from_resource, load_parameters_from_key_value_msg
+from .launcher_pool import LauncherPool
 from .utils import *
 
 ##############################################################################
@@ -38,8 +37,9 @@ class ServiceInstance(object):
 
         '_namespace',           # namespace that the service will run in
         '_lock',                # protect service enabling/disabling
-        '_proc',                # holds the custom subprocess variable if TYPE_CUSTOM
-        '_roslaunch',           # holds the roslaunch parent variable if TYPE_ROSLAUNCH
+        '_process',             # concert_service_utilities.ProcessHandle for the custom subprocess (TYPE_CUSTOM) or roslaunch (TYPE_ROSLAUNCH)
+        '_launcher_pool',       # launcher_pool.LauncherPool providing warm processes for roslaunching
+        '_process_supervisor',  # concert_service_utilities.ProcessSupervisor stopping the process on disable
         '_shutdown_publisher',  # used for disabling the service
         '_concert_name',  # todo
         '_disable_cache',  # todo
@@ -47,13 +47,16 @@ class ServiceInstance(object):
         'name',
     ]
 
-    shutdown_timeout = 5
-    kill_timeout = 10
-
-    def __init__(self, concert_name=None, disable_cache=False, service_profile=None, env=os.environ):
+    def __init__(self, concert_name=None, disable_cache=False, service_profile=None, env=os.environ, launcher_pool=None, process_supervisor=None):
         '''
           @param service_profile :
           @type concert_msgs.msg.ConcertService
+
+          @param launcher_pool : warm launcher processes shared between services, forks on demand if None
+          @type launcher_pool.LauncherPool
+
+          @param process_supervisor : supervisor shared between services, with default deadlines if None
+          @type concert_service_utilities.ProcessSupervisor
         '''
         self._concert_name = rocon_python_utils.ros.get_ros_friendly_name(concert_name)
         self._disable_cache = disable_cache
@@ -64,13 +67,14 @@ class ServiceInstance(object):
         self._namespace = '/services/' + str(self.msg.name)
 
         self._lock = threading.Lock()
-        self._proc = None
-        self._roslaunch = None
+        self._process = None
+        self._launcher_pool = launcher_pool if launcher_pool is not None else LauncherPool(size=0)
+        self._process_supervisor = process_supervisor if process_supervisor is not None else concert_service_utilities.ProcessSupervisor("Service Manager")
         self._shutdown_publisher = rospy.Publisher(self._namespace + "/shutdown", std_msgs.Empty, latch=False, queue_size=5)
 
     def __del__(self):
-        if self._proc is not None:
-            self._proc.kill()
+        if self._process is not None:
+            self._process.kill()  # for a roslaunch this only shuts it down, so its nodes don't get orphaned
 
     def enable(self, unique_identifier, interactions_loader):
         '''
@@ -86,14 +90,9 @@ class ServiceInstance(object):
         success = False
         self._lock.acquire()
         try:
-            # load up parameters first so that when start runs, it can find the params immediately
-            if self.msg.parameters != '':
-                namespace = concert_msgs.Strings.SERVICE_NAMESPACE + '/' + self.msg.name
-                load_parameters_from_key_value_msg(self.msg.parameters_detail, namespace, self.msg.name, load=True)
-
             # Refresh the unique id
             self.msg.uuid = unique_id.toMsg(unique_identifier)
-            self._start()
+            self._start()  # Can raise OSError if the process or the launcher could not be started
             if self.msg.interactions != '':
                 # Can raise YamlResourceNotFoundException, MalformedInteractionsYaml
                 if self._disable_cache:
@@ -106,10 +105,11 @@ class ServiceInstance(object):
 
             self.loginfo("service enabled [%s]" % self.msg.name)
             message = "success"
-        except (rocon_interactions.YamlResourceNotFoundException, rocon_interactions.MalformedInteractionsYaml) as e:
+        except (rocon_interactions.YamlResourceNotFoundException, rocon_interactions.MalformedInteractionsYaml, OSError) as e:
             message = "failed to enable service [%s][%s]" % (self.msg.name, str(e))
             self.logwarn(message)
-        self._lock.release()
+        finally:
+            self._lock.release()
         return success, message
 
     def disable(self, interactions_loader):
@@ -122,10 +122,6 @@ class ServiceInstance(object):
         self._lock.acquire()
         self._shutdown_publisher.publish(std_msgs.Empty())
         try:
-            if self.msg.parameters != '':
-                namespace = concert_msgs.Strings.SERVICE_NAMESPACE + '/' + self.msg.name
-                load_parameters_from_key_value_msg(self.msg.parameters_detail, namespace, self.msg.name, load=False)
-
             if self.msg.interactions != '':
                 # Can raise YamlResourceNotFoundException, MalformedInteractionsYaml
                 if self._disable_cache:
@@ -137,27 +133,15 @@ class ServiceInstance(object):
             launcher_type = self.msg.launcher_type
             force_kill = False
 
-            if launcher_type == concert_msgs.ServiceProfile.TYPE_CUSTOM:
-                count = 0
-                while not rospy.is_shutdown() and self._proc.poll() is None:
-                    rospy.rostime.wallsleep(0.5)
-                    if count == 2 * ServiceInstance.shutdown_timeout:
-                        self._proc.terminate()
-                    if count == 2 * ServiceInstance.kill_timeout:
-                        self.loginfo("waited too long, force killing..")
-                        self._proc.kill()
-                        force_kill = True
-                        break
-                    count = count + 1
-            elif launcher_type == concert_msgs.ServiceProfile.TYPE_ROSLAUNCH:
-                rospy.loginfo("Service Manager : shutting down roslaunched concert service [%s]" % self.msg.name)
-                count = 0
-                # give it some time to naturally die first.
-                while self._roslaunch.pm and not self._roslaunch.pm.done:
-                    if count == 2 * ServiceInstance.shutdown_timeout:
-                        self._roslaunch.shutdown()
-                    rospy.rostime.wallsleep(0.5)
-                    count = count + 1
+            if (launcher_type == concert_msgs.ServiceProfile.TYPE_CUSTOM or launcher_type == concert_msgs.ServiceProfile.TYPE_ROSLAUNCH) and self._process is not None:
+                if launcher_type == concert_msgs.ServiceProfile.TYPE_ROSLAUNCH:
+                    rospy.loginfo("Service Manager : shutting down roslaunched concert service [%s]" % self.msg.name)
+                # give it some time to naturally die first, then ask it to shut down (terminate a custom
+                # process, shutdown the roslaunch) and finally kill it (a roslaunch is only ever shut
+                # down, it then waits for its nodes). Returns as soon as it exits.
+                # The supervisor logs the exit code.
+                (unused_returncode, force_kill) = self._process_supervisor.stop(self._process)
+                self._process = None
             elif launcher_type == concert_msgs.ServiceProfile.TYPE_SHADOW:
                 pass  # no processes to kill
             success = True
@@ -165,7 +149,8 @@ class ServiceInstance(object):
         except (rocon_interactions.YamlResourceNotFoundException, rocon_interactions.MalformedInteractionsYaml) as e:
             success = False
             message = "error while disabling [%s][%s]" % (self.msg.name, str(e))
-        self._lock.release()
+        finally:
+            self._lock.release()
         return success, message
 
     def _start(self):
@@ -175,7 +160,7 @@ class ServiceInstance(object):
         if launcher_type == concert_msgs.ServiceProfile.TYPE_CUSTOM:
             launcher = self.msg.launcher
             launcher = launcher.split(" ")
-            self._proc = subprocess.Popen(launcher)  # perhaps needs env=os.environ as an argument
+            self._process = self._process_supervisor.supervise(concert_service_utilities.SubprocessHandle(subprocess.Popen(launcher), name=self.msg.name))  # perhaps needs env=os.environ as an argument
         elif launcher_type == concert_msgs.ServiceProfile.TYPE_ROSLAUNCH:
             self._start_roslaunch()
         elif launcher_type == concert_msgs.ServiceProfile.TYPE_SHADOW:
@@ -185,32 +170,15 @@ class ServiceInstance(object):
             pass
 
     def _start_roslaunch(self):
-        try:
-            force_screen = rospy.get_param(concert_msgs.Strings.PARAM_ROCON_SCREEN, True)
-            roslaunch_file_path = rocon_python_utils.ros.find_resource_from_string(self.msg.launcher, extension='launch')
-            temp = tempfile.NamedTemporaryFile(mode='w+t', delete=False)
-            launch_text = self._prepare_launch_text(roslaunch_file_path, self._namespace)
-            temp.write(launch_text)
-            temp.close()
-            self._roslaunch = roslaunch.parent.ROSLaunchParent(rospy.get_param('/run_id'), [temp.name], is_core=False, process_listeners=[], force_screen=force_screen)
-            self._roslaunch._load_config()
-            self._roslaunch.start()
-        # handle properly case by case instead of using the catchall technique
-#        except Exception as e:
-#            import sys
-#            import traceback
-#            traceback.print_exc(file=sys.stdout)
-#            message = "Error while roslaunching.. " + str(e)
-#            raise Exception(message)
-        finally:
-            if temp:
-                os.unlink(temp.name)
-
-    def _prepare_launch_text(self, roslaunch_filepath, namespace):
-        launch_text = '<launch>\n   <include ns="%s" file="%s">\n' % (namespace, roslaunch_filepath)
-        launch_text += '</include>\n</launch>\n'
+        '''
+          Hand the launch over to a (warm) launcher process, it becomes the parent of the launched nodes.
 
-        return launch_text
+          :raises: :exc:`OSError` if the launcher failed to roslaunch
+        '''
+        force_screen = rospy.get_param(concert_msgs.Strings.PARAM_ROCON_SCREEN, True)
+        roslaunch_file_path = concert_service_utilities.find_resource_from_string(self.msg.launcher, extension='launch')
+        launch_text = concert_service_utilities.compose_namespaced_launch(roslaunch_file_path, self._namespace)
+        self._process = self._process_supervisor.supervise(self._launcher_pool.launch(self.msg.name, launch_text, force_screen))
 
     def to_msg(self):
         return self.msg
@@ -5,6 +5,7 @@
 # Imports
 ##############################################################################
 
+import multiprocessing.pool
 import threading
 
 import roslaunch.pmon
@@ -12,10 +13,13 @@ import rospkg
 import rospy
 import concert_msgs.msg as concert_msgs
 import concert_msgs.srv as concert_srvs
+import concert_service_utilities
 import rocon_interactions
 import unique_id
 
 from .exceptions import NoServiceExistsException
+from .launcher_pool import LauncherPool
+from .load_params import parameters_from_key_value_msg, set_parameters, delete_parameters
 from .service_instance import ServiceInstance
 #from .service_cache_manager import ServiceCacheManager
 from .service_pool import ServicePool
@@ -34,7 +38,11 @@ class ServiceManager(object):
         '_publishers',
         '_enabled_services',     # enabled services { resource_name : ConcertServiceInstance }
         '_interactions_loader',  # rocon_interactions.InteractionLoader
-        'lock',
+        'lock',                  # protects the service pool and enabled services (never held while enabling/disabling)
+        '_service_locks',        # { name : threading.Lock } serialises enabling/disabling of each service
+        '_worker_pool',          # multiprocessing.pool.ThreadPool for enabling/disabling services
+        '_launcher_pool',        # launcher_pool.LauncherPool of warm processes for roslaunching services
+        '_process_supervisor',   # concert_service_utilities.ProcessSupervisor for the services' processes
         '_service_pool',  # manage services profile
     ]
 
@@ -48,6 +56,12 @@ class ServiceManager(object):
         self._enabled_services = {}
         self._parameters = self._setup_ros_parameters()
         self.lock = threading.Lock()
+        self._service_locks = {}
+        self._worker_pool = multiprocessing.pool.ThreadPool(max(1, self._parameters['max_parallel_services']))
+        self._launcher_pool = LauncherPool(max(0, self._parameters['launcher_pool_size']))
+        self._process_supervisor = concert_service_utilities.ProcessSupervisor("Service Manager",
+                                                                               self._parameters['shutdown_timeout'],
+                                                                               self._parameters['kill_timeout'])
         self._interactions_loader = rocon_interactions.InteractionsLoader()
         roslaunch.pmon._init_signal_handlers()
         try:
@@ -72,32 +86,46 @@ class ServiceManager(object):
 
     def _eable_cached_service(self):
         cached_solution_config = self._service_pool.get_solution_config()
+        names = []
         for cached_service in cached_solution_config.values():
             name = cached_service['name']
             enabled = cached_service['enabled']
             if name in self._service_pool.service_profiles.keys():
                 if enabled is True:
-                    self._ros_service_enable_concert_service(concert_srvs.EnableServiceRequest(name, True))
+                    names.append(name)
                 elif enabled is None:
                     if self._parameters['default_auto_enable_services'] == 'all':
-                        self._ros_service_enable_concert_service(concert_srvs.EnableServiceRequest(name, True))
+                        names.append(name)
                     elif type(self._parameters['default_auto_enable_services']) is list and name in self._parameters['default_auto_enable_services']:
-                        self._ros_service_enable_concert_service(concert_srvs.EnableServiceRequest(name, True))
+                        names.append(name)
             else:
                 rospy.logwarn("Service Manager : '%s' is not available. cannot auto enable" % str(name))
+        self._enable_services(names)
 
     def _eable_default_service(self):
+        names = []
         if self._parameters['default_auto_enable_services'] == 'all':
-            for name in self._service_pool.service_profiles.keys():
-                self._ros_service_enable_concert_service(concert_srvs.EnableServiceRequest(name, True))
+            names = self._service_pool.service_profiles.keys()
         elif type(self._parameters['default_auto_enable_services']) is list:
             for name in self._parameters['default_auto_enable_services']:
                 if name in self._service_pool.service_profiles.keys():
-                    self._ros_service_enable_concert_service(concert_srvs.EnableServiceRequest(name, True))
+                    names.append(name)
                 else:
                     rospy.logwarn("Service Manager : '%s' is not available. cannot auto enable" % str(name))
-        else:
-            self.publish_update()  # publish the available list
+        self._enable_services(names)
+
+    def _enable_services(self, names):
+        '''
+          Enable several services concurrently on the worker pool (so startup takes as long as
+          the slowest service, not the sum of them all) and publish the result once.
+
+          :param str[] names: names of the services to enable
+        '''
+        results = [self._worker_pool.apply_async(self._enable_service, (name, True, False)) for name in names]
+        for result in results:
+            result.get()  # re-raises anything unexpected, as enabling them one by one would have
+        with self.lock:
+            self.publish_update()  # also publishes the available list if nothing was enabled
 
     def _setup_ros_parameters(self):
         rospy.logdebug("Service Manager : parsing parameters")
@@ -106,30 +134,34 @@ class ServiceManager(object):
         parameters['concert_name'] = rospy.get_param('~concert_name', "")
         parameters['solution_configuration'] = rospy.get_param('~services', "")  # @IgnorePep8
         parameters['default_auto_enable_services'] = rospy.get_param('~default_auto_enable_services', [])  # @IgnorePep8
+        parameters['max_parallel_services'] = rospy.get_param('~max_parallel_services', 4)  # services that may be enabled/disabled at once
+        parameters['launcher_pool_size'] = rospy.get_param('~launcher_pool_size', 2)  # warm processes kept around for roslaunching services
+        parameters['shutdown_timeout'] = rospy.get_param('~shutdown_timeout', 5.0)  # seconds a disabled service gets to exit before it is interrupted
+        parameters['kill_timeout'] = rospy.get_param('~kill_timeout', 10.0)  # seconds a disabled service gets to exit before it is killed
         return parameters
 
-    def _setup_service_parameters(self, name, description, priority, unique_identifier):
+    def _setup_service_parameters(self, service_profile, unique_identifier):
         '''
-          Dump some important information for the services to self-introspect on in the namespace in which
-          they will be started.
+          Dump some important information for the services to self-introspect on, along with the
+          service's own parameters, in the namespace in which they will be started. This is done
+          before starting the service so that it can find the params immediately and it is a
+          single call to the parameter server.
 
-          :param str name: text name for the service (unique)
-          :param str description: text description of the service
-          :param int priority: a numeric priority level that can be configured at service level for establishing resource requests
+          :param concert_msgs.ServiceProfile service_profile: profile of the service (name, description, priority and parameters)
           :param uuid.UUID unique_identifier: unique id for the service
         '''
-        namespace = concert_msgs.Strings.SERVICE_NAMESPACE + '/' + name
-        rospy.set_param(namespace + "/name", name)
-        rospy.set_param(namespace + "/description", description)
-        rospy.set_param(namespace + "/priority", priority)
-        rospy.set_param(namespace + "/uuid", unique_id.toHexString(unique_id.toMsg(unique_identifier)))
+        namespace = concert_msgs.Strings.SERVICE_NAMESPACE + '/' + service_profile.name
+        parameters = {'name': service_profile.name,
+                      'description': service_profile.description,
+                      'priority': service_profile.priority,
+                      'uuid': unique_id.toHexString(unique_id.toMsg(unique_identifier))
+                      }
+        if service_profile.parameters != '':
+            parameters.update(parameters_from_key_value_msg(service_profile.parameters_detail, service_profile.name))
+        set_parameters(namespace, parameters)
 
     def _cleanup_service_parameters(self, name):
-        namespace = concert_msgs.Strings.SERVICE_NAMESPACE + '/' + name
-        rospy.delete_param(namespace + "/name")
-        rospy.delete_param(namespace + "/description")
-        rospy.delete_param(namespace + "/priority")
-        rospy.delete_param(namespace + "/uuid")
+        delete_parameters(concert_msgs.Strings.SERVICE_NAMESPACE + '/' + name)
 
     def _setup_ros_services(self):
         services = {}
@@ -148,64 +180,87 @@ class ServiceManager(object):
         service_profile = req.service_profile
         service_name = service_profile.name
         # write at cache
-        if service_name in self._enabled_services.keys():
-            success = False
-            message = "%s service is running. First, stop %s service" % (service_name, service_name)
-        else:
-            self.lock.acquire()
-            (success, message) = self._service_pool.update_service_cache(service_profile)
-            self.lock.release()
+        with self._service_lock(service_name):
+            with self.lock:
+                if service_name in self._enabled_services.keys():
+                    success = False
+                    message = "%s service is running. First, stop %s service" % (service_name, service_name)
+                else:
+                    (success, message) = self._service_pool.update_service_cache(service_profile)
 
         return concert_srvs.UpdateServiceConfigResponse(success, message)
 
     def _ros_service_enable_concert_service(self, req):
-        name = req.name
-        success = False
-        message = "unknown error"
         if req.enable:
-            self.loginfo("serving request to enable '%s'" % name)
+            self.loginfo("serving request to enable '%s'" % req.name)
         else:
-            self.loginfo("serving request to disable '%s'" % name)
+            self.loginfo("serving request to disable '%s'" % req.name)
+        success, message = self._worker_pool.apply_async(self._enable_service, (req.name, req.enable)).get()
+        return concert_srvs.EnableServiceResponse(success, message)
 
-        self.lock.acquire()  # could be an expensive lock?
-        # DJS : reload the service pool
+    def _service_lock(self, name):
+        '''
+          :param str name: name of the service
+          :returns: the lock serialising enabling/disabling (and reconfiguring) of this service
+          :rtype: threading.Lock
+        '''
+        with self.lock:
+            return self._service_locks.setdefault(name, threading.Lock())
+
+    def _enable_service(self, name, enable, publish=True):
+        '''
+          Enable or disable a service. Only this service's lock is held while it starts up or
+          shuts down (which can take several seconds), the global lock is only taken to update
+          the service pool and the enabled services, so other services can be enabled/disabled
+          concurrently.
+
+          :param str name: name of the service
+          :param bool enable: enable if true, disable otherwise
+          :param bool publish: publish the updated service list when done
+          :returns: success and a message explaining the result
+          :rtype: (bool, str)
+        '''
+        success = False
+        message = "unknown error"
         try:
-            if req.enable:
-                self._service_pool.reload_services()
-                # Check if the service name is in the currently loaded service profiles
-                if name not in self._enabled_services.keys():
-                    try:
-                        service_instance = ServiceInstance(self._parameters['concert_name'], self._parameters['disable_cache'], self._service_pool.find(name).msg)
-                    except NoServiceExistsException:
-                        # do some updating of the service pool here
-                        raise NoServiceExistsException("service not found on the package path [%s]" % name)
+            with self._service_lock(name):
+                if enable:
+                    with self.lock:
+                        # DJS : reload the service pool
+                        self._service_pool.reload_services()
+                        # Check if the service name is in the currently loaded service profiles
+                        if name in self._enabled_services.keys():
+                            return True, "already enabled"
+                        try:
+                            service_instance = ServiceInstance(self._parameters['concert_name'], self._parameters['disable_cache'], self._service_pool.find(name).msg, launcher_pool=self._launcher_pool, process_supervisor=self._process_supervisor)
+                        except NoServiceExistsException:
+                            # do some updating of the service pool here
+                            raise NoServiceExistsException("service not found on the package path [%s]" % name)
                     unique_identifier = unique_id.fromRandom()
-                    self._setup_service_parameters(service_instance.msg.name,
-                                                   service_instance.msg.description,
-                                                   service_instance.msg.priority,
-                                                   unique_identifier)
+                    self._setup_service_parameters(service_instance.msg, unique_identifier)
                     success, message = service_instance.enable(unique_identifier, self._interactions_loader)
                     if not success:
                         self._cleanup_service_parameters(service_instance.msg.name)
                     else:
-                        self._enabled_services[service_instance.name] = service_instance
+                        with self.lock:
+                            self._enabled_services[service_instance.name] = service_instance
                 else:
-                    success = True
-                    message = "already enabled"
-            else:
-                if not name in self._enabled_services:
-                    raise NoServiceExistsException("no enabled service with that name [%s]" % name)
-                self._cleanup_service_parameters(self._enabled_services[name].msg.name)
-                success, message = self._enabled_services[name].disable(self._interactions_loader)
-                del self._enabled_services[name]
-
+                    with self.lock:
+                        if not name in self._enabled_services:
+                            raise NoServiceExistsException("no enabled service with that name [%s]" % name)
+                        service_instance = self._enabled_services[name]
+                    success, message = service_instance.disable(self._interactions_loader)
+                    self._cleanup_service_parameters(service_instance.msg.name)  # after its nodes are gone, they live in this namespace too
+                    with self.lock:
+                        del self._enabled_services[name]
         except NoServiceExistsException as e:
             rospy.logwarn("Service Manager : %s" % str(e))
             success = False
             message = str(e)
-        self.publish_update()
-        self.lock.release()
-        return concert_srvs.EnableServiceResponse(success, message)
+        if publish:
+            with self.lock:
+                self.publish_update()
+        return success, message
 
     def publish_update(self):
         '''
@@ -224,8 +279,15 @@ class ServiceManager(object):
         rospy.logwarn("Service Manager : " + str(msg))
 
     def spin(self):
-        while not rospy.is_shutdown():
-            self.lock.acquire()
-            self._service_pool.reload_services()
-            self.lock.release()
-            rospy.sleep(0.5)
+        try:
+            while not rospy.is_shutdown():
+                changed_files = self._service_pool.poll_changes()  # cheap, so only lock when there is work to do
+                if changed_files:
+                    with self.lock:
+                        self._service_pool.reload_services(changed_files)
+                rospy.sleep(0.5)
+        finally:
+            with self.lock:
+                self._service_pool.shutdown()  # write out pending cache updates
+            self._launcher_pool.shutdown()
+            self._process_supervisor.shutdown()  # shut the services' processes down gracefully
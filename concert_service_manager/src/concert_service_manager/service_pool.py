@@ -7,7 +7,6 @@
 
 import hashlib
 import os.path
-import time
 import yaml
 import copy
 
@@ -15,12 +14,15 @@ import rospkg
 import roslib.names
 import rospy
 import unique_id
+import concert_service_utilities
 import rocon_python_utils
 import rocon_std_msgs.msg as rocon_std_msgs
 import concert_msgs.msg as concert_msgs
 import scheduler_msgs.msg as scheduler_msgs
 
 from rospy_message_converter import message_converter
+from .cache_writer import CacheWriter, write_yaml_atomically
+from .file_watcher import create_file_watcher
 from .service_profile import ServiceProfile
 from .exceptions import InvalidSolutionConfigurationException
 from .exceptions import InvalidServiceProfileException, NoServiceExistsException
@@ -80,6 +82,23 @@ def load_solution_configuration_from_default(yaml_file):
             identifiers.append(identifier)
     return service_configurations
 
+def _find_reusable_service_profile(service_profiles, service_profile_file, overrides):
+    """
+      Find a loaded service profile that was loaded from the same file with the same overrides.
+
+      :param service_profiles: loaded profiles, { name : ServiceProfile }
+      :type service_profiles: dict
+      :param str service_profile_file: service profile resource name or cached file path
+      :param dict overrides: overrides from the solution configuration
+
+      :returns: the service profile or None
+      :rtype: ServiceProfile
+    """
+    for service_profile in service_profiles.values():
+        if service_profile.is_loaded_from(service_profile_file, overrides):
+            return service_profile
+    return None
+
 ##############################################################################
 # Classes
 ##############################################################################
@@ -93,8 +112,9 @@ class ServicePool(object):
         '_modification_callback',     # callback function. It is called when service_caches_mod_time is changed.
         '_disable_cache',               # flag regarding whether using cache
         'service_profiles',            # dictionary of service profile to use in service manager. {'service name':ServiceProfile class}
-        '_solution_config_mtime',     # lastest modification time of loaded solution configuration file
         '_solution_config_file',      # full path of loaded solution configuration file
+        '_file_watcher',              # reports changes to the solution configuration and service profile files
+        '_cache_writer',              # coalesces and atomically writes the cached solution configuration
     ]
 
     def __init__(self, concert_name, resource_name, disable_cache, modification_callback=None):
@@ -102,42 +122,61 @@ class ServicePool(object):
         self._resource_name = resource_name
         self._disable_cache = disable_cache
         self._modification_callback = modification_callback
-        self._solution_config_mtime = None
         self._solution_config_file = ''
         self.service_profiles = {}
+        self._file_watcher = create_file_watcher()
+        self._cache_writer = CacheWriter(on_written=self._file_watcher.discard)  # our own changes, don't reload for them
         self._load_services()
+        self._watch_files()
 
-    def _load_services(self):
+    def _load_services(self, incremental=False):
         """
         Load services from solution configuration loaded cached or default.
+
+        :param bool incremental: reuse the already resolved solution configuration file and any
+                                 service profiles that are configured exactly as before
         """
+        previous_service_profiles = self.service_profiles
+        self.service_profiles = {}
         try:
             service_config_file = ''
             if self._disable_cache:
                 self._loginfo("load service profile from default configuration")
-                service_config_file = self._load_service_profiles_from_default()
+                service_config_file = self._load_service_profiles_from_default(previous_service_profiles, self._solution_config_file if incremental else None)
+            elif incremental and self._solution_config_file:
+                self._loginfo("reload service profile from cached configuration")
+                service_config_file = self._read_service_profiles_from_cache(self._solution_config_file, previous_service_profiles)
             else:
                 self._loginfo("load service profile from cached configuration")
                 service_config_file = self._load_service_profiles_from_cache()
             self._solution_config_file = service_config_file
-            self._solution_config_mtime = time.ctime(os.path.getmtime(service_config_file))
 
         except rospkg.ResourceNotFound as e:
             self._logwarn(str(e))
+            self.service_profiles = previous_service_profiles
 
-    def _load_service_profiles_from_default(self):
+    def _load_service_profiles_from_default(self, previous_service_profiles={}, default_service_config_file=None):
         """
         Load service profile from default.
 
+        :param previous_service_profiles: profiles to reuse if they are configured identically, { name : ServiceProfile }
+        :type previous_service_profiles: dict
+        :param str default_service_config_file: already resolved solution configuration file (else looked up from the resource name)
+
         :returns: todo
         :rtype: str
 
         """
-        default_service_config_file = rocon_python_utils.ros.find_resource_from_string(self._resource_name)
+        if not default_service_config_file:
+            default_service_config_file = concert_service_utilities.find_resource_from_string(self._resource_name)
         loaded_solution_config = load_solution_configuration_from_default(default_service_config_file)
         for service in loaded_solution_config:
             service_profile_file = rocon_python_utils.ros.check_extension_name(service['resource_name'], '.service')
             overrides = service['overrides']
+            reusable_profile = _find_reusable_service_profile(previous_service_profiles, service_profile_file, overrides)
+            if reusable_profile is not None:
+                self.service_profiles[reusable_profile.name] = reusable_profile
+                continue
             try:
                 read_profile = ServiceProfile(concert_name=self._concert_name,
                                               is_read_from_default=True,
@@ -163,13 +202,30 @@ class ServicePool(object):
             self._load_service_profiles_from_default()
             self._loginfo("create cache file: [%s]" % cached_solution_config_file)
             self._create_cache()
+        return self._read_service_profiles_from_cache(cached_solution_config_file)
+
+    def _read_service_profiles_from_cache(self, cached_solution_config_file, previous_service_profiles={}):
+        """
+        Load the service profiles listed in a cached solution configuration.
 
+        :param str cached_solution_config_file: full path of the cached solution configuration
+        :param previous_service_profiles: profiles to reuse if they are configured identically, { name : ServiceProfile }
+        :type previous_service_profiles: dict
+
+        :returns: file path of solution configuration
+        :rtype: str
+        """
         with open(cached_solution_config_file) as f:
             service_list = yaml.load(f)
             for service in service_list:
                 name = service['name']
                 enabled = service['enabled']
                 service_profile_file = os.path.join(get_service_profile_cache_home(self._concert_name, service['name']), rocon_python_utils.ros.check_extension_name(service['name'], '.service'))
+                reusable_profile = _find_reusable_service_profile(previous_service_profiles, service_profile_file, None)
+                if reusable_profile is not None:
+                    reusable_profile.enabled = enabled
+                    self.service_profiles[reusable_profile.name] = reusable_profile
+                    continue
                 try:
                     read_profile = ServiceProfile(concert_name=self._concert_name,
                                                   is_read_from_default=False,
@@ -195,7 +251,7 @@ class ServicePool(object):
         """
         is_cached_solution_config = True
         try:
-            default_solution_configuration_file = rocon_python_utils.ros.find_resource_from_string(self._resource_name)
+            default_solution_configuration_file = concert_service_utilities.find_resource_from_string(self._resource_name)
         except rospkg.ResourceNotFound as e:
             raise e
         solution_configuration_file_name = default_solution_configuration_file.split('/')[-1]
@@ -225,41 +281,33 @@ class ServicePool(object):
         # save each loaded service profile
         for sp in self.service_profiles.values():
             self._save_service_profile(sp.service_profile)
-        # save solution configuration
-        self._save_solution_config()
+        # save solution configuration (now, it is read back immediately)
+        self._save_solution_config(immediate=True)
 
-    def _check_solution_config_modification(self):
+    def _watch_files(self):
         """
-        Check modification of solution configuration file. It it is removed and modified, return true.
-
-        :returns: flag whether it is modified or not. 
-        :rtype: bool 
+        Watch exactly the files the solution configuration and service profiles were loaded from.
         """
-        is_changed = False
-        if not rocon_python_utils.ros.is_validation_file(self._solution_config_file):
-            is_changed = True
-        else:
-            mtime = time.ctime(os.path.getmtime(self._solution_config_file))
-            if self._solution_config_mtime != mtime:
-                is_changed = True
-                self._solution_config_mtime = mtime
-        return is_changed
+        filenames = [self._solution_config_file] if self._solution_config_file else []
+        for sp in self.service_profiles.values():
+            filenames.extend(sp.get_profile_files())
+        self._file_watcher.set_files(filenames)
 
-    def _save_solution_config(self):
+    def _save_solution_config(self, immediate=False):
         """
-        Save solution configuration about currently loaded service profiles
+        Save solution configuration about currently loaded service profiles. Unless immediate,
+        the write is deferred briefly so that a burst of changes results in a single write.
 
+        :param bool immediate: write it now
         """
         solution_config = {}
         for sp in self.service_profiles.values():
             solution_config[sp.name] = {'name': sp.name, 'enabled': sp.enabled}
         # write solution config file
-        default_solution_config_file = rocon_python_utils.ros.find_resource_from_string(self._resource_name).split('/')[-1]
+        default_solution_config_file = concert_service_utilities.find_resource_from_string(self._resource_name).split('/')[-1]
         cache_solution_config_file = get_concert_home(self._concert_name) + '/' + default_solution_config_file
-        with file(cache_solution_config_file, 'w') as f:
-            yaml.safe_dump(solution_config.values(), f, default_flow_style=False)
+        self._cache_writer.write(cache_solution_config_file, solution_config.values(), immediate)
         self._solution_config_file = cache_solution_config_file
-        self._solution_config_mtime = time.ctime(os.path.getmtime(cache_solution_config_file))
 
     def _save_service_profile(self, loaded_service_profile_from_file):
         """
@@ -277,16 +325,14 @@ class ServicePool(object):
         if 'interactions_detail' in loaded_profile.keys():
             service_interactions_file_name = os.path.join(service_profile_cache_home, rocon_python_utils.ros.check_extension_name(service_name, '.interactions'))
             loaded_profile['interactions'] = service_interactions_file_name.split('/')[-1]
-            with file(service_interactions_file_name, 'w') as f:
-                yaml.safe_dump(loaded_profile['interactions_detail'], f, default_flow_style=False)
+            write_yaml_atomically(service_interactions_file_name, loaded_profile['interactions_detail'])
             del (loaded_profile['interactions_detail'])
 
         # writting parameter data
         if 'parameters_detail' in loaded_profile.keys():
             service_parameters_file_name = os.path.join(service_profile_cache_home, rocon_python_utils.ros.check_extension_name(service_name, '.parameters'))
             loaded_profile['parameters'] = service_parameters_file_name.split('/')[-1]
-            with file(service_parameters_file_name, 'w') as f:
-                yaml.safe_dump(loaded_profile['parameters_detail'], f, default_flow_style=False)
+            write_yaml_atomically(service_parameters_file_name, loaded_profile['parameters_detail'])
             del (loaded_profile['parameters_detail'])
 
         # delete msg key
@@ -295,8 +341,7 @@ class ServicePool(object):
 
         # writting service profile data
         service_profile_file_name = os.path.join(service_profile_cache_home, rocon_python_utils.ros.check_extension_name(service_name, '.service'))
-        with file(service_profile_file_name, 'w') as f:
-            yaml.safe_dump(loaded_profile, f, default_flow_style=False)
+        write_yaml_atomically(service_profile_file_name, loaded_profile)
 
     def _loginfo(self, msg):
         rospy.loginfo("Service Manager : " + str(msg))
@@ -304,28 +349,54 @@ class ServicePool(object):
     def _logwarn(self, msg):
         rospy.logwarn("Service Manager : " + str(msg))
 
-    def reload_services(self):
+    def poll_changes(self):
+        """
+        Cheap check for modified solution configuration or service profile files, it
+        doesn't need to be called with the service manager's lock held.
+
+        :returns: the changed files, pass these on to :meth:`reload_services`
+        :rtype: set of str
+        """
+        return self._file_watcher.changes()
+
+    def reload_services(self, changed_files=None):
         """
         Reload services as checking modification of solution congfiguration and service profile.
-        If they are changed, service reloaded and modification callback is called.
+        If they are changed, service reloaded and modification callback is called. Only the
+        service profiles whose files changed are reloaded.
 
+        :param changed_files: changes already retrieved with :meth:`poll_changes`, or None to check now
+        :type changed_files: set of str
         """
-        # check solution config
-        if self._check_solution_config_modification():
-            self._loginfo('detect changed solution config. reload')
-            self._load_services()
-            if self._modification_callback:
-                self._modification_callback()
-        # check service profile
+        if changed_files is None:
+            changed_files = self.poll_changes()
+        if not changed_files:
+            return
+        # check service profile (first, so an incremental solution config reload picks up the changes)
+        is_modified = False
         for sp in self.service_profiles.values():
-            if sp._check_modification():
+            if any(os.path.abspath(profile_file) in changed_files for profile_file in sp.get_profile_files()):
                 try:
                     sp.reload()
-                except (rospkg.ResourceNotFound, IOError) as e:
-                    self._loginfo('[%s] service profile is broken.' % sp.name)
-                    self._load_services()
-                if self._modification_callback:
-                    self._modification_callback()
+                except (rospkg.ResourceNotFound, IOError, yaml.YAMLError) as e:
+                    self._logwarn('[%s] service profile is broken, keeping the last good version [%s]' % (sp.name, str(e)))
+                    continue
+                is_modified = True
+                if sp.name not in self.service_profiles or self.service_profiles[sp.name] is not sp:
+                    # the name changed, re-key it
+                    for name in [name for name, profile in self.service_profiles.items() if profile is sp]:
+                        del self.service_profiles[name]
+                    self.service_profiles[sp.name] = sp
+        # check solution config
+        if self._solution_config_file and os.path.abspath(self._solution_config_file) in changed_files:
+            self._loginfo('detect changed solution config. reload')
+            concert_service_utilities.invalidate_resource_cache()  # it may refer to packages built since startup
+            self._load_services(incremental=True)
+            is_modified = True
+        self._watch_files()
+        # one callback for all of the changes
+        if is_modified and self._modification_callback:
+            self._modification_callback()
 
     def get_solution_config(self):
         """
@@ -411,11 +482,16 @@ class ServicePool(object):
         if not self._disable_cache:
             is_change = False
             for service_profile_msg in service_profiles_msg:
-                service_profile = message_converter.convert_ros_message_to_dictionary(service_profile_msg)
-                service_name = service_profile['name']
-                service_enabled = service_profile['enabled']
-                if service_enabled != self.service_profiles[service_name].enabled:
-                    self.service_profiles[service_name].enabled = service_enabled
+                service_profile = self.service_profiles[service_profile_msg.name]
+                if service_profile_msg.enabled != service_profile.enabled:
+                    service_profile.enabled = service_profile_msg.enabled
                     is_change = True
             if is_change:
                 self._save_solution_config()
+
+    def shutdown(self):
+        """
+        Write out any pending cache updates and stop watching files.
+        """
+        self._cache_writer.flush()
+        self._file_watcher.shutdown()
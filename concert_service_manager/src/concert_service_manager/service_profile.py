@@ -6,7 +6,6 @@
 ##############################################################################
 
 import os
-import time
 import yaml
 import copy
 import json
@@ -16,10 +15,12 @@ import rospkg
 import rospy
 import unique_id
 
+import concert_service_utilities
 import rocon_python_utils
 import scheduler_msgs.msg as scheduler_msgs
 import rocon_std_msgs.msg as rocon_std_msgs
 import concert_msgs.msg as concert_msgs
+from .service_profile_cache import get_compiled_service_profile_key, load_compiled_service_profile, save_compiled_service_profile
 from .utils import *
 
 ##############################################################################
@@ -30,7 +31,7 @@ from .utils import *
 class ServiceProfile(object):
     __slots__ = [
         '_concert_name',  # concert name for loading service profile from cache
-        '_profile_files',  # a list of pair about service profile files and lasted modification time (*.service, *.parameters, *.interactions)
+        '_profile_files',  # files the service profile was loaded from (*.service, *.parameters, *.interactions and its icon)
         '_is_read_from_default',  # flag whether service profile read from default or not
         '_service_profile_file',  # file path containing service description; "*.service" file path
         '_overrides',  # any overrides that need to be applied after any loading
@@ -49,37 +50,65 @@ class ServiceProfile(object):
         self._service_profile_file = service_profile_file
         self._overrides = overrides
 
-        loaded_profile = {}
         try:
-            if self._is_read_from_default:
-                loaded_profile = self._read_service_profile_from_default()
-            else:
-                loaded_profile = self._read_service_profiles_from_cache()
+            (loaded_profile, self.msg) = self._load_profile()
         except (rospkg.ResourceNotFound, IOError) as e:
             raise e
 
-        self.service_profile = copy.deepcopy(loaded_profile)
+        self.service_profile = loaded_profile
         self.name = self.service_profile['name']
-        self.msg = self._service_profile_to_msg(self.service_profile)
         self.enabled = enabled
 
-    def _check_modification(self):
+    def _load_profile(self):
+        """
+        Load the profile from the compiled profile cache if its source files haven't changed,
+        otherwise parse the yaml files (cached or default) and compile it for next time.
+
+        :returns: the parsed profile and its msg
+        :rtype: (dict, concert_msgs.ServiceProfile)
+
+        :raises: :exc:`rospkg.ResourceNotFound` if the service profile is not available
+        """
+        if self._is_read_from_default:
+            source_file = concert_service_utilities.find_resource_from_string(self._service_profile_file)
+        elif rocon_python_utils.ros.is_validation_file(self._service_profile_file):
+            source_file = self._service_profile_file
+        else:
+            raise rospkg.ResourceNotFound("can not find service file in cache [%s]" % self._service_profile_file)
+        key = get_compiled_service_profile_key(self._service_profile_file, source_file, self._overrides, self._is_read_from_default)
+        compiled = load_compiled_service_profile(key)
+        if compiled is not None:
+            (loaded_profile, msg, source_files) = compiled
+            msg.uuid = unique_id.toMsg(unique_id.fromRandom())
+            self._profile_files = source_files
+            return (loaded_profile, msg)
+        if self._is_read_from_default:
+            loaded_profile = self._read_service_profile_from_default()
+        else:
+            loaded_profile = self._read_service_profiles_from_cache()
+        loaded_profile = copy.deepcopy(loaded_profile)
+        msg = self._service_profile_to_msg(loaded_profile)
+        save_compiled_service_profile(key, loaded_profile, msg, self.get_profile_files())
+        return (loaded_profile, msg)
+
+    def is_loaded_from(self, service_profile_file, overrides):
         """
-        Check modification of service profile files.
+        Check if this profile was loaded from the given file with the given overrides.
 
-        :return: result of modification checking. If they are removed or modified, return true.
-        :rtype: bool 
+        :param str service_profile_file: service profile resource name or cached file path
+        :param dict overrides: overrides from the solution configuration
+        :rtype: bool
         """
-        is_change = False
-        for profile_file in self._profile_files:
-            file_name = profile_file[0]
-            modified_time = profile_file[1]
-            if not rocon_python_utils.ros.is_validation_file(file_name):
-                is_change = True
-            elif modified_time != time.ctime(os.path.getmtime(file_name)):
-                is_change = True
-                profile_file[1] = time.ctime(os.path.getmtime(file_name))
-        return is_change
+        return self._service_profile_file == service_profile_file and self._overrides == overrides
+
+    def get_profile_files(self):
+        """
+        Files the profile was loaded from (*.service, *.parameters, *.interactions and its icon).
+
+        :returns: list of file paths
+        :rtype: [str]
+        """
+        return list(self._profile_files)
 
     def reload(self):
         """
@@ -89,18 +118,17 @@ class ServiceProfile(object):
         :raises: :exc:`rospkg.ResourceNotFound` if the service profile is not available
         """
         self._loginfo("detect [%s] service modification. reload" % self.name)
-        loaded_profile = {}
+        previous_profile_files = self._profile_files
+        self._profile_files = []
         try:
-            if self._is_read_from_default:
-                loaded_profile = self._read_service_profile_from_default()
-            else:
-                loaded_profile = self._read_service_profiles_from_cache()
-        except rospkg.ResourceNotFound as e:
-            raise e
+            (loaded_profile, msg) = self._load_profile()
+        except Exception:
+            self._profile_files = previous_profile_files  # keep watching the last good files
+            raise
 
-        self.service_profile = copy.deepcopy(loaded_profile)
+        self.service_profile = loaded_profile
         self.name = self.service_profile['name']
-        self.msg = self._service_profile_to_msg(self.service_profile)
+        self.msg = msg
 
     def _service_profile_to_msg(self, loaded_profile):
         """
@@ -127,6 +155,8 @@ class ServiceProfile(object):
             msg.launcher_type = loaded_profile['launcher_type']
         if 'icon' in loaded_profile:
             msg.icon = rocon_python_utils.ros.icon_resource_to_msg(loaded_profile['icon'])
+            # the msg holds the icon's contents, so it is a source of the compiled profile too
+            self._profile_files.append(concert_service_utilities.find_resource_from_string(loaded_profile['icon']))
         if 'launcher' in loaded_profile:
             msg.launcher = loaded_profile['launcher']
         if 'interactions' in loaded_profile:
@@ -159,10 +189,10 @@ class ServiceProfile(object):
         overrides = copy.deepcopy(self._overrides)
 
         try:
-            file_name = rocon_python_utils.ros.find_resource_from_string(service_file_name)
+            file_name = concert_service_utilities.find_resource_from_string(service_file_name)
             with open(file_name) as f:
                 loaded_profile = yaml.load(f)
-            self._profile_files.append([file_name, time.ctime(os.path.getmtime(file_name))])
+            self._profile_files.append(file_name)
         except rospkg.ResourceNotFound as e:
             raise e
         loaded_profile['resource_name'] = service_file_name
@@ -180,21 +210,21 @@ class ServiceProfile(object):
         if 'parameters' in loaded_profile.keys():
             loaded_profile['parameters_detail'] = []
             try:
-                parameters_yaml_file = rocon_python_utils.ros.find_resource_from_string(rocon_python_utils.ros.check_extension_name(loaded_profile['parameters'], '.parameters'))
+                parameters_yaml_file = concert_service_utilities.find_resource_from_string(rocon_python_utils.ros.check_extension_name(loaded_profile['parameters'], '.parameters'))
                 with open(parameters_yaml_file) as f:
                     parameters_yaml = yaml.load(f)
                     loaded_profile['parameters_detail'] = parameters_yaml
-                self._profile_files.append([parameters_yaml_file, time.ctime(os.path.getmtime(parameters_yaml_file))])
+                self._profile_files.append(parameters_yaml_file)
             except rospkg.ResourceNotFound as e:
                 raise e
 
         if 'interactions' in loaded_profile.keys():
             try:
-                interactions_yaml_file = rocon_python_utils.ros.find_resource_from_string(rocon_python_utils.ros.check_extension_name(loaded_profile['interactions'], '.interactions'))
+                interactions_yaml_file = concert_service_utilities.find_resource_from_string(rocon_python_utils.ros.check_extension_name(loaded_profile['interactions'], '.interactions'))
                 with open(interactions_yaml_file) as f:
                     interactions_yaml = yaml.load(f)
                     loaded_profile['interactions_detail'] = interactions_yaml
-                self._profile_files.append([interactions_yaml_file, time.ctime(os.path.getmtime(interactions_yaml_file))])
+                self._profile_files.append(interactions_yaml_file)
             except rospkg.ResourceNotFound as e:
                 raise e
 
@@ -217,7 +247,7 @@ class ServiceProfile(object):
         if not rocon_python_utils.ros.is_validation_file(service_file_name):
             raise rospkg.ResourceNotFound("can not find service file in cache [%s]" % service_file_name)
         else:
-            self._profile_files.append([service_file_name, time.ctime(os.path.getmtime(service_file_name))])
+            self._profile_files.append(service_file_name)
             with open(service_file_name) as f:
                 loaded_profile = yaml.load(f)
                 if 'parameters' in loaded_profile.keys():
@@ -225,7 +255,7 @@ class ServiceProfile(object):
                     parameters_yaml_file = os.path.join(get_service_profile_cache_home(concert_name, loaded_profile['name']), loaded_profile['parameters'])
                     if not rocon_python_utils.ros.is_validation_file(parameters_yaml_file):
                         raise rospkg.ResourceNotFound("can not find parameters file in cache [%s]" % parameters_yaml_file)
-                    self._profile_files.append([parameters_yaml_file, time.ctime(os.path.getmtime(parameters_yaml_file))])
+                    self._profile_files.append(parameters_yaml_file)
                     with open(parameters_yaml_file) as f:
                         parameters_yaml = yaml.load(f)
                         loaded_profile['parameters_detail'] = parameters_yaml
@@ -234,7 +264,7 @@ class ServiceProfile(object):
                     interactions_yaml_file = os.path.join(get_service_profile_cache_home(concert_name, loaded_profile['name']), loaded_profile['interactions'])
                     if not rocon_python_utils.ros.is_validation_file(interactions_yaml_file):
                         raise rospkg.ResourceNotFound("can not find interactions file in cache [%s]" % interactions_yaml_file)
-                    self._profile_files.append([interactions_yaml_file, time.ctime(os.path.getmtime(interactions_yaml_file))])
+                    self._profile_files.append(interactions_yaml_file)
                     with open(interactions_yaml_file) as f:
                         interactions_yaml = yaml.load(f)
                         loaded_profile['interactions_detail'] = interactions_yaml
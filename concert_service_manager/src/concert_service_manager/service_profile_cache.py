@@ -0,0 +1,141 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: service_profile_cache
+
+A compiled cache of service profiles. Parsing the yaml for a profile and its
+parameters and interactions (and loading its icon) is slow, so the parsed
+profile and its pre-built (serialised) concert_msgs.ServiceProfile are stored
+in a single file, keyed by a hash of the service profile's source. The yaml
+files remain the (human editable) source: an entry is only used while the
+content hashes of all of its source files still match.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+from cStringIO import StringIO
+
+import genpy
+import rospy
+import rocon_python_utils
+import concert_msgs.msg as concert_msgs
+
+##############################################################################
+# Constants
+##############################################################################
+
+COMPILED_SERVICE_PROFILE_VERSION = '2'
+"""Bump this whenever the compiled format (or the profile -> msg conversion) changes."""
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def get_compiled_service_profile_cache_home():
+    '''
+      Retrieve the location of the directory used for caching compiled service profiles,
+      creating it if necessary.
+
+      @return the directory
+      @rtype str
+    '''
+    cache_home = os.path.join(rocon_python_utils.ros.get_rocon_home(), 'compiled_service_profiles')
+    if not os.path.isdir(cache_home):
+        os.makedirs(cache_home)
+    return cache_home
+
+
+def _hash_file(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_compiled_service_profile_key(service_profile_file, source_file, overrides, is_read_from_default):
+    '''
+      Generate the key for a service profile from its configuration and the contents of its
+      service file (the parameters and interactions files are checked on loading).
+
+      @param service_profile_file : service profile as configured (resource name or cached file path)
+      @type str
+      @param source_file : full path of the service profile
+      @type str
+      @param overrides : overrides from the solution configuration
+      @type dict
+      @param is_read_from_default : loading from the default (package) or cached files
+      @type bool
+
+      @return the key
+      @rtype str
+
+      @raise IOError : if the source file can't be read
+    '''
+    key = hashlib.sha1()
+    key.update(COMPILED_SERVICE_PROFILE_VERSION)
+    key.update(repr((service_profile_file, source_file, is_read_from_default)))
+    key.update(repr(sorted(overrides.items())) if isinstance(overrides, dict) else repr(overrides))
+    key.update(_hash_file(source_file))
+    return key.hexdigest()
+
+
+def load_compiled_service_profile(key):
+    '''
+      @param key : from get_compiled_service_profile_key()
+      @type str
+
+      @return the parsed profile, its msg (with the uuid still to be refreshed) and its source files,
+              or None if not cached or any of the source files changed
+      @rtype (dict, concert_msgs.ServiceProfile, [str]) or None
+    '''
+    try:
+        with open(os.path.join(get_compiled_service_profile_cache_home(), key + '.pickle'), 'rb') as f:
+            (loaded_profile, serialised_msg, source_files) = pickle.load(f)
+        for (filename, file_hash) in source_files:
+            if _hash_file(filename) != file_hash:
+                return None
+        msg = concert_msgs.ServiceProfile()
+        msg.deserialize(serialised_msg)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError, genpy.DeserializationError):
+        return None  # not cached, stale or unusable
+    return (loaded_profile, msg, [filename for (filename, unused_file_hash) in source_files])
+
+
+def save_compiled_service_profile(key, loaded_profile, msg, source_files):
+    '''
+      Store a compiled service profile, failures are only logged (it's just a cache).
+
+      @param key : from get_compiled_service_profile_key()
+      @type str
+      @param loaded_profile : the parsed profile
+      @type dict
+      @param msg : the profile's msg
+      @type concert_msgs.ServiceProfile
+      @param source_files : full paths of the files it was parsed from
+      @type [str]
+    '''
+    tmp_name = None
+    try:
+        buff = StringIO()
+        msg.serialize(buff)
+        source_files = [(filename, _hash_file(filename)) for filename in source_files]
+        cache_file = os.path.join(get_compiled_service_profile_cache_home(), key + '.pickle')
+        (fd, tmp_name) = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((loaded_profile, buff.getvalue(), source_files), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_name, cache_file)  # atomic, readers never see a partial file
+    except (IOError, OSError, pickle.PicklingError) as e:
+        rospy.logwarn("Service Manager : failed to cache compiled service profile [%s][%s]" % (msg.name, str(e)))
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.remove(tmp_name)
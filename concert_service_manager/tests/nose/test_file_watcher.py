@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+
+##############################################################################
+# Imports
+##############################################################################
+
+# enable some python3 compatibility options:
+# (unicode_literals not compatible with python2 uuid module)
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import rocon_console.console as console
+
+from concert_service_manager.file_watcher import InotifyFileWatcher, PollingFileWatcher
+
+##############################################################################
+# Tests
+##############################################################################
+
+
+def touch(filename, contents, offset):
+    with open(filename, 'w') as f:
+        f.write(contents)
+    mtime = time.time() + offset  # make sure the modification time differs, regardless of the filesystem's resolution
+    os.utime(filename, (mtime, mtime))
+
+
+def check_file_watcher(file_watcher):
+    directory = tempfile.mkdtemp()
+    try:
+        service_file = os.path.join(directory, 'chatter.service')
+        parameters_file = os.path.join(directory, 'chatter.parameters')
+        touch(service_file, 'name: chatter', 0)
+        touch(parameters_file, 'message: hello', 0)
+        file_watcher.set_files([service_file, parameters_file])
+        assert file_watcher.changes() == set()
+        touch(service_file, 'name: babbler', 5)
+        assert file_watcher.changes() == set([service_file])
+        assert file_watcher.changes() == set()
+        # replaced (e.g. by an editor), not modified in place
+        touch(parameters_file + '.tmp', 'message: bye', 10)
+        os.rename(parameters_file + '.tmp', parameters_file)
+        assert file_watcher.changes() == set([parameters_file])
+        # our own writes can be ignored
+        touch(service_file, 'name: chatter', 15)
+        file_watcher.discard(service_file)
+        assert file_watcher.changes() == set()
+        os.remove(service_file)
+        assert service_file in file_watcher.changes()
+        assert file_watcher.changes() == set()  # reported once, not for as long as it is missing
+    finally:
+        file_watcher.shutdown()
+        shutil.rmtree(directory)
+
+
+def test_file_watchers():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* File Watchers" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    check_file_watcher(PollingFileWatcher())
+    check_file_watcher(InotifyFileWatcher())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+
+##############################################################################
+# Imports
+##############################################################################
+
+# enable some python3 compatibility options:
+# (unicode_literals not compatible with python2 uuid module)
+from __future__ import absolute_import, print_function
+
+import rocon_console.console as console
+
+from concert_service_manager.load_params import parse_parameter_value, build_parameter_tree
+
+##############################################################################
+# Tests
+##############################################################################
+
+
+def test_parse_parameter_value():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Parse Parameter Values" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    # literals
+    assert parse_parameter_value('1') == 1
+    assert parse_parameter_value(' 2.5 ') == 2.5
+    assert parse_parameter_value('True') is True
+    assert parse_parameter_value('None') is None
+    assert parse_parameter_value("'quoted'") == 'quoted'
+    assert parse_parameter_value('[1, 2]') == [1, 2]
+    assert parse_parameter_value("{'a': 1}") == {'a': 1}
+    # bare words and anything else stay strings
+    assert parse_parameter_value('true') == 'true'
+    assert parse_parameter_value('chatter') == 'chatter'
+    assert parse_parameter_value('/robot/cmd_vel') == '/robot/cmd_vel'
+    assert parse_parameter_value('') == ''
+    # never executed
+    assert parse_parameter_value('__import__("os").getcwd()') == '__import__("os").getcwd()'
+    # values that aren't strings (e.g. from yaml) are left alone
+    assert parse_parameter_value(3) == 3
+    assert parse_parameter_value([1, '2']) == [1, '2']
+
+
+def test_build_parameter_tree():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Build Parameter Trees" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    # nested slash keys
+    tree = build_parameter_tree([('rate', '10'), ('robot/name', 'kobuki'), ('/robot/sensors/laser', 'True'), ('robot//speed', '0.5')], 'chatter')
+    assert tree == {'rate': 10, 'robot': {'name': 'kobuki', 'speed': 0.5, 'sensors': {'laser': True}}}
+    # invalid parameters and empty keys are dropped
+    tree = build_parameter_tree([('name', 'babbler'), ('description', 'x'), ('uuid', '0'), ('/', '1'), ('message', 'hello')], 'chatter')
+    assert tree == {'message': 'hello'}
+    # key collisions, the later key wins
+    assert build_parameter_tree([('a', '1'), ('a/b', '2')], 'chatter') == {'a': {'b': 2}}
+    assert build_parameter_tree([('a/b', '2'), ('a', '1')], 'chatter') == {'a': 1}
+    assert build_parameter_tree([('a/b', '2'), ('a/c', '3')], 'chatter') == {'a': {'b': 2, 'c': 3}}
+    assert build_parameter_tree([], 'chatter') == {}
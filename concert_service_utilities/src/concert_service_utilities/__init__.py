@@ -10,3 +10,6 @@ from .exceptions import ServiceInfoException
 from .scheduler import find_scheduler_requests_topic
 from .service_information import get_service_info
 from .resource_pimp import ResourcePimp
+from .resource_cache import find_resource_from_string, invalidate_resource_cache
+from .process_supervisor import ProcessSupervisor, ProcessHandle, SubprocessHandle, ROSLaunchHandle
+from .launch_composition import compose_namespaced_launch, create_roslaunch_parent
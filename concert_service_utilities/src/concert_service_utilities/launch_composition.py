@@ -0,0 +1,68 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: launch_composition
+
+Composes the roslaunch configuration for services and software in memory.
+The wrapper that pushes a launcher into its namespace is handed to roslaunch
+as a string, so starting a launch needs no temporary files (and concurrent
+launches can't trip over each other's files).
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+from xml.sax.saxutils import quoteattr
+
+import roslaunch.parent
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def compose_namespaced_launch(roslaunch_file_path, namespace):
+    '''
+      Roslaunch xml including a launch file in a namespace.
+
+      @param roslaunch_file_path : full path to the launch file
+      @type str
+      @param namespace : namespace to push the launch down into
+      @type str
+
+      @return the roslaunch xml
+      @rtype str
+    '''
+    return '<launch>\n   <include ns=%s file=%s>\n   </include>\n</launch>\n' % (quoteattr(namespace), quoteattr(roslaunch_file_path))
+
+
+def create_roslaunch_parent(run_id, launch_text, force_screen=True, process_listeners=None):
+    '''
+      Create (but don't start) a roslaunch for an in-memory launch description.
+
+      @param run_id : the ros master's run id
+      @type str
+      @param launch_text : roslaunch xml, e.g. from compose_namespaced_launch()
+      @type str
+      @param force_screen : force output of the launched nodes to the screen
+      @type bool
+      @param process_listeners : roslaunch.pmon.ProcessListeners to notify of the nodes' deaths
+      @type [roslaunch.pmon.ProcessListener]
+
+      @return the roslaunch, with its configuration already loaded
+      @rtype roslaunch.parent.ROSLaunchParent
+
+      @raise roslaunch.RLException : if the configuration is invalid
+    '''
+    parent = roslaunch.parent.ROSLaunchParent(run_id, [], is_core=False,
+                                              process_listeners=process_listeners if process_listeners is not None else [],
+                                              force_screen=force_screen, roslaunch_strs=[launch_text])
+    parent._load_config()
+    return parent
@@ -0,0 +1,286 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: process_supervisor
+
+Event driven supervision of the processes started by the service manager
+and the software farmer. Exits are signalled the moment they happen (a
+waiter blocked in waitpid for subprocesses, the process monitor thread and
+its process listeners for roslaunches) rather than by polling, and stopping
+escalates from a graceful shutdown to a kill on configurable deadlines.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import threading
+
+import roslaunch.pmon
+import rospy
+
+##############################################################################
+# Process Handles
+##############################################################################
+
+
+class ProcessHandle(object):
+    """
+    Base class for supervised processes, signals exit with an event and
+    notifies exit listeners with the exit code.
+    """
+    __slots__ = [
+        'name',             # for logging
+        'returncode',       # exit code once exited, None while running
+        '_exited',          # threading.Event set when the process has exited
+        '_exit_listeners',  # callables(handle) called once the process has exited
+        '_lock',
+    ]
+
+    def __init__(self, name):
+        self.name = name
+        self.returncode = None
+        self._exited = threading.Event()
+        self._exit_listeners = []
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return not self._exited.is_set()
+
+    def wait(self, timeout=None):
+        '''
+          @param timeout : seconds to wait for, forever if None
+          @type float
+          @return whether the process has exited
+          @rtype bool
+        '''
+        self._exited.wait(timeout)
+        return self._exited.is_set()
+
+    def add_exit_listener(self, callback):
+        '''
+          @param callback : called with this handle once the process has exited (immediately if it already has)
+          @type callable
+        '''
+        with self._lock:
+            if self.is_running():
+                self._exit_listeners.append(callback)
+                return
+        callback(self)
+
+    def interrupt(self):
+        '''
+          Ask the process to shut down gracefully.
+        '''
+        raise NotImplementedError()
+
+    def kill(self):
+        raise NotImplementedError()
+
+    def _set_exited(self, returncode):
+        with self._lock:
+            self.returncode = returncode
+            self._exited.set()
+            listeners = self._exit_listeners
+            self._exit_listeners = []
+        for callback in listeners:
+            callback(self)
+
+    def _start_waiter(self, target):
+        thread = threading.Thread(target=target, name="process_supervisor_%s" % self.name)
+        thread.daemon = True
+        thread.start()
+
+
+class SubprocessHandle(ProcessHandle):
+    """
+    Supervises a subprocess.Popen, a waiter thread blocks on it until it exits.
+    """
+    __slots__ = [
+        'process',     # subprocess.Popen
+        '_interrupt',  # callable asking the process to shut down gracefully
+        '_kill',       # callable forcing the process to shut down
+    ]
+
+    def __init__(self, process, name=None, interrupt=None, kill=None):
+        '''
+          @param process : the process to supervise, nothing else should wait on or poll it
+          @type subprocess.Popen
+          @param name : for logging (default: the pid)
+          @type str
+          @param interrupt : asks the process to shut down gracefully (default: terminate)
+          @type callable
+          @param kill : forces the process to shut down (default: kill), e.g. a process that must
+                        clean up after itself can't be killed outright
+          @type callable
+        '''
+        super(SubprocessHandle, self).__init__(name if name is not None else str(process.pid))
+        self.process = process
+        self._interrupt = interrupt if interrupt is not None else process.terminate
+        self._kill = kill if kill is not None else process.kill
+        self._start_waiter(self._wait_for_exit)
+
+    def _wait_for_exit(self):
+        self._set_exited(self.process.wait())
+
+    def interrupt(self):
+        if self.is_running():
+            try:
+                self._interrupt()
+            except OSError:
+                pass  # exited in the meantime
+
+    def kill(self):
+        if self.is_running():
+            try:
+                self._kill()
+            except OSError:
+                pass  # exited in the meantime
+
+
+class ROSLaunchHandle(ProcessHandle, roslaunch.pmon.ProcessListener):
+    """
+    Supervises a started roslaunch.parent.ROSLaunchParent. It has exited once
+    its process monitor has (i.e. all of its nodes have died or it was shut
+    down), the exit code is the first non-zero exit code of its nodes.
+    """
+    __slots__ = [
+        'parent',        # roslaunch.parent.ROSLaunchParent
+        'exit_codes',    # { node process name : exit code } of the nodes that have died
+        '_first_error',  # first non-zero exit code of its nodes
+    ]
+
+    def __init__(self, parent, name):
+        '''
+          @param parent : an already started roslaunch
+          @type roslaunch.parent.ROSLaunchParent
+          @param name : for logging
+          @type str
+        '''
+        super(ROSLaunchHandle, self).__init__(name)
+        self.parent = parent
+        self.exit_codes = {}
+        self._first_error = 0
+        parent.pm.add_process_listener(self)
+        self._start_waiter(self._wait_for_exit)
+
+    def process_died(self, process_name, exit_code):
+        '''
+          Process listener callback from the roslaunch process monitor.
+        '''
+        self.exit_codes[process_name] = exit_code
+        if exit_code and not self._first_error:
+            self._first_error = exit_code
+
+    def _wait_for_exit(self):
+        self.parent.pm.join()  # the process monitor is a thread
+        self._set_exited(self._first_error)
+
+    def interrupt(self):
+        '''
+          Shutdown the roslaunch, the process monitor terminates and if necessary kills its nodes
+          (on its own deadlines).
+        '''
+        if self.is_running():
+            self.parent.shutdown()
+
+    def kill(self):
+        self.interrupt()
+
+##############################################################################
+# Supervisor
+##############################################################################
+
+
+class ProcessSupervisor(object):
+    """
+    Keeps track of the running processes of a node (service manager, software
+    farmer) and stops them with escalating deadlines.
+    """
+    __slots__ = [
+        '_name',              # of the owner, for logging
+        '_shutdown_timeout',  # default seconds to wait for a process to exit by itself before interrupting it
+        '_kill_timeout',      # default seconds after which it is killed
+        '_handles',           # the running ProcessHandles
+        '_lock',
+    ]
+
+    def __init__(self, name, shutdown_timeout=5.0, kill_timeout=10.0):
+        '''
+          @param name : of the owner, for logging, e.g. 'Service Manager'
+          @type str
+          @param shutdown_timeout : default seconds to wait for a process to exit by itself before interrupting it
+          @type float
+          @param kill_timeout : default seconds (from the start of stopping) after which it is killed
+          @type float
+        '''
+        self._name = name
+        self._shutdown_timeout = shutdown_timeout
+        self._kill_timeout = kill_timeout
+        self._handles = set()
+        self._lock = threading.Lock()
+
+    def supervise(self, handle):
+        '''
+          @param handle : process to supervise, its exit code is logged when it exits
+          @type ProcessHandle
+          @return the handle
+          @rtype ProcessHandle
+        '''
+        with self._lock:
+            self._handles.add(handle)
+        handle.add_exit_listener(self._process_exited)
+        return handle
+
+    def stop(self, handle, shutdown_timeout=None, kill_timeout=None):
+        '''
+          Give the process some time to exit by itself, then interrupt it and finally kill it,
+          returning as soon as it has exited.
+
+          @param handle : the process to stop
+          @type ProcessHandle
+          @param shutdown_timeout : seconds before interrupting it (default: the supervisor's)
+          @type float
+          @param kill_timeout : seconds (from the start of stopping) before killing it (default: the supervisor's)
+          @type float
+
+          @return the exit code and whether it had to be killed
+          @rtype (int, bool)
+        '''
+        shutdown_timeout = self._shutdown_timeout if shutdown_timeout is None else shutdown_timeout
+        kill_timeout = self._kill_timeout if kill_timeout is None else kill_timeout
+        force_killed = False
+        if not handle.wait(shutdown_timeout):
+            handle.interrupt()
+            if not handle.wait(max(0.0, kill_timeout - shutdown_timeout)):
+                rospy.logwarn("%s : waited too long, force killing [%s]" % (self._name, handle.name))
+                handle.kill()
+                force_killed = True
+                handle.wait()
+        return handle.returncode, force_killed
+
+    def shutdown(self, shutdown_timeout=0.0, kill_timeout=None):
+        '''
+          Stop all supervised processes (concurrently), e.g. when the owner is shutting down.
+        '''
+        with self._lock:
+            handles = list(self._handles)
+        threads = [threading.Thread(target=self.stop, args=(handle, shutdown_timeout, kill_timeout)) for handle in handles]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _process_exited(self, handle):
+        with self._lock:
+            self._handles.discard(handle)
+        if handle.returncode:
+            rospy.logwarn("%s : process exited with an error [%s][%s]" % (self._name, handle.name, handle.returncode))
+        else:
+            rospy.logdebug("%s : process exited [%s]" % (self._name, handle.name))
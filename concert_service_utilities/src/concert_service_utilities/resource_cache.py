@@ -0,0 +1,100 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Description
+##############################################################################
+
+"""
+.. module:: resource_cache
+
+Memoised resolution of package resource names (e.g. 'concert_service_manager/valid.service')
+to file paths. Resolving a resource can crawl the whole ros package path, while
+the service manager and software farmer resolve the same handful of resources
+over and over (on startup and for every enable/start).
+
+Cached entries are dropped when the ros package path changes and are checked
+to still exist before being returned. A resource that can't be found triggers
+one fresh crawl of the package path, so packages built after startup are found.
+"""
+
+##############################################################################
+# Imports
+##############################################################################
+
+import os
+import threading
+
+import rospkg
+import rocon_python_utils
+
+##############################################################################
+# Cache
+##############################################################################
+
+_resource_cache = {}
+"""Resolved resources, { (resource name, extension) : file path }."""
+_resource_cache_lock = threading.Lock()
+_resource_cache_rospack = None
+"""Shared rospkg.RosPack, which keeps its own cache of package locations."""
+_resource_cache_package_path = None
+"""ROS_PACKAGE_PATH the cache was built for."""
+
+##############################################################################
+# Methods
+##############################################################################
+
+
+def find_resource_from_string(resource, extension=None):
+    '''
+      Memoised version of rocon_python_utils.ros.find_resource_from_string.
+
+      @param resource : package relative resource name, e.g. 'concert_service_manager/valid.service'
+      @type str
+
+      @param extension : file extension to look for, if not part of the resource name
+      @type str
+
+      @return full path to the resource
+      @rtype str
+
+      @raise rospkg.ResourceNotFound : if the resource could not be found, even after a fresh crawl of the package path
+    '''
+    global _resource_cache_rospack, _resource_cache_package_path
+    key = (resource, extension)
+    with _resource_cache_lock:
+        package_path = os.environ.get('ROS_PACKAGE_PATH', None)
+        if package_path != _resource_cache_package_path or _resource_cache_rospack is None:
+            _resource_cache.clear()
+            _resource_cache_rospack = rospkg.RosPack()
+            _resource_cache_package_path = package_path
+        filename = _resource_cache.get(key, None)
+        rospack = _resource_cache_rospack
+    if filename is not None and os.path.isfile(filename):
+        return filename
+    # resolve outside the lock, it can take a while
+    try:
+        filename = rocon_python_utils.ros.find_resource_from_string(resource, rospack=rospack, extension=extension)
+    except rospkg.ResourceNotFound:
+        # the shared rospack only crawls the package path once, the package may have been built since
+        rospack = rospkg.RosPack()
+        filename = rocon_python_utils.ros.find_resource_from_string(resource, rospack=rospack, extension=extension)
+        with _resource_cache_lock:
+            _resource_cache.clear()
+            _resource_cache_rospack = rospack
+            _resource_cache_package_path = package_path
+    with _resource_cache_lock:
+        if rospack is _resource_cache_rospack:  # not invalidated in the meantime
+            _resource_cache[key] = filename
+    return filename
+
+
+def invalidate_resource_cache():
+    '''
+      Drop all cached resources, e.g. after packages were added or removed.
+    '''
+    global _resource_cache_rospack
+    with _resource_cache_lock:
+        _resource_cache.clear()
+        _resource_cache_rospack = None
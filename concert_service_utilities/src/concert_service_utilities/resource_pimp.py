@@ -19,9 +19,9 @@
 ##############################################################################
 
 import abc
+import contextlib
 import sys 
 import threading
-import time
 
 import rospy
 import rocon_python_comms
@@ -34,6 +34,38 @@ import scheduler_msgs.msg as scheduler_msgs
 import concert_service_msgs.msg as concert_service_msgs
 
 
+class CaptureRequest(object):
+    '''
+    Tracks a resource request sent to the scheduler on behalf of a capture,
+    from the time it is sent till it is released or closed. The requester
+    feedback signals it once the scheduler has either granted or closed the
+    request.
+    '''
+    __slots__ = ['uri', 'event', 'granted']
+
+    def __init__(self, uri):
+        '''
+          :param str uri: rocon uri of the resource being captured
+        '''
+        self.uri = uri
+        self.event = threading.Event()
+        self.granted = False
+
+    def signal(self, granted):
+        self.granted = granted
+        self.event.set()
+
+    def wait(self, timeout):
+        '''
+          Block until signalled or the timeout expires.
+
+          :returns: true if the request was granted, false otherwise.
+          :rtype: bool
+        '''
+        self.event.wait(timeout)
+        return self.granted
+
+
 class ResourcePimp(object):
 
     __meta_class = abc.ABCMeta
@@ -48,10 +80,14 @@ class ResourcePimp(object):
         'allocation_timeout',
         'avaialble_resource_publisher_name',
         'avaialble_resources',
+        'published_available_uris',
         'requester',
         'lock',
-        'pending_requests',
-        'allocated_requests'
+        'requests',
+        'requests_lock',
+        'requester_lock',
+        'resource_locks',
+        'allocated_requests',
         'resource_type'
     ]
 
@@ -68,12 +104,17 @@ class ResourcePimp(object):
         self.lock = threading.Lock()
         self.concert_clients_subscriber = rospy.Subscriber(known_resources_topic_name, scheduler_msgs.KnownResources, self.ros_scheduler_known_resources_callback)
         self.available_resource_publisher = rospy.Publisher(self.available_resource_publisher_name, rocon_std_msgs.StringArray, latch=True, queue_size=1)
-        self.available_resources = []
+        self.available_resources = {}  # { uri : scheduler_msgs.CurrentStatus }
+        self.published_available_uris = None  # set of uris last published as available
         self.requester = self.setup_requester(self.service_id)
-        self.pending_requests = []
-        self.allocated_requests = {}
+        self.requests = {}  # { uuid.UUID : CaptureRequest } for all pending and allocated requests
+        self.allocated_requests = {}  # { uri : uuid.UUID } index of the allocated requests
+        self.requests_lock = threading.Lock()  # protects the request tables, never held while waiting or calling out
+        self.requester_lock = threading.Lock()  # serialises calls on the requester
+        self.resource_locks = {}  # { uri : [threading.Lock, number of users] } serialises captures/releases on a single resource
         self.allocate_resource_service_pair_server = rocon_python_comms.ServicePairServer(self.capture_topic_name, self.capture_callback, concert_service_msgs.CaptureResourcePair, use_threads=True)
         self.allocation_timeout = rospy.get_param('allocation_timeout', 15.0)  # seconds
+        rospy.on_shutdown(self.abort_pending_requests)
 
     def setup_requester(self, uuid):
         try:
@@ -94,48 +135,100 @@ class ResourcePimp(object):
           :param msg: incoming message
           :type msg: scheduler_msgs.KnownResources
         '''
-        # find difference of incoming and stored lists based on unique concert names
-        diff = lambda l1, l2: [x for x in l1 if x.uri not in [l.uri for l in l2]]
-        # get all currently invited teleopable robots
-        available_resources = [r for r in msg.resources if self.resource_type in r.rapps and r.status == scheduler_msgs.CurrentStatus.AVAILABLE]
-        preemptible_resources = [r for r in msg.resources if self.resource_type in r.rapps and r.status == scheduler_msgs.CurrentStatus.ALLOCATED and r.priority < self.service_priority]
-        resources = available_resources + preemptible_resources
+        # get all currently invited available or preemptible resources of our type, keyed by uri
+        resources = {}
+        for r in msg.resources:
+            if self.resource_type not in r.rapps:
+                continue
+            if r.status == scheduler_msgs.CurrentStatus.AVAILABLE or \
+               (r.status == scheduler_msgs.CurrentStatus.ALLOCATED and r.priority < self.service_priority):
+                resources[r.uri] = r
         self.lock.acquire()
-        new_resources = diff(resources, self.available_resources)
-        lost_resources = diff(self.available_resources, resources)
-        for resource in new_resources:
-            self.available_resources.append(resource)
-        for resource in lost_resources:
-            # rebuild list in place without lost client
-            self.available_resources[:] = [r for r in self.available_resources if resource.uri != r.uri]
+        lost_uris = set(self.available_resources.keys()) - set(resources.keys())
+        for uri in lost_uris:
+            del self.available_resources[uri]
+        self.available_resources.update(resources)  # new resources and status updates for known ones
+        available_uris = set([uri for uri, r in resources.iteritems() if r.status != scheduler_msgs.CurrentStatus.ALLOCATED])
+        changed = (available_uris != self.published_available_uris)
         self.lock.release()
-        self.publish_available_resources()
+        with self.requests_lock:
+            for uri in lost_uris:
+                self._prune_resource_lock(uri)
+        if changed:
+            self.publish_available_resources()
 
     def publish_available_resources(self):
         self.lock.acquire()
-        #self.logwarn("Publishing: %s" % [r.status for r in self.teleopable_robots])
+        available_uris = set([r.uri for r in self.available_resources.values() if r.status != scheduler_msgs.CurrentStatus.ALLOCATED])
+        self.published_available_uris = available_uris
         msg = rocon_std_msgs.StringArray()
-        msg.strings = [r.uri for r in self.available_resources if r.status != scheduler_msgs.CurrentStatus.ALLOCATED]
+        msg.strings = sorted(available_uris)
         self.available_resource_publisher.publish(msg)
         self.lock.release()
 
     def requester_feedback(self, request_set):
         '''
           Keep an eye on our pending requests and see if they get allocated here.
-          Once they do, kick them out of the pending requests list so _ros_capture_teleop_callback
-          can process and reply to the interaction.
+          Once they are granted or closed, signal the waiting send_allocation_request
+          so the capture callback can process and reply to the interaction.
 
           @param request_set : the modified requests
           @type dic { uuid.UUID : scheduler_msgs.ResourceRequest }
         '''
         for request_id, request in request_set.requests.iteritems():
             #self.logwarn("DJS : request %s has status [%s]" % (request_id, request.msg.status))
-            if request.msg.status == scheduler_msgs.Request.GRANTED:
-                if request_id in self.pending_requests:
-                    self.pending_requests.remove(request_id)
-            elif request.msg.status == scheduler_msgs.Request.CLOSED:
-                self.pending_requests.remove(request_id)
-                self.allocated_requests.remove(request_id)
+            status = request.msg.status
+            if status != scheduler_msgs.Request.GRANTED and status != scheduler_msgs.Request.CLOSED:
+                continue
+            with self.requests_lock:
+                capture_request = self.requests.get(request_id, None)
+                if capture_request is None:
+                    continue
+                if status == scheduler_msgs.Request.CLOSED:
+                    del self.requests[request_id]
+                    if self.allocated_requests.get(capture_request.uri, None) == request_id:
+                        del self.allocated_requests[capture_request.uri]
+            if not capture_request.event.is_set() or status == scheduler_msgs.Request.CLOSED:
+                capture_request.signal(granted=(status == scheduler_msgs.Request.GRANTED))
+
+    def abort_pending_requests(self):
+        '''
+          Wake up any captures still waiting on the scheduler (e.g. on shutdown), they
+          will fail gracefully.
+        '''
+        with self.requests_lock:
+            capture_requests = self.requests.values()
+        for capture_request in capture_requests:
+            if not capture_request.event.is_set():
+                capture_request.signal(granted=False)
+
+    @contextlib.contextmanager
+    def resource_lock(self, uri):
+        '''
+          Hold the lock used to serialise captures and releases of a single resource, captures
+          and releases of different resources proceed concurrently. Locks are dropped again once
+          their resource is no longer available and nobody is using them.
+
+          :param str uri: rocon uri of the resource
+        '''
+        with self.requests_lock:
+            entry = self.resource_locks.setdefault(uri, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.requests_lock:
+                entry[1] -= 1
+                self._prune_resource_lock(uri)
+
+    def _prune_resource_lock(self, uri):
+        '''
+          Must be called with the requests lock held.
+        '''
+        entry = self.resource_locks.get(uri, None)
+        if entry is not None and entry[1] == 0 and uri not in self.available_resources:
+            del self.resource_locks[uri]
 
     def cancel_all_requests(self):
         '''
@@ -143,47 +236,69 @@ class ResourcePimp(object):
           it's lost more allocated resources than the minimum required (in which case it
           cancels everything and starts reissuing new requests).
         '''
-        #self.lock.acquire()
-        self.requester.cancel_all()
-        self.requester.send_requests()
-        #self.lock.release()
+        with self.requester_lock:
+            self.requester.cancel_all()
+            self.requester.send_requests()
 
     def capture_callback(self, request_id, msg):
-        self.lock.acquire()
+        # no global lock here, captures wait on the scheduler concurrently in their own threads
+        # and only serialise on the resource they are capturing (see send_allocation_request)
         response = self.ros_capture_callback(request_id, msg)
         self.allocate_resource_service_pair_server.reply(request_id, response)
-        self.lock.release()
 
 
     def send_allocation_request(self, resource):
-        # Todo : request the scheduler for this resource,
-        # use self.allocation_timeout to fail gracefully
-        resource_request_id = self.requester.new_request([resource], priority=self.service_priority)
-        self.pending_requests.append(resource_request_id)
-        #rospy.logwarn("DJS : resource request id of new request [%s]" % resource_request_id)
-        self.requester.send_requests()
-
-        timeout_time = time.time() + self.allocation_timeout
-        request_result = False
-        while not rospy.is_shutdown() and time.time() < timeout_time:
-            if resource_request_id not in self.pending_requests:
-                self.allocated_requests[resource.uri] = resource_request_id
-                request_result = True
-                break
-            rospy.rostime.wallsleep(0.1)
-
-        if request_result == False:
-            self.requester.rset[resource_request_id].cancel()
-            return False, None
-        else:
-            return True, resource_request_id
+        '''
+          Request the scheduler for this resource and block until it is granted, closed or
+          self.allocation_timeout expires (in which case the request is cancelled).
+          Only captures/releases of the same resource are blocked meanwhile.
+
+          :returns: (success, the resource request id or None)
+          :rtype: (bool, uuid.UUID)
+        '''
+        with self.resource_lock(resource.uri):
+            capture_request = CaptureRequest(resource.uri)
+            with self.requester_lock:
+                resource_request_id = self.requester.new_request([resource], priority=self.service_priority)
+                with self.requests_lock:
+                    self.requests[resource_request_id] = capture_request
+                #rospy.logwarn("DJS : resource request id of new request [%s]" % resource_request_id)
+                self.requester.send_requests()
+
+            request_result = capture_request.wait(self.allocation_timeout) and not rospy.is_shutdown()
+            with self.requests_lock:
+                # check again, it may have been closed after it was granted
+                request_result = request_result and capture_request.granted and resource_request_id in self.requests
+                if request_result:
+                    self.allocated_requests[resource.uri] = resource_request_id
+                else:
+                    self.requests.pop(resource_request_id, None)
+
+            if request_result == False:
+                with self.requester_lock:
+                    try:
+                        self.requester.rset[resource_request_id].cancel()
+                    except KeyError:
+                        pass  # already closed and gone
+                return False, None
+            else:
+                return True, resource_request_id
 
     def send_releasing_request(self, uri):
-        if uri in self.allocated_requests.keys():
-            self.loginfo("released teleopable robot [%s][%s]" % (uri, self.allocated_requests[uri].hex))
-            self.requester.rset[self.allocated_requests[uri]].cancel()
-            self.requester.send_requests()
-            del self.allocated_requests[uri]
+        with self.resource_lock(uri):
+            with self.requests_lock:
+                resource_request_id = self.allocated_requests.pop(uri, None)
+                if resource_request_id is not None:
+                    del self.requests[resource_request_id]
+            if resource_request_id is None:
+                return
+            self.loginfo("released teleopable robot [%s][%s]" % (uri, resource_request_id.hex))
+            with self.requester_lock:
+                try:
+                    self.requester.rset[resource_request_id].cancel()
+                    self.requester.send_requests()
+                except KeyError:
+                    pass  # already closed and gone
 
     @abc.abstractmethod
     def setup_variables(self):
@@ -193,8 +308,8 @@ class ResourcePimp(object):
     def ros_capture_callback(self, request_id, msg):
         '''
          Processes the service pair server 'capture_resource'. This will run
-         in a thread of its own for each request. It has a significantly long lock
-         though - this needs to get fixed.
+         in a thread of its own for each request and is not serialised by a lock,
+         so several captures may be waiting on the scheduler at once.
         '''
         pass
 
@@ -5,12 +5,15 @@
 # Imports
 ##############################################################################
 
+import threading
+
 import rospy
 import roslaunch
 import concert_msgs.srv as concert_srvs
 import concert_msgs.msg as concert_msgs
+import concert_service_utilities
 from .pool import SoftwarePool
-from .instance import SoftwareInstance
+from .instance_pool import SoftwareInstancePool
 from .exceptions import SoftwareInstanceException, InvalidSoftwareprofileException, SoftwareProfileException, SoftwareNotExistException
 
 ##############################################################################
@@ -19,24 +22,60 @@ from .exceptions import SoftwareInstanceException, InvalidSoftwareprofileExcepti
 
 class SoftwareFarmer(object):
     
-    __slots__ = ['_params', '_software_pool', '_running_software', '_pub', '_srv']
+    __slots__ = ['_params', '_software_pool', '_running_software', '_process_supervisor', '_lock', '_pub', '_srv']
 
     def __init__(self):
         self._params = self._setup_ros_parameters()
+        self._lock = threading.Lock()
         self._setup_ros_apis()
         self._software_pool = SoftwarePool()
-        self._running_software = {}
+        self._running_software = {}  # { software name : SoftwareInstancePool }
+        self._process_supervisor = concert_service_utilities.ProcessSupervisor('Software Farm', self._params['shutdown_timeout'], self._params['kill_timeout'])
 
         roslaunch.pmon._init_signal_handlers()
+        self._prewarm_software()
+
+    def _prewarm_software(self):
+        '''
+          Start an instance of each configured software right away (in the background), so
+          that its first user doesn't have to wait for it. These are kept running without users.
+        '''
+        with self._lock:
+            for software_name in self._params['prewarm']:
+                try:
+                    software_profile = self._software_pool.get_profile(software_name)
+                except SoftwareNotExistException as e:
+                    self.logwarn("cannot prewarm software [%s]" % str(e))
+                    continue
+                replicas = self._create_instance_pool(software_profile, min_replicas=1)
+                replicas.prewarm()
+                self._running_software[software_name] = replicas
+                self.loginfo("prewarming %s" % software_name)
+            self.pub_instance_status()
+
+    def _create_instance_pool(self, software_profile, min_replicas=0):
+        return SoftwareInstancePool(software_profile, self._process_supervisor, self._lock, self.pub_instance_status,
+                                    max_replicas=self._params['max_replicas'],
+                                    min_replicas=min_replicas,
+                                    grace_period=self._params['replica_grace_period'],
+                                    linger=self._params['linger'])
 
     def _setup_ros_parameters(self):
         params = {}
+        params['shutdown_timeout'] = rospy.get_param('~shutdown_timeout', 5.0)  # seconds a stopped software gets to exit before it is shut down
+        params['kill_timeout'] = rospy.get_param('~kill_timeout', 10.0)  # seconds a stopped software gets to exit before it is killed
+        params['max_replicas'] = rospy.get_param('~max_replicas', 4)  # instances of a software that may run at once when they fill up
+        params['replica_grace_period'] = rospy.get_param('~replica_grace_period', 10.0)  # seconds an idle surplus instance is kept around for
+        params['linger'] = rospy.get_param('~linger', 30.0)  # seconds the last idle instance of a software is kept around for
+        params['prewarm'] = rospy.get_param('~prewarm', [])  # software to start at startup and keep running
         return params
 
     def _setup_ros_apis(self):
         pub = {}
         pub['list']   = rospy.Publisher('~list',concert_msgs.SoftwareProfiles,latch=True, queue_size=1)
         pub['status'] = rospy.Publisher('~status', concert_msgs.SoftwareInstances, latch=True, queue_size=1)
+        pub['starting'] = rospy.Publisher('~starting', concert_msgs.SoftwareInstances, latch=True, queue_size=1)
+        pub['failed'] = rospy.Publisher('~failed', concert_msgs.SoftwareInstances, latch=True, queue_size=1)
 
         srv = {}
         srv['allocate'] = rospy.Service('~allocate', concert_srvs.AllocateSoftware, self._process_allocate_software)
@@ -45,47 +84,31 @@ class SoftwareFarmer(object):
         self._srv = srv
 
     def _process_allocate_software(self, req): 
-        if req.allocate:
-            response = self._allocate_software(req.software, req.user)
-        else:
-            response = self._deallocate_software(req.software, req.user)
-        self.loginfo("%s['%s']"%(response.success, response.error_message))
-        self.pub_instance_status()
+        with self._lock:
+            if req.allocate:
+                response = self._allocate_software(req.software, req.user)
+            else:
+                response = self._deallocate_software(req.software, req.user)
+            self.loginfo("%s['%s']"%(response.success, response.error_message))
+            self.pub_instance_status()
         return response
 
     def _allocate_software(self, software_name, user):
         resp = concert_srvs.AllocateSoftwareResponse()
         self.loginfo("User[%s] requested to use %s"%(user, software_name))
-        if software_name in self._running_software.keys():
-            instance = self._running_software[software_name]
-            if instance.is_max_capacity(): 
-                resp.success = False
-                resp.error_message = "It exceeds software capacity" 
+        try:
+            if software_name in self._running_software.keys():
+                replicas = self._running_software[software_name]
             else:
-                success, num_user = instance.add_user(user)
-        
-                if success:
-                    resp.success = True
-                    resp.namespace = instance.get_namespace()
-                else:
-                    resp.success = False
-                    resp.error_message = "User[%s] already exist"%str(user)
-        else:
-            try:
                 software_profile = self._software_pool.get_profile(software_name)
-                instance = SoftwareInstance(software_profile)
-                instance.start(user)
-                self._running_software[software_name] = instance
-                resp.success = True
-                resp.namespace = instance.get_namespace() 
-            except SoftwareNotExistException as e:
-                resp.success= False
-                resp.error_message = str(e)
-            except (SoftwareProfileException, SoftwareInstanceException) as e:
-                if instance:
-                    instance.stop()
-                resp.success = False
-                resp.error_message = str(e)
+                replicas = self._create_instance_pool(software_profile)
+            instance = replicas.allocate(user)
+            self._running_software[software_name] = replicas
+            resp.success = True
+            resp.namespace = instance.get_namespace()
+        except (SoftwareNotExistException, SoftwareProfileException, SoftwareInstanceException) as e:
+            resp.success = False
+            resp.error_message = str(e)
         return resp
 
     def _deallocate_software(self, software_name, user):
@@ -93,12 +116,9 @@ class SoftwareFarmer(object):
         success = False
         message = ""
         if software_name in self._running_software.keys():
-            instance = self._running_software[software_name]           
-            success, num_user = instance.remove_user(user)
+            replicas = self._running_software[software_name]
+            success = replicas.deallocate(user)  # stopping an idle instance is deferred to the spin loop
             if success: 
-                if num_user == 0:
-                    instance.stop()
-                    del self._running_software[software_name]
                 message = "success!"
             else:
                 message = "%s not exist"%str(user)
@@ -112,12 +132,45 @@ class SoftwareFarmer(object):
         self.print_pool_status()
         self.pub_pool_status()
         self.pub_instance_status()
-        rospy.spin()
+        try:
+            while not rospy.is_shutdown():
+                self._scale_down()
+                rospy.rostime.wallsleep(0.5)
+        finally:
+            self._process_supervisor.shutdown()  # shut the running software down gracefully
+
+    def _scale_down(self):
+        '''
+          Stop the instances that have been idle for longer than their grace period (surplus
+          instances) or linger period (last instance). They are stopped outside the lock, so
+          allocations don't have to wait for them.
+        '''
+        with self._lock:
+            to_stop = [(replicas, index, instance) for replicas in self._running_software.values() for (index, instance) in replicas.scale_down()]
+            if to_stop:
+                self.pub_instance_status()
+        for (unused_replicas, unused_index, instance) in to_stop:
+            self.loginfo("stopping idle software %s" % instance.get_namespace())
+            instance.stop()
+        with self._lock:
+            for (replicas, index, unused_instance) in to_stop:
+                replicas.stopped(index)
+            for software_name, replicas in self._running_software.items():
+                if replicas.is_empty():
+                    del self._running_software[software_name]
 
     def pub_instance_status(self):
-        instances = self._running_software.values() 
-        msg = [i.to_msg() for i in instances]
-        self._pub['status'].publish(concert_msgs.SoftwareInstances(msg))
+        '''
+          Instances that are up are published on ~status, those still being launched on ~starting
+          and those that failed to launch (with the users that haven't deallocated yet) on ~failed.
+
+          This is not locked here - it should always be called inside a locked scope.
+        '''
+        instances = [i for replicas in self._running_software.values() for i in replicas.instances()]
+        self._pub['status'].publish(concert_msgs.SoftwareInstances([i.to_msg() for i in instances if i.is_ready()]))
+        self._pub['starting'].publish(concert_msgs.SoftwareInstances([i.to_msg() for i in instances if not i.is_ready()]))
+        failed = [i for replicas in self._running_software.values() for i in replicas.failed_instances()]
+        self._pub['failed'].publish(concert_msgs.SoftwareInstances([i.to_msg() for i in failed]))
 
     def pub_pool_status(self):
         profiles, invalid_profiles = self._software_pool.status()
@@ -8,22 +8,20 @@
 
 
 import rospy
-import os
-import subprocess
-import tempfile
-import roslaunch
-import rocon_python_utils.ros
+import concert_service_utilities
 import concert_msgs.msg as concert_msgs
 
 class SoftwareInstance(object):
-        
-    shutdown_timeout = 5
-    kill_timeout = 10
-    
-    def __init__(self, profile):
+
+    def __init__(self, profile, process_supervisor=None, replica=0):
         self._profile = profile
         self._namespace = concert_msgs.Strings.SOFTWARE_NAMESPACE  + '/' + str(self._profile.name)
+        if replica > 0:
+            self._namespace += '_' + str(replica)  # each replica needs its own namespace
         self._users = []
+        self._process = None
+        self._ready = False
+        self._process_supervisor = process_supervisor if process_supervisor is not None else concert_service_utilities.ProcessSupervisor("Software Farm")
 
     def to_msg(self):
         msg = concert_msgs.SoftwareInstance()
@@ -34,41 +32,26 @@ class SoftwareInstance(object):
         msg.users = self._users
         return msg
 
-    def start(self, user):
-        success = False
-        try:
-            force_screen = rospy.get_param(concert_msgs.Strings.PARAM_ROCON_SCREEN, True)
-            roslaunch_file_path = rocon_python_utils.ros.find_resource_from_string(self._profile.msg.launch, extension='launch')
-            temp = tempfile.NamedTemporaryFile(mode='w+t', delete=False)
-            launch_text =self._prepare_launch_text(roslaunch_file_path, self._namespace)
-            temp.write(launch_text)
-            temp.close()
-            self._roslaunch = roslaunch.parent.ROSLaunchParent(rospy.get_param('/run_id'), [temp.name], is_core=False, process_listeners=[], force_screen=force_screen)
-            self._roslaunch._load_config()
-            self._roslaunch.start()
-        finally:
-            if temp:
-                os.unlink(temp.name)
-        
-        self.add_user(user)
-        return success
+    def start(self, user=None):
+        force_screen = rospy.get_param(concert_msgs.Strings.PARAM_ROCON_SCREEN, True)
+        roslaunch_file_path = concert_service_utilities.find_resource_from_string(self._profile.msg.launch, extension='launch')
+        launch_text = concert_service_utilities.compose_namespaced_launch(roslaunch_file_path, self._namespace)
+        parent = concert_service_utilities.create_roslaunch_parent(rospy.get_param('/run_id'), launch_text, force_screen)
+        parent.start()
+        self._process = self._process_supervisor.supervise(concert_service_utilities.ROSLaunchHandle(parent, self._namespace))
+        self._ready = True
+
+        if user is not None:
+            self.add_user(user)
 
     def stop(self):
-        count = 0
-        while self._roslaunch.pm and not self._roslaunch.pm.done:
-            if count == 2 * SoftwareInstance.shutdown_timeout: 
-                self._roslaunch.shutdown()
-            rospy.rostime.wallsleep(0.5)
-            count = count + 1
+        if self._process is not None:
+            self._process_supervisor.stop(self._process)  # returns as soon as the launch has exited
+            self._process = None
+        self._ready = False
         self._users = []
         return True
 
-    def _prepare_launch_text(self, roslaunch_filepath, namespace):
-        launch_text = '<launch>\n   <include ns="%s" file="%s">\n' % (namespace, roslaunch_filepath)
-        launch_text += '</include>\n</launch>\n'
-
-        return launch_text
-
     def add_user(self, user):
         if user in self._users:
             return False, len(self._users)
@@ -88,3 +71,12 @@ class SoftwareInstance(object):
 
     def get_namespace(self):
         return self._namespace
+
+    def get_users(self):
+        return self._users
+
+    def is_ready(self):
+        '''
+          Whether it has been launched (users may be added while it is still starting).
+        '''
+        return self._ready
@@ -0,0 +1,211 @@
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+##############################################################################
+# Imports
+##############################################################################
+
+import threading
+import time
+
+import rospy
+
+from .instance import SoftwareInstance
+from .exceptions import SoftwareInstanceException
+
+##############################################################################
+# Classes
+##############################################################################
+
+class SoftwareInstancePool(object):
+    '''
+      Replicas of a single software. Users go to the least loaded replica, another
+      replica (in its own namespace) is started when all are full. Replicas are
+      started in the background, so users get their namespace straight away, and
+      idle replicas are only stopped after a while: surplus replicas after a grace
+      period, the last one after lingering (in case it is wanted again soon).
+      Replicas that fail to start are kept aside with their users until they have
+      all deallocated, so the failure can be reported to them.
+    '''
+    __slots__ = ['_profile', '_process_supervisor', '_lock', '_on_update',
+                 '_max_replicas', '_min_replicas', '_grace_period', '_linger',
+                 '_replicas', '_idle_since', '_stopping', '_failed']
+
+    def __init__(self, profile, process_supervisor, lock, on_update, max_replicas=1, min_replicas=0, grace_period=0.0, linger=0.0):
+        '''
+        :param profile: the software to run
+        :type profile: SoftwareProfile
+        :param process_supervisor: supervises the replicas' launches
+        :type process_supervisor: concert_service_utilities.ProcessSupervisor
+        :param lock: lock of the owner, serialising access to the pool
+        :type lock: threading.Lock
+        :param on_update: called (with the lock held) when a replica has started or failed to start
+        :type on_update: callable
+        :param max_replicas: maximum number of replicas to run at once
+        :type max_replicas: int
+        :param min_replicas: number of replicas to keep running even without users (see prewarm())
+        :type min_replicas: int
+        :param grace_period: seconds an idle surplus replica is kept around for before it is stopped
+        :type grace_period: float
+        :param linger: seconds the last idle replica is kept around for before it is stopped
+        :type linger: float
+        '''
+        self._profile = profile
+        self._process_supervisor = process_supervisor
+        self._lock = lock
+        self._on_update = on_update
+        self._max_replicas = max(1, max_replicas)
+        self._min_replicas = min(self._max_replicas, max(0, min_replicas))
+        self._grace_period = grace_period
+        self._linger = linger
+        self._replicas = {}    # { replica index : SoftwareInstance }
+        self._idle_since = {}  # { replica index : time it lost its last user (or was started without one) }
+        self._stopping = set()  # replica indices still being stopped, their namespaces can't be reused yet
+        self._failed = {}      # { replica index : SoftwareInstance that failed to start, kept while it has users }
+
+    def allocate(self, user):
+        '''
+          Must be called with the lock held. The replica may still be starting. Users of a
+          replica that failed to start are moved to another one (i.e. they can retry).
+
+        :returns: the replica serving the user
+        :rtype: SoftwareInstance
+
+        :raises: SoftwareInstanceException if the user already uses it or it is at full capacity
+        '''
+        if self.find_replica(user) is not None:
+            raise SoftwareInstanceException("User[%s] already exist" % str(user))
+        self._leave_failed_replica(user)
+        available = [index for index, instance in self._replicas.items() if not instance.is_max_capacity()]
+        if available:
+            index = min(available, key=lambda i: (len(self._replicas[i].get_users()), i))
+            self._replicas[index].add_user(user)
+            self._idle_since.pop(index, None)
+            return self._replicas[index]
+        return self._spawn(user)
+
+    def deallocate(self, user):
+        '''
+          Must be called with the lock held. Replicas that lose their last user are left for
+          scale_down() to stop.
+
+        :returns: whether the user was using it
+        :rtype: bool
+        '''
+        index = self.find_replica(user)
+        if index is None:
+            return self._leave_failed_replica(user)
+        unused_success, num_user = self._replicas[index].remove_user(user)
+        if num_user == 0:
+            self._idle_since[index] = time.time()
+        return True
+
+    def prewarm(self):
+        '''
+          Must be called with the lock held. Start replicas (without users) up to the minimum.
+        '''
+        while len(self._replicas) < self._min_replicas:
+            self._spawn(None)
+
+    def scale_down(self):
+        '''
+          Must be called with the lock held. Take the replicas that have been idle for long enough
+          out of the pool, never going below the minimum. They are handed back for stopping
+          outside the lock, call stopped() for each once done.
+
+        :returns: the replicas to stop
+        :rtype: [(int, SoftwareInstance)]
+        '''
+        now = time.time()
+        to_stop = []
+        for index in sorted(self._idle_since.keys(), reverse=True):
+            instance = self._replicas[index]
+            remaining = len(self._replicas) - 1
+            if not instance.is_ready() or remaining < self._min_replicas:
+                continue  # still starting, or needed to stay warm
+            timeout = self._grace_period if remaining > 0 else self._linger
+            if now - self._idle_since[index] >= timeout:
+                del self._idle_since[index]
+                del self._replicas[index]
+                self._stopping.add(index)
+                to_stop.append((index, instance))
+        return to_stop
+
+    def stopped(self, index):
+        '''
+          Must be called with the lock held once a replica from scale_down() has been stopped.
+        '''
+        self._stopping.discard(index)
+
+    def find_replica(self, user):
+        for index, instance in self._replicas.items():
+            if user in instance.get_users():
+                return index
+        return None
+
+    def instances(self):
+        return [self._replicas[index] for index in sorted(self._replicas.keys())]
+
+    def failed_instances(self):
+        '''
+          Replicas that failed to start, along with the users that haven't deallocated yet.
+        '''
+        return [self._failed[index] for index in sorted(self._failed.keys())]
+
+    def is_empty(self):
+        return not self._replicas and not self._stopping and not self._failed
+
+    def _leave_failed_replica(self, user):
+        '''
+          Drop a user from the replica that failed to start, dropping the replica itself
+          (freeing its namespace) once it has no users left.
+
+        :returns: whether the user was on a failed replica
+        :rtype: bool
+        '''
+        for index, instance in self._failed.items():
+            if user in instance.get_users():
+                unused_success, num_user = instance.remove_user(user)
+                if num_user == 0:
+                    del self._failed[index]
+                return True
+        return False
+
+    def _spawn(self, user):
+        free = set(range(self._max_replicas)) - set(self._replicas.keys()) - self._stopping - set(self._failed.keys())
+        if len(self._replicas) >= self._max_replicas or not free:
+            raise SoftwareInstanceException("It exceeds software capacity")
+        index = min(free)
+        instance = SoftwareInstance(self._profile, self._process_supervisor, replica=index)
+        if user is not None:
+            instance.add_user(user)
+        else:
+            self._idle_since[index] = time.time()
+        self._replicas[index] = instance
+        thread = threading.Thread(target=self._start_replica, args=(index, instance))
+        thread.daemon = True
+        thread.start()
+        return instance
+
+    def _start_replica(self, index, instance):
+        '''
+          Launch a replica in the background. If that fails, it is taken out of the pool and
+          kept aside with its users (see failed_instances()) till they deallocate.
+        '''
+        try:
+            instance.start()
+            error = None
+        except Exception as e:  # anything roslaunch may raise, nothing was supervised yet
+            error = e
+        with self._lock:
+            if error is None:
+                rospy.loginfo("Software Farm : software ready [%s]" % instance.get_namespace())
+            else:
+                rospy.logwarn("Software Farm : failed to start software [%s][%s][users: %s]" % (instance.get_namespace(), str(error), ', '.join(instance.get_users())))
+                if self._replicas.get(index, None) is instance:
+                    del self._replicas[index]
+                    self._idle_since.pop(index, None)
+                    if instance.get_users():
+                        self._failed[index] = instance
+            self._on_update()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+#
+# License: BSD
+#   https://raw.github.com/robotics-in-concert/rocon_concert/license/LICENSE
+#
+
+##############################################################################
+# Imports
+##############################################################################
+
+# enable some python3 compatibility options:
+# (unicode_literals not compatible with python2 uuid module)
+from __future__ import absolute_import, print_function
+
+from nose.tools import assert_raises
+
+import threading
+import time
+
+import rocon_console.console as console
+
+import concert_software_farmer.instance_pool as instance_pool
+from concert_software_farmer.instance import SoftwareInstance
+from concert_software_farmer.exceptions import SoftwareInstanceException
+
+##############################################################################
+# Software
+##############################################################################
+
+
+class Profile(object):
+    '''
+      Just the parts of a software profile the pool and its instances need.
+    '''
+    class Msg(object):
+        def __init__(self, max_count):
+            self.max_count = max_count
+
+    def __init__(self, name, max_count):
+        self.name = name
+        self.msg = Profile.Msg(max_count)
+
+
+class LaunchlessSoftwareInstance(SoftwareInstance):
+    '''
+      Software instance that doesn't roslaunch anything, launches complete once the gate opens.
+    '''
+    gate = threading.Event()
+    failing = False  # whether launches fail
+
+    def start(self, user=None):
+        LaunchlessSoftwareInstance.gate.wait(5.0)
+        if LaunchlessSoftwareInstance.failing:
+            raise RuntimeError("failed to launch")
+        self._ready = True
+
+    def stop(self):
+        self._ready = False
+        self._users = []
+        return True
+
+
+class Pool(object):
+    '''
+      Software instance pool along with its lock and a record of its updates.
+    '''
+    def __init__(self, max_count=2, **kwargs):
+        instance_pool.SoftwareInstance = LaunchlessSoftwareInstance
+        LaunchlessSoftwareInstance.gate.clear()
+        LaunchlessSoftwareInstance.failing = False
+        self.lock = threading.Lock()
+        self.updates = 0
+        self.replicas = instance_pool.SoftwareInstancePool(Profile('chatter', max_count), object(), self.lock, self._on_update, **kwargs)
+
+    def _on_update(self):
+        self.updates += 1
+
+    def wait_for_updates(self, updates):
+        '''
+          Open the gate and wait for the background launches to report back.
+        '''
+        LaunchlessSoftwareInstance.gate.set()
+        timeout = time.time() + 5.0
+        while time.time() < timeout:
+            with self.lock:
+                if self.updates >= updates:
+                    return
+            time.sleep(0.01)
+        assert False, "timed out waiting for replicas to start"
+
+
+def restore_software_instance():
+    instance_pool.SoftwareInstance = SoftwareInstance
+
+##############################################################################
+# Tests
+##############################################################################
+
+
+def test_allocate():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Allocate Software Replicas" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    try:
+        pool = Pool(max_count=2, max_replicas=2)
+        with pool.lock:
+            first = pool.replicas.allocate('dude')
+            assert not first.is_ready()  # users get their namespace while it is still starting
+            assert pool.replicas.allocate('dudette') is first
+            assert_raises(SoftwareInstanceException, pool.replicas.allocate, 'dude')
+            second = pool.replicas.allocate('dude_foo')  # full, so another replica in its own namespace
+            assert second is not first
+            assert second.get_namespace() == first.get_namespace() + '_1'
+            assert pool.replicas.allocate('dude_bar') is second
+            assert_raises(SoftwareInstanceException, pool.replicas.allocate, 'dude_baz')  # at capacity
+            assert pool.replicas.find_replica('dude_bar') == 1
+            assert pool.replicas.find_replica('dude_baz') is None
+        pool.wait_for_updates(2)
+        with pool.lock:
+            assert [i.is_ready() for i in pool.replicas.instances()] == [True, True]
+            # users go to the least loaded replica, the lowest index on ties
+            assert pool.replicas.deallocate('dude_foo')
+            assert not pool.replicas.deallocate('dude_foo')
+            assert pool.replicas.allocate('dude_baz') is second
+            assert pool.replicas.deallocate('dude')
+            assert pool.replicas.deallocate('dude_bar')
+            assert pool.replicas.allocate('dude') is first
+    finally:
+        restore_software_instance()
+
+
+def test_scale_down():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Scale Down Software Replicas" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    try:
+        pool = Pool(max_count=1, max_replicas=2, grace_period=0.0, linger=1000.0)
+        with pool.lock:
+            first = pool.replicas.allocate('dude')
+            second = pool.replicas.allocate('dudette')
+            pool.replicas.deallocate('dude')
+            pool.replicas.deallocate('dudette')
+            assert pool.replicas.scale_down() == []  # never while still starting
+        pool.wait_for_updates(2)
+        with pool.lock:
+            # the surplus replica goes straight away, the last one lingers
+            assert pool.replicas.scale_down() == [(1, second)]
+            assert pool.replicas.scale_down() == []
+            assert pool.replicas.instances() == [first]
+            # its namespace can't be reused until it has stopped
+            assert pool.replicas.allocate('dude') is first
+            assert_raises(SoftwareInstanceException, pool.replicas.allocate, 'dudette')
+            pool.replicas.stopped(1)
+            assert pool.replicas.allocate('dudette').get_namespace() == second.get_namespace()
+            assert not pool.replicas.is_empty()
+    finally:
+        restore_software_instance()
+
+
+def test_prewarm():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Prewarm Software Replicas" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    try:
+        pool = Pool(max_count=1, max_replicas=2, min_replicas=1, grace_period=0.0, linger=0.0)
+        with pool.lock:
+            pool.replicas.prewarm()
+            pool.replicas.prewarm()
+            assert len(pool.replicas.instances()) == 1
+            assert pool.replicas.instances()[0].get_users() == []
+        pool.wait_for_updates(1)
+        with pool.lock:
+            assert pool.replicas.scale_down() == []  # kept warm
+            warm = pool.replicas.instances()[0]
+            assert pool.replicas.allocate('dude') is warm
+            pool.replicas.allocate('dudette')
+        pool.wait_for_updates(2)
+        with pool.lock:
+            pool.replicas.deallocate('dude')
+            pool.replicas.deallocate('dudette')
+            to_stop = pool.replicas.scale_down()
+            assert len(to_stop) == 1  # down to the minimum
+            for (index, unused_instance) in to_stop:
+                pool.replicas.stopped(index)
+            assert len(pool.replicas.instances()) == 1 and not pool.replicas.is_empty()
+    finally:
+        restore_software_instance()
+
+
+def test_failed_launches():
+    print(console.bold + "\n****************************************************************************************" + console.reset)
+    print(console.bold + "* Failed Software Replicas" + console.reset)
+    print(console.bold + "****************************************************************************************" + console.reset)
+    print("")
+    try:
+        pool = Pool(max_count=2, max_replicas=2, min_replicas=1)
+        LaunchlessSoftwareInstance.failing = True
+        with pool.lock:
+            pool.replicas.prewarm()
+        pool.wait_for_updates(1)
+        with pool.lock:
+            # without users there is nobody to tell, it is dropped straight away
+            assert pool.replicas.failed_instances() == []
+            assert pool.replicas.is_empty()
+            LaunchlessSoftwareInstance.gate.clear()
+            failed = pool.replicas.allocate('dude')
+            pool.replicas.allocate('dudette')
+        pool.wait_for_updates(2)
+        with pool.lock:
+            # kept aside with its users, holding on to its namespace
+            assert pool.replicas.instances() == []
+            assert pool.replicas.failed_instances() == [failed]
+            assert failed.get_users() == ['dude', 'dudette']
+            assert not pool.replicas.is_empty()
+            assert pool.replicas.find_replica('dude') is None
+            LaunchlessSoftwareInstance.failing = False
+            # retrying moves the user to a new replica
+            retry = pool.replicas.allocate('dude')
+            assert retry.get_namespace() == failed.get_namespace() + '_1'
+            assert failed.get_users() == ['dudette']
+            assert pool.replicas.deallocate('dudette')
+            assert not pool.replicas.deallocate('dudette')
+            assert pool.replicas.failed_instances() == []
+            assert pool.replicas.allocate('dudette') is retry
+        pool.wait_for_updates(3)
+        with pool.lock:
+            assert pool.replicas.instances() == [retry] and retry.is_ready()
+    finally:
+        restore_software_instance()